@@ -0,0 +1,130 @@
+"""Admission control for AI analyses: per-user rate limits and a bounded queue for LLM calls"""
+import asyncio
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from metrics import Counter, Gauge
+
+LLM_SLOTS_IN_USE = Gauge("resumatch_llm_slots_in_use", "LLM calls in progress in this worker")
+LLM_QUEUE_DEPTH = Gauge("resumatch_llm_queue_depth", "Analyses waiting for an LLM slot in this worker")
+ADMISSION_REJECTIONS = Counter("resumatch_admission_rejections_total", "Requests rejected by admission control", ("reason",))
+
+
+class AdmissionRejected(Exception):
+    """The request was not admitted; retry after ``retry_after`` seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class UserRateLimiter:
+    """Token bucket per user whose state lives in MongoDB, so every worker shares it
+
+    Each user refills ``rate_per_minute`` tokens a minute up to ``burst``. The
+    bucket is stored as the time at which it will next be full (the generic
+    cell rate algorithm), which takes a single compare-and-set to update.
+    If MongoDB is unavailable requests are let through.
+    """
+
+    def __init__(self, collection, rate_per_minute: float = 10.0, burst: int = 5, max_retries: int = 5):
+        self.collection = collection
+        self.interval = 60.0 / rate_per_minute
+        self.burst = burst
+        self.max_retries = max_retries
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def acquire(self, user_id: str, cost: int = 1):
+        """Take ``cost`` tokens from the user's bucket or raise AdmissionRejected"""
+        if cost > self.burst:
+            ADMISSION_REJECTIONS.inc(reason="rate_limit")
+            raise AdmissionRejected(f"At most {self.burst} analyses can be requested at once", self.interval * cost)
+        try:
+            for _ in range(self.max_retries):
+                now = time.time()
+                doc = await self.collection.find_one({"_id": user_id})
+                full_at = max(doc["full_at"], now) if doc else now
+                new_full_at = full_at + cost * self.interval
+                allowed_at = new_full_at - self.burst * self.interval
+                if allowed_at > now:
+                    ADMISSION_REJECTIONS.inc(reason="rate_limit")
+                    raise AdmissionRejected("Too many analyses, please slow down", allowed_at - now)
+
+                fields = {"full_at": new_full_at, "expires_at": datetime.fromtimestamp(new_full_at, timezone.utc)}
+                if doc is None:
+                    try:
+                        await self.collection.insert_one({"_id": user_id, **fields})
+                    except DuplicateKeyError:
+                        continue
+                    return
+                result = await self.collection.update_one({"_id": user_id, "full_at": doc["full_at"]}, {"$set": fields})
+                if result.modified_count:
+                    return
+        except PyMongoError as e:
+            logging.error(f"Rate limiter error, admitting request: {e}")
+            return
+        # Another worker kept winning the update; treat it as contention from this user
+        ADMISSION_REJECTIONS.inc(reason="rate_limit")
+        raise AdmissionRejected("Too many analyses, please slow down", self.interval)
+
+
+class LLMAdmission:
+    """Caps concurrent LLM calls in this worker, with a bounded wait queue
+
+    Callers beyond ``max_concurrent`` wait for a slot. When ``max_waiting``
+    callers are already waiting, or a slot does not free up within
+    ``max_wait_seconds``, AdmissionRejected is raised with a Retry-After
+    estimated from how long calls have recently held a slot. Background work
+    passes ``bounded=False`` to wait as long as it takes.
+    """
+
+    def __init__(self, max_concurrent: int = 8, max_waiting: int = 32, max_wait_seconds: float = 10.0):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.max_wait_seconds = max_wait_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._waiting = 0
+        self._in_use = 0
+        self._hold_seconds = 5.0  # moving average of how long a call holds its slot
+
+    def retry_after(self) -> float:
+        return self._hold_seconds * (self._waiting + 1) / self.max_concurrent
+
+    async def _wait_for_slot(self, bounded: bool):
+        if bounded and self._waiting >= self.max_waiting:
+            ADMISSION_REJECTIONS.inc(reason="queue_full")
+            raise AdmissionRejected("The analysis service is busy, please retry shortly", self.retry_after())
+        self._waiting += 1
+        LLM_QUEUE_DEPTH.set(self._waiting)
+        try:
+            if bounded:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait_seconds)
+            else:
+                await self._semaphore.acquire()
+        except asyncio.TimeoutError:
+            ADMISSION_REJECTIONS.inc(reason="queue_timeout")
+            raise AdmissionRejected("The analysis service is busy, please retry shortly", self.retry_after())
+        finally:
+            self._waiting -= 1
+            LLM_QUEUE_DEPTH.set(self._waiting)
+
+    @asynccontextmanager
+    async def slot(self, bounded: bool = True):
+        await self._wait_for_slot(bounded)
+        self._in_use += 1
+        LLM_SLOTS_IN_USE.set(self._in_use)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * (time.perf_counter() - started)
+            self._in_use -= 1
+            LLM_SLOTS_IN_USE.set(self._in_use)
+            self._semaphore.release()
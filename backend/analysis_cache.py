@@ -0,0 +1,112 @@
+"""Content-addressed cache for AI analysis results
+
+Entries are keyed by a hash of the normalized resume text, the job description
+and the model/prompt version. An in-process LRU tier sits in front of a
+MongoDB collection whose TTL index evicts stale entries.
+"""
+import hashlib
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+from metrics import Counter
+
+CACHE_LOOKUPS = Counter(
+    "resumatch_analysis_cache_lookups_total",
+    "Analysis cache lookups by tier and result",
+    ("tier", "result"),
+)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so cosmetic differences do not change the cache key"""
+    text = unicodedata.normalize("NFKC", text or "")
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def analysis_cache_key(resume_text: str, job_description: str, model: str, prompt_version: str) -> str:
+    """Build the content-addressed key for a resume/job description pair"""
+    digest = hashlib.sha256()
+    for part in (model, prompt_version, normalize_text(resume_text), normalize_text(job_description)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """Two-tier (memory LRU + MongoDB) cache of AI analysis results"""
+
+    def __init__(self, collection, max_entries: int = 1024, ttl_seconds: int = 7 * 24 * 60 * 60):
+        self.collection = collection
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
+    async def ensure_indexes(self):
+        """Create the TTL index that evicts expired entries from MongoDB"""
+        await self.collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+
+    def _get_memory(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, analysis = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return analysis
+
+    def _put_memory(self, key: str, analysis: dict):
+        self._entries[key] = (time.monotonic(), analysis)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Tuple[Optional[dict], str]:
+        """Look up an analysis, returning it with the tier that served it ("memory", "mongo" or "miss")"""
+        analysis = self._get_memory(key)
+        if analysis is not None:
+            CACHE_LOOKUPS.inc(tier="memory", result="hit")
+            return analysis, "memory"
+        CACHE_LOOKUPS.inc(tier="memory", result="miss")
+
+        try:
+            doc = await self.collection.find_one({"_id": key}, {"_id": 0, "analysis": 1})
+        except PyMongoError as e:
+            logging.error(f"Analysis cache lookup error: {e}")
+            doc = None
+
+        if doc:
+            CACHE_LOOKUPS.inc(tier="mongo", result="hit")
+            self._put_memory(key, doc["analysis"])
+            return doc["analysis"], "mongo"
+
+        CACHE_LOOKUPS.inc(tier="mongo", result="miss")
+        return None, "miss"
+
+    async def set(self, key: str, analysis: dict, model: str, prompt_version: str):
+        """Store an analysis in both tiers"""
+        self._put_memory(key, analysis)
+        try:
+            await self.collection.replace_one(
+                {"_id": key},
+                {
+                    "analysis": analysis,
+                    "model": model,
+                    "prompt_version": prompt_version,
+                    # TTL indexes only act on BSON dates, not ISO strings
+                    "created_at": datetime.now(timezone.utc),
+                },
+                upsert=True,
+            )
+        except PyMongoError as e:
+            logging.error(f"Analysis cache store error: {e}")
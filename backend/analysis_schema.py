@@ -0,0 +1,186 @@
+"""Schema for the model's analysis JSON and an incremental parser for streamed responses"""
+import json
+import time
+from typing import Annotated, Any, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
+
+from model_router import InvalidModelResponse
+
+# Fields the prompt asks for first, so the client can show scores before the rest arrives
+SCORE_FIELDS = ("skill_match_score", "experience_score", "ats_score")
+
+
+class AIAnalysis(BaseModel):
+    """The analysis the model returns; the model-produced part of AnalysisResult"""
+    model_config = ConfigDict(extra="ignore")
+    skill_match_score: float = Field(ge=0, le=100)
+    experience_score: float = Field(ge=0, le=100)
+    ats_score: float = Field(ge=0, le=100)
+    matched_skills: List[str]
+    missing_skills: List[str]
+    experience_relevance: str = ""
+    suggestions: List[str] = Field(min_length=1)
+    resume_keywords: List[str] = []
+    job_keywords: List[str] = []
+
+
+# Validators for single fields, so streamed fields are checked before anyone sees them
+_FIELD_ADAPTERS = {
+    name: TypeAdapter(Annotated[(field.annotation, *field.metadata)] if field.metadata else field.annotation)
+    for name, field in AIAnalysis.model_fields.items()
+}
+
+
+class IncrementalObjectParser:
+    """Parses a JSON object arriving in chunks, returning each top-level member once it is complete
+
+    Anything before the opening brace (such as a markdown code fence) is skipped.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.complete = False
+        self.errors: List[str] = []
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start: Optional[int] = None
+
+    def _member(self, end: int) -> Dict[str, Any]:
+        segment = self.text[self._member_start:end].strip()
+        if not segment:
+            return {}
+        try:
+            return json.loads("{" + segment + "}")
+        except json.JSONDecodeError as e:
+            self.errors.append(f"invalid member {segment[:60]!r}: {e.msg}")
+            return {}
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        self.text += chunk
+        members: Dict[str, Any] = {}
+        text = self.text
+        while self._pos < len(text) and not self.complete:
+            char = text[self._pos]
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._member_start = self._pos + 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 1:
+                    members.update(self._member(self._pos))
+                    self.complete = True
+                self._depth -= 1
+            elif char == "," and self._depth == 1:
+                members.update(self._member(self._pos))
+                self._member_start = self._pos + 1
+            self._pos += 1
+        return members
+
+
+def validate_analysis(fields: Dict[str, Any]) -> dict:
+    """Validate parsed fields against AIAnalysis, raising InvalidModelResponse with what is wrong"""
+    try:
+        return AIAnalysis.model_validate(fields).model_dump()
+    except ValidationError as e:
+        problems = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'response'}: {error['msg']}" for error in e.errors()
+        )
+        raise InvalidModelResponse(problems)
+
+
+def validate_field(name: str, value: Any) -> Any:
+    """Validate one field of the analysis, raising InvalidModelResponse if it breaks the schema"""
+    adapter = _FIELD_ADAPTERS.get(name)
+    if adapter is None:
+        raise InvalidModelResponse(f"{name}: not an analysis field")
+    try:
+        return adapter.validate_python(value)
+    except ValidationError as e:
+        raise InvalidModelResponse(f"{name}: {e.errors()[0]['msg']}")
+
+
+def parse_analysis(text: str) -> dict:
+    """Parse and validate a complete model response"""
+    parser = IncrementalObjectParser()
+    fields = parser.feed(text)
+    if not parser.complete:
+        raise InvalidModelResponse("response does not contain a complete JSON object")
+    if parser.errors:
+        raise InvalidModelResponse("; ".join(parser.errors))
+    return validate_analysis(fields)
+
+
+class AnalysisStream:
+    """Collects a streamed analysis, reporting each field as soon as it parses
+
+    ``on_field(name, value)`` is awaited for every completed top-level field
+    that is valid on its own; invalid ones only surface in ``result()``.
+    ``first_score_seconds`` is the time from creation to the first score field
+    and ``parse_seconds`` the time spent parsing and validating.
+    """
+
+    def __init__(self, on_field: Optional[Callable[[str, Any], Awaitable[None]]] = None):
+        self.on_field = on_field
+        self.parser = IncrementalObjectParser()
+        self.fields: Dict[str, Any] = {}
+        self.started = time.perf_counter()
+        self.first_score_seconds: Optional[float] = None
+        self.parse_seconds = 0.0
+
+    async def feed(self, chunk: str):
+        started = time.perf_counter()
+        members = self.parser.feed(chunk)
+        self.parse_seconds += time.perf_counter() - started
+        for name, value in members.items():
+            self.fields[name] = value
+            try:
+                value = validate_field(name, value)
+            except InvalidModelResponse:
+                continue
+            if name in SCORE_FIELDS and self.first_score_seconds is None:
+                self.first_score_seconds = time.perf_counter() - self.started
+            if self.on_field is not None:
+                await self.on_field(name, value)
+
+    def result(self) -> dict:
+        if not self.parser.complete:
+            raise InvalidModelResponse("response ended before the JSON object was complete")
+        if self.parser.errors:
+            raise InvalidModelResponse("; ".join(self.parser.errors))
+        started = time.perf_counter()
+        try:
+            return validate_analysis(self.fields)
+        finally:
+            self.parse_seconds += time.perf_counter() - started
+
+
+def repair_prompt(prompt: str, response_text: str, problem: str) -> str:
+    """Build a prompt asking the model to fix its own malformed analysis
+
+    The original ``prompt`` is repeated, so fields the reply is missing are
+    based on the resume and job description rather than made up.
+    """
+    return (
+        f"{prompt}\n\n"
+        "Your previous reply to this request was not a valid analysis.\n\n"
+        f"PROBLEM:\n{problem}\n\n"
+        f"PREVIOUS REPLY:\n{response_text[:8000]}\n\n"
+        "Reply with ONLY the corrected JSON object, no markdown. Keep the fields you already "
+        "produced that are valid, complete the missing ones from the resume and job description "
+        "above, fix the problems listed, and make sure skill_match_score, experience_score and "
+        "ats_score are numbers from 0 to 100."
+    )
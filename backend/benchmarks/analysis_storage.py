@@ -0,0 +1,136 @@
+"""Compare analysis storage size and history latency before and after compaction
+
+Seeds ``--analyses`` analyses spread over ``--job-descriptions`` distinct job
+descriptions in the old layout (text embedded in every analysis), measures
+the collections and GET /api/analyses, runs migrations.compact_analyses and
+measures again.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.analysis_storage --analyses 5000 --job-descriptions 20
+    python -m benchmarks.analysis_storage --mongo-url mongodb://localhost:27017
+
+Without ``--mongo-url`` an in-memory mongomock database is used (see
+benchmarks/requirements.txt) and sizes are the summed BSON document sizes;
+against mongod they come from collStats. mongomock scans in Python, so only
+latencies measured against mongod reflect the smaller working set.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime, timezone, timedelta
+
+import bson
+from starlette.responses import Response
+
+from benchmarks.auth_latency import summarize
+from benchmarks.fixtures import resume_lines
+
+USER_ID = "user_storage_benchmark"
+
+
+def job_descriptions(count: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    lines = resume_lines(400)
+    return [f"Requisition {i}\n" + "\n".join(rng.sample(lines, 40)) for i in range(count)]
+
+
+async def seed(db, analyses: int, texts: list):
+    await db.analyses.delete_many({"user_id": USER_ID})
+    await db.job_descriptions.delete_many({"user_id": USER_ID})
+    now = datetime.now(timezone.utc)
+    docs = [
+        {
+            "analysis_id": f"analysis_store{i:08d}",
+            "user_id": USER_ID,
+            "resume_filename": "resume.pdf",
+            "job_description": texts[i % len(texts)],
+            "overall_score": 70.0, "skill_match_score": 70, "experience_score": 70, "ats_score": 70,
+            "matched_skills": ["Python", "MongoDB"], "missing_skills": ["Kubernetes"],
+            "suggestions": ["Quantify your impact"] * 5,
+            "keyword_analysis": {"resume_keywords": ["python"], "job_keywords": ["python"]},
+            "created_at": (now - timedelta(seconds=i)).isoformat(),
+        }
+        for i in range(analyses)
+    ]
+    for start in range(0, len(docs), 1000):
+        await db.analyses.insert_many(docs[start:start + 1000])
+
+
+async def collection_bytes(db, name: str, mock: bool) -> dict:
+    if mock:
+        size = 0
+        async for doc in db[name].find({}):
+            size += len(bson.encode(doc))
+        return {"size_bytes": size}
+    stats = await db.command("collStats", name)
+    return {"size_bytes": stats["size"], "storage_bytes": stats["storageSize"], "index_bytes": stats["totalIndexSize"]}
+
+
+async def measure(api, mock: bool, repeat: int, page_size: int) -> dict:
+    sizes = {name: await collection_bytes(api.db, name, mock) for name in ("analyses", "job_descriptions")}
+    results = {"collections": sizes}
+    for label, view, include in (("full", "full", True), ("without_text", "full", False), ("summary", "summary", True)):
+        latencies, response_bytes = [], 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            page = await api.get_user_analyses(
+                Response(), limit=page_size, cursor=None, fields=None, view=view,
+                include_job_description=include, user_id=USER_ID,
+            )
+            latencies.append(time.perf_counter() - started)
+            response_bytes = len(json.dumps(page, default=str))
+        results[f"history_{label}"] = {"latency": summarize(latencies), "response_bytes": response_bytes}
+    return results
+
+
+async def run(args) -> dict:
+    os.environ["MONGO_URL"] = args.mongo_url or "mongodb://127.0.0.1:27017"
+    os.environ.setdefault("DB_NAME", "resumatch_storage_benchmark")
+    os.environ.setdefault("EMERGENT_LLM_KEY", "benchmark")
+
+    import server as api
+    from benchmarks.load_test import use_mock_mongo
+    from migrations.compact_analyses import migrate_analyses
+
+    mock = not args.mongo_url
+    if mock:
+        use_mock_mongo(api)
+    await seed(api.db, args.analyses, job_descriptions(args.job_descriptions))
+
+    before = await measure(api, mock, args.repeat, args.page_size)
+    started = time.perf_counter()
+    migration = await migrate_analyses(api.db, api.job_store, 500, dry_run=False)
+    migration["seconds"] = round(time.perf_counter() - started, 2)
+    after = await measure(api, mock, args.repeat, args.page_size)
+
+    return {
+        "settings": {
+            "analyses": args.analyses,
+            "job_descriptions": args.job_descriptions,
+            "page_size": args.page_size,
+            "codec": api.text_codec.codec,
+            "mongo": "mongomock" if mock else "mongod",
+        },
+        "before": before,
+        "migration": migration,
+        "after": after,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--analyses", type=int, default=5000)
+    parser.add_argument("--job-descriptions", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--mongo-url", help="use this MongoDB instead of the in-memory stand-in")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Measure /api/auth/me latency while large PDFs are being analyzed
+
+Usage (from the backend directory, against a running server):
+
+    python -m benchmarks.auth_latency --base-url http://localhost:8001 --session-token <token>
+
+A baseline of /api/auth/me latencies is recorded first, then the same probe
+runs while ``--uploaders`` clients repeatedly POST ``--pages``-page PDFs to
+/api/analyze. A healthy server keeps the loaded p99 close to the baseline.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from benchmarks.fixtures import make_pdf
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 2) if samples else 0.0,
+    }
+
+
+async def probe(client: httpx.AsyncClient, duration: float, interval: float):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get("/api/auth/me")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def upload_loop(client: httpx.AsyncClient, pdf: bytes, stop: asyncio.Event, job_description: str):
+    while not stop.is_set():
+        await client.post(
+            "/api/analyze",
+            files={"resume": ("benchmark.pdf", pdf, "application/pdf")},
+            data={"job_description": job_description},
+        )
+
+
+async def run(args):
+    pdf = make_pdf(args.pages)
+    cookies = {"session_token": args.session_token}
+    async with httpx.AsyncClient(base_url=args.base_url, cookies=cookies, timeout=120) as client:
+        baseline = await probe(client, args.duration, args.interval)
+
+        stop = asyncio.Event()
+        uploaders = [
+            asyncio.create_task(upload_loop(client, pdf, stop, args.job_description))
+            for _ in range(args.uploaders)
+        ]
+        loaded = await probe(client, args.duration, args.interval)
+        stop.set()
+        await asyncio.gather(*uploaders, return_exceptions=True)
+
+    return {
+        "pdf_pages": args.pages,
+        "pdf_bytes": len(pdf),
+        "uploaders": args.uploaders,
+        "baseline": summarize(baseline),
+        "under_load": summarize(loaded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--session-token", required=True)
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--uploaders", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--interval", type=float, default=0.02)
+    parser.add_argument("--job-description", default="Senior Python engineer with FastAPI, MongoDB and AWS")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Measure /api/auth/me throughput
+
+Usage (from the backend directory, against a running server):
+
+    python -m benchmarks.auth_throughput --base-url http://localhost:8001 --session-token <token>
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.auth_latency import summarize
+
+
+async def client_loop(client: httpx.AsyncClient, deadline: float, latencies: list):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get("/api/auth/me")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(args):
+    cookies = {"session_token": args.session_token}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, cookies=cookies, limits=limits, timeout=30) as client:
+        # Warm up connections (and any server-side caches) before measuring
+        await asyncio.gather(*(client.get("/api/auth/me") for _ in range(args.concurrency)))
+
+        latencies: list = []
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(client_loop(client, deadline, latencies) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": args.concurrency,
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "latency": summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--session-token", required=True)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
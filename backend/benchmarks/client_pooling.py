@@ -0,0 +1,100 @@
+"""Compare a per-request HTTP client with the pooled application client
+
+Starts the stub upstream in-process and issues the same OAuth and LLM calls
+the API makes, first opening a new httpx.AsyncClient per call (the old
+behaviour) and then through the shared pooled clients.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.client_pooling --requests 500 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+import uvicorn
+
+from benchmarks.auth_latency import summarize
+from benchmarks.stub_upstream import create_stub_app
+from llm import LLMClient, create_http_client
+
+
+async def timed(samples: list, call):
+    started = time.perf_counter()
+    await call()
+    samples.append(time.perf_counter() - started)
+
+
+async def drive(total: int, concurrency: int, call) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: list = []
+
+    async def one():
+        async with semaphore:
+            await timed(samples, call)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    return {"requests_per_second": round(total / elapsed, 1), "latency": summarize(samples)}
+
+
+async def run(args):
+    server = uvicorn.Server(uvicorn.Config(create_stub_app(), host="127.0.0.1", port=args.port, log_level="warning"))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    base = f"http://127.0.0.1:{args.port}"
+    oauth_url = f"{base}/auth/v1/env/oauth/session-data"
+    payload = {"model": "stub", "messages": [{"role": "user", "content": "x" * 4000}]}
+
+    async def oauth_per_request():
+        async with httpx.AsyncClient() as client:
+            (await client.get(oauth_url, headers={"X-Session-ID": "bench"})).raise_for_status()
+
+    async def llm_per_request():
+        async with httpx.AsyncClient() as client:
+            (await client.post(f"{base}/v1/chat/completions", json=payload)).raise_for_status()
+
+    pooled_http = create_http_client()
+    pooled_llm = LLMClient("stub", "stub", "stub", "system", base_url=f"{base}/v1")
+    pooled_llm.start()
+
+    async def oauth_pooled():
+        (await pooled_http.get(oauth_url, headers={"X-Session-ID": "bench"})).raise_for_status()
+
+    async def llm_pooled():
+        await pooled_llm.complete("x" * 4000)
+
+    results = {}
+    try:
+        for name, call in (
+            ("oauth_per_request_client", oauth_per_request),
+            ("oauth_pooled_client", oauth_pooled),
+            ("llm_per_request_client", llm_per_request),
+            ("llm_pooled_client", llm_pooled),
+        ):
+            await drive(min(args.concurrency, args.requests), args.concurrency, call)  # warm-up
+            results[name] = await drive(args.requests, args.concurrency, call)
+    finally:
+        await pooled_http.aclose()
+        await pooled_llm.close()
+        server.should_exit = True
+        await serve_task
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--port", type=int, default=9101)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Compare PDF and DOCX text extractors: throughput, memory and text equivalence
+
+Runs every extractor in extraction.PDF_EXTRACTORS and DOCX_EXTRACTORS over a
+corpus of resume files, each in a fresh process so its memory figures are its
+own, with the limits the API uses (``--max-pages``, ``--max-chars``). For each
+extractor it reports files, pages and megabytes per second, the process RSS
+once the parser is imported and warm, the peak RSS sampled while it runs, how
+often it fell back, and how its text compares with the fallback extractor's
+(PyPDF2, python-docx): the share of identical files after collapsing
+whitespace, the worst share of the fallback's words it also finds (recall),
+and the mean share of its words the fallback does not find (added). Added
+words on DOCX files are table, text box, header and footer text that
+python-docx's body paragraphs miss.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.extractors
+    python -m benchmarks.extractors --corpus ~/resumes --repeat 3
+
+The built-in corpus is benchmarks/corpus/resumes rendered to PDF, to plain
+DOCX and to DOCX laid out like a resume template (contact details in the page
+header, skills in a table, the title in a text box), plus generated files of
+several sizes (benchmarks/fixtures.py). ``--corpus``
+adds every .pdf and .docx file under a directory, such as a collection of
+real-world resumes. pypdfium2 and pdfminer.six are optional dependencies
+(see benchmarks/requirements.txt); extractors whose package is missing are
+skipped.
+"""
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import re
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.fixtures import make_docx, make_pdf, template_docx, text_docx, text_pdf
+from benchmarks.load_test import RESULTS_DIR, git_commit
+import extraction
+
+CORPUS_DIR = Path(__file__).parent / "corpus" / "resumes"
+GENERATED = {
+    "generated_1p.pdf": lambda: make_pdf(1),
+    "generated_5p.pdf": lambda: make_pdf(5),
+    "generated_20p.pdf": lambda: make_pdf(20),
+    "generated_40.docx": lambda: make_docx(40),
+    "generated_400.docx": lambda: make_docx(400),
+    "generated_4000.docx": lambda: make_docx(4000),
+}
+
+
+def build_corpus(directory: Path) -> list:
+    """Write the built-in corpus to ``directory`` and return the file paths"""
+    files = {name: build() for name, build in GENERATED.items()}
+    for source in sorted(CORPUS_DIR.glob("*.txt")):
+        lines = [wrapped for line in source.read_text().splitlines() for wrapped in textwrap.wrap(line, 95) or [""]]
+        files[f"{source.stem}.pdf"] = text_pdf(lines)
+        files[f"{source.stem}.docx"] = text_docx(lines)
+        # Lines such as "Languages: Python, Go" go in the skills table
+        skills = [line for line in lines if ":" in line and "@" not in line]
+        files[f"{source.stem}_template.docx"] = template_docx([line for line in lines if line not in skills], skills)
+    paths = []
+    for name, data in files.items():
+        path = directory / name
+        path.write_bytes(data)
+        paths.append(str(path))
+    return paths
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        pages = int(statm.read().split()[1])
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+
+
+def measure(kind: str, extractor: str, paths: list, repeat: int, max_pages: int, max_chars: int) -> dict:
+    """Runs in a fresh process: extract every file once for the texts, then ``repeat`` times for speed"""
+    def extract(path):
+        if kind == "pdf":
+            return extraction.extract_text_from_pdf(path, max_pages, max_chars, extractor)
+        return extraction.extract_text_from_docx(path, max_chars, extractor)
+
+    results = [extract(path) for path in paths]
+    rss_warm = rss_mb()
+    # ru_maxrss would include the imports, so sample RSS while the extractor runs instead
+    peak = rss_warm
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.wait(0.002):
+            peak = max(peak, rss_mb())
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for path in paths:
+            extract(path)
+    seconds = time.perf_counter() - started
+    done.set()
+    sampler.join()
+    megabytes = sum(os.path.getsize(path) for path in paths) / (1024 * 1024)
+    return {
+        "files_per_second": round(len(paths) * repeat / seconds, 1),
+        "pages_per_second": round(sum(result.pages_read for result in results) * repeat / seconds, 1) if kind == "pdf" else None,
+        "mb_per_second": round(megabytes * repeat / seconds, 2),
+        "rss_mb_warm": rss_warm,
+        "peak_rss_mb": peak,
+        "fallbacks": sum(result.fallback_reason is not None for result in results),
+        "texts": [result.text for result in results],
+    }
+
+
+def words(text: str) -> Counter:
+    return Counter(re.findall(r"\w+", text.lower()))
+
+
+def equivalence(texts: list, reference: list) -> dict:
+    recalls, added = [], []
+    identical = 0
+    for text, expected in zip(texts, reference):
+        identical += " ".join(text.split()) == " ".join(expected.split())
+        found, wanted = words(text), words(expected)
+        common = sum((found & wanted).values())
+        recalls.append(common / sum(wanted.values()) if wanted else 1.0)
+        added.append(1 - common / sum(found.values()) if found else 0.0)
+    return {
+        "identical_share": round(identical / len(texts), 3),
+        "min_recall": round(min(recalls), 4),
+        "mean_added": round(sum(added) / len(added), 4),
+    }
+
+
+def table(results: dict) -> str:
+    lines = [
+        "| extractor | files/s | pages/s | MB/s | RSS warm | peak RSS | identical | min recall | added words |",
+        "|---|---|---|---|---|---|---|---|---|",
+    ]
+    for kind, extractors in results.items():
+        for name, result in extractors.items():
+            lines.append(
+                f"| {kind}: {name} | {result['files_per_second']} | {result['pages_per_second'] or ''} "
+                f"| {result['mb_per_second']} | {result['rss_mb_warm']} MB | {result['peak_rss_mb']} MB "
+                f"| {result['identical_share']:.0%} | {result['min_recall']:.3f} | {result['mean_added']:.1%} |"
+            )
+    return "\n".join(lines)
+
+
+def run(args, paths: list) -> dict:
+    groups = {
+        "pdf": (extraction.PDF_EXTRACTORS, extraction.FALLBACK_PDF_EXTRACTOR, [p for p in paths if p.lower().endswith(".pdf")]),
+        "docx": (extraction.DOCX_EXTRACTORS, extraction.FALLBACK_DOCX_EXTRACTOR, [p for p in paths if p.lower().endswith(".docx")]),
+    }
+    results = {}
+    for kind, (extractors, fallback, files) in groups.items():
+        if not files:
+            continue
+        # The fallback extractor runs first so the others can be compared with its text
+        names = [fallback] + [name for name in extractors if name != fallback]
+        results[kind] = {}
+        for name in names:
+            package = extraction.EXTRACTOR_PACKAGES[name]
+            if package is not None and importlib.util.find_spec(package) is None:
+                print(f"Skipping {name}: {package} is not installed", file=sys.stderr)
+                continue
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                result = pool.submit(measure, kind, name, files, args.repeat, args.max_pages, args.max_chars).result()
+            texts = result.pop("texts")
+            if name == fallback:
+                reference = texts
+            results[kind][name] = {**result, **equivalence(texts, reference)}
+            print(f"{kind} {name}: {result['files_per_second']} files/s", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="directory of .pdf and .docx resumes to add to the built-in corpus")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the corpus per extractor")
+    parser.add_argument("--max-pages", type=int, default=20)
+    parser.add_argument("--max-chars", type=int, default=50000)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<timestamp>-extractors.json)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = build_corpus(Path(directory))
+        if args.corpus:
+            paths += sorted(
+                str(path) for path in Path(args.corpus).expanduser().rglob("*") if path.suffix.lower() in (".pdf", ".docx")
+            )
+        results = run(args, paths)
+
+    result = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "files": len(paths),
+            "external_corpus": bool(args.corpus),
+            "repeat": args.repeat,
+            "max_pages": args.max_pages,
+            "max_chars": args.max_chars,
+        },
+        "extractors": results,
+    }
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-extractors.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2) + "\n")
+    print(table(results))
+    print(f"Saved to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Synthetic resume files for benchmarks"""
+import io
+import random
+
+WORDS = (
+    "python react docker kubernetes aws fastapi mongodb postgres terraform "
+    "led built designed shipped migrated scaled reduced improved latency "
+    "throughput pipeline platform service team customers revenue analytics "
+    "machine learning data engineering ci cd testing observability security"
+).split()
+
+
+def resume_lines(count: int, seed: int = 0):
+    """Generate pseudo-random resume bullet lines"""
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(count)]
+
+
+def _escape_pdf_text(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: int, lines_per_page: int = 45, seed: int = 0) -> bytes:
+    """Build a text PDF with the given number of pages"""
+    return text_pdf(resume_lines(pages * lines_per_page, seed), lines_per_page)
+
+
+def text_pdf(lines: list, lines_per_page: int = 45) -> bytes:
+    """Build a PDF showing ``lines``, ``lines_per_page`` to a page"""
+    pages = max(1, -(-len(lines) // lines_per_page))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    page_refs = []
+    for page in range(pages):
+        chunk = lines[page * lines_per_page:(page + 1) * lines_per_page]
+        ops = ["BT", "/F1 10 Tf", "14 TL", "50 760 Td"]
+        for line in chunk:
+            ops.append(f"({_escape_pdf_text(line)}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("cp1252", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(len(objects))
+    kids = " ".join(f"{ref} 0 R" for ref in page_refs).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref_offset = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset))
+    return out.getvalue()
+
+
+def make_docx(paragraphs: int, seed: int = 0) -> bytes:
+    """Build a DOCX with the given number of paragraphs"""
+    return text_docx(resume_lines(paragraphs, seed))
+
+
+def text_docx(lines: list) -> bytes:
+    """Build a DOCX with one paragraph per line"""
+    import docx
+
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+TEXT_BOX = (
+    '<w:r xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+    'xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape" '
+    'xmlns:v="urn:schemas-microsoft-com:vml">'
+    '<mc:AlternateContent><mc:Choice Requires="wps"><w:drawing><wps:txbx><w:txbxContent>{paragraphs}'
+    '</w:txbxContent></wps:txbx></w:drawing></mc:Choice>'
+    '<mc:Fallback><w:pict><v:textbox><w:txbxContent>{paragraphs}</w:txbxContent></v:textbox></w:pict>'
+    '</mc:Fallback></mc:AlternateContent></w:r>'
+)
+
+
+def template_docx(lines: list, skills: list) -> bytes:
+    """Build a DOCX laid out like a resume template
+
+    The first line goes in the page header, ``skills`` in a two-column table,
+    the second line in a text box (with the legacy copy Word also writes) and
+    the rest in body paragraphs, followed by a footer. python-docx's
+    ``Document.paragraphs`` sees only the body paragraphs.
+    """
+    from xml.sax.saxutils import escape
+
+    import docx
+    from docx.oxml import parse_xml
+
+    document = docx.Document()
+    document.sections[0].header.paragraphs[0].text = lines[0]
+    document.sections[0].footer.paragraphs[0].text = "References available on request"
+    box = "<w:p><w:r><w:t>{}</w:t></w:r></w:p>".format(escape(lines[1]))
+    document.add_paragraph("Profile ")._p.append(parse_xml(TEXT_BOX.format(paragraphs=box)))
+    document.add_paragraph("Skills")
+    table = document.add_table(rows=0, cols=2)
+    for left, right in zip(skills[::2], skills[1::2] + [""]):
+        cells = table.add_row().cells
+        cells[0].text, cells[1].text = left, right
+    for line in lines[2:]:
+        document.add_paragraph(line)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
@@ -0,0 +1,119 @@
+"""Measure history export and import throughput and memory
+
+Seeds ``--analyses`` analyses over ``--job-descriptions`` stored job
+descriptions, exports them as NDJSON and CSV to temporary files, then imports
+each file into an empty analyses collection. Reports rows per second and the
+peak Python memory allocated while each step runs (tracemalloc), which should stay
+flat as ``--analyses`` grows against mongod.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.history_transfer --analyses 20000
+    python -m benchmarks.history_transfer --analyses 1000000 --mongo-url mongodb://localhost:27017
+
+Without ``--mongo-url`` an in-memory mongomock database is used (see
+benchmarks/requirements.txt). It sorts and scans whole collections in Python,
+so its rates fall and its memory peak grows with the collection; only runs
+against mongod show the pipeline's own figures.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone, timedelta
+
+from benchmarks.analysis_storage import job_descriptions
+
+USER_ID = "user_history_benchmark"
+
+
+async def seed(api, analyses: int, texts: list):
+    await api.db.analyses.delete_many({"user_id": USER_ID})
+    job_description_ids = await api.store_job_descriptions(USER_ID, texts)
+    now = datetime.now(timezone.utc)
+    for start in range(0, analyses, 1000):
+        await api.db.analyses.insert_many([
+            {
+                "analysis_id": f"analysis_hist{i:09d}",
+                "user_id": USER_ID,
+                "resume_filename": "resume.pdf",
+                "job_description_id": job_description_ids[i % len(texts)],
+                "overall_score": 70.0, "skill_match_score": 70, "experience_score": 70, "ats_score": 70,
+                "matched_skills": ["Python", "MongoDB"], "missing_skills": ["Kubernetes"],
+                "suggestions": ["Quantify your impact"] * 5,
+                "keyword_analysis": {"resume_keywords": ["python"], "job_keywords": ["python"]},
+                "created_at": (now - timedelta(seconds=i)).isoformat(),
+            }
+            for i in range(start, min(start + 1000, analyses))
+        ])
+
+
+async def measured(step) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = await step()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {**result, "seconds": round(seconds, 2), "peak_memory_mb": round(peak / 1024 / 1024, 2)}
+
+
+async def run(args) -> dict:
+    os.environ["MONGO_URL"] = args.mongo_url or "mongodb://127.0.0.1:27017"
+    os.environ.setdefault("DB_NAME", "resumatch_history_benchmark")
+    os.environ.setdefault("EMERGENT_LLM_KEY", "benchmark")
+
+    import server as api
+    from benchmarks.load_test import use_mock_mongo
+    from history_io import export_chunks, import_analyses, iter_lines, iter_records, read_chunks
+
+    if not args.mongo_url:
+        use_mock_mongo(api)
+    await seed(api, args.analyses, job_descriptions(args.job_descriptions))
+    results = {"settings": {
+        "analyses": args.analyses,
+        "job_descriptions": args.job_descriptions,
+        "batch_size": args.batch_size,
+        "mongo": "mongod" if args.mongo_url else "mongomock",
+    }}
+
+    with tempfile.TemporaryDirectory() as directory:
+        for format in ("ndjson", "csv"):
+            path = os.path.join(directory, f"analyses.{format}")
+
+            async def export():
+                stats = {}
+                with open(path, "w", encoding="utf-8", newline="") as output:
+                    async for chunk in export_chunks(
+                        api.db, api.job_store, {"user_id": USER_ID}, format, args.batch_size, stats=stats
+                    ):
+                        output.write(chunk)
+                return {"rows": stats["rows"], "rows_per_second": stats["rows_per_second"],
+                        "file_mb": round(os.path.getsize(path) / 1024 / 1024, 2)}
+
+            async def load():
+                await api.db.analyses.delete_many({"user_id": USER_ID})
+                with open(path, "rb") as source:
+                    records = iter_records(iter_lines(read_chunks(source)), format)
+                    stats = await import_analyses(api.db, api.job_store, records, USER_ID, args.batch_size)
+                return {key: stats[key] for key in ("imported", "invalid", "rows_per_second")}
+
+            results[format] = {"export": await measured(export), "import": await measured(load)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--analyses", type=int, default=20000)
+    parser.add_argument("--job-descriptions", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--mongo-url", help="use this MongoDB instead of the in-memory stand-in")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Measure cold start: import time, time to ready, first-request latency and RSS
+
+Runs ``python -X importtime -c "import server"`` in fresh interpreters and
+reports its import time and the modules it imports directly that cost the most.
+Then boots one worker with uvicorn for each ``--mode``:
+
+- ``lazy``: the default, heavy modules are imported on first use
+- ``prewarm``: ``PREWARM_IMPORTS=true``, imported before the worker reports ready
+
+and records the time from spawning the process until /api/health/ready
+answers 200, the worker's RSS once ready, and the latency of its first
+requests: a PDF analysis, a DOCX analysis and a second PDF analysis (already
+warm). The LLM is the stub upstream, answering after ``--llm-latency-ms``.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 10 --modes lazy
+
+Results are written to benchmarks/results/<timestamp>-imports.json (or
+``--output``). Without ``--mongo-url`` the worker uses an in-memory mongomock database (see
+benchmarks/requirements.txt).
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from benchmarks import load_test
+from benchmarks.fixtures import make_docx, make_pdf
+from benchmarks.stub_upstream import create_stub_app
+
+MODES = {
+    "lazy": {"PREWARM_IMPORTS": "false"},
+    "prewarm": {"PREWARM_IMPORTS": "true"},
+}
+
+
+def import_profile(env: dict) -> tuple:
+    """Import ``server`` in a fresh interpreter
+
+    Returns the cumulative import time of ``server`` and of each module it
+    imports directly, in microseconds. A module's time is charged to the
+    first module that imports it.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    # Lines look like "import time:  self | cumulative |   package.module", indented two spaces per
+    # level, and a module's line comes after those of the modules it imports
+    children = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == "server":
+                return int(cumulative), children
+            children = {}
+        elif depth == 1:
+            children[name.strip()] = int(cumulative)
+    raise RuntimeError("server missing from -X importtime output")
+
+
+def profile_imports(env: dict, repeat: int, top: int) -> dict:
+    runs = [import_profile(env) for _ in range(repeat)]
+    totals = [total / 1000 for total, _ in runs]
+    slowest = sorted(runs[-1][1].items(), key=lambda item: -item[1])[:top]
+    return {
+        "server_ms": {"median": round(statistics.median(totals), 1), "min": round(min(totals), 1)},
+        "slowest": [{"module": name, "ms": round(us / 1000, 1)} for name, us in slowest],
+    }
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/statm") as statm:
+        pages = int(statm.read().split()[1])
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+
+
+async def cold_start(args, mode: str) -> dict:
+    """Boot one worker in ``mode`` and time it until ready and through its first requests"""
+    env = {
+        **os.environ,
+        **MODES[mode],
+        "LOAD_TEST_HISTORY": "0",
+        "LOAD_TEST_LOG_LEVEL": "warning",
+        "LOAD_TEST_MOCK_MONGO": "" if args.mongo_url else "1",
+    }
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.load_test:create_worker_app", "--factory",
+         "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    result = {}
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{args.port}", cookies={"session_token": load_test.SESSION_TOKEN},
+            timeout=120,
+        ) as client:
+            while True:
+                if process.poll() is not None or time.perf_counter() - started > 120:
+                    raise RuntimeError(f"Worker did not become ready in {mode} mode")
+                try:
+                    if (await client.get("/api/health/ready")).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.01)
+            result["ready_ms"] = round((time.perf_counter() - started) * 1000)
+            result["rss_mb_ready"] = rss_mb(process.pid)
+
+            requests = [
+                ("first_pdf", "resume.pdf", make_pdf(1)),
+                ("first_docx", "resume.docx", make_docx(40)),
+                ("second_pdf", "resume.pdf", make_pdf(1)),
+            ]
+            for n, (name, filename, body) in enumerate(requests):
+                request_started = time.perf_counter()
+                response = await client.post(
+                    "/api/analyze",
+                    files={"resume": (filename, body)},
+                    data={"job_description": f"Backend engineer: Python, FastAPI, MongoDB. Requisition {mode}-{n}."},
+                )
+                response.raise_for_status()
+                result[f"{name}_ms"] = round((time.perf_counter() - request_started) * 1000, 1)
+            result["rss_mb_after"] = rss_mb(process.pid)
+    finally:
+        process.terminate()
+        await asyncio.to_thread(process.wait, 60)
+    return result
+
+
+async def run(args) -> dict:
+    load_test.configure_environment(args)
+    stub, stub_task = await load_test.start_server(create_stub_app(args.llm_latency_ms), args.stub_port)
+    try:
+        starts = {}
+        for mode in args.modes:
+            runs = [await cold_start(args, mode) for _ in range(args.repeat)]
+            starts[mode] = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+            print(f"{mode}: ready in {starts[mode]['ready_ms']} ms, "
+                  f"first PDF {starts[mode]['first_pdf_ms']} ms", file=sys.stderr)
+    finally:
+        stub.should_exit = True
+        await stub_task
+
+    return {
+        "commit": load_test.git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "repeat": args.repeat,
+            "llm_latency_ms": args.llm_latency_ms,
+            "mongo": "mongod" if args.mongo_url else "mongomock",
+        },
+        "imports": profile_imports(dict(os.environ), args.repeat, args.top),
+        "cold_start": starts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--repeat", type=int, default=5, help="fresh processes per measurement")
+    parser.add_argument("--top", type=int, default=10, help="slowest direct imports to list")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--mongo-url", help="use this MongoDB instead of the in-memory stand-in")
+    parser.add_argument("--port", type=int, default=8791)
+    parser.add_argument("--stub-port", type=int, default=9103)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<timestamp>-imports.json)")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    output = Path(args.output) if args.output else (
+        load_test.RESULTS_DIR / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-imports.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2) + "\n")
+    print(json.dumps(result, indent=2))
+    print(f"Saved to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""Load-test the API in-process against local stand-ins and save the results as JSON
+
+Boots the FastAPI app with uvicorn on a local port, backed by an in-memory
+mongomock-motor database (see benchmarks/requirements.txt) or ``--mongo-url``,
+and with the LLM pointed at the stub upstream, which answers after
+``--llm-latency-ms``. Then drives each scenario at ``--concurrency`` for
+``--duration`` seconds:
+
+- ``auth_me``: GET /api/auth/me
+- ``analyses``: GET /api/analyses over ``--history`` seeded analyses
+- ``analyze_<fixture>``: POST /api/analyze with generated PDFs and DOCX
+  files of several sizes. Every request uses a distinct job description so
+  the analysis cache does not answer for the model, unless ``--allow-cache``.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.load_test --concurrency 16 --duration 10 --llm-latency-ms 300
+    python -m benchmarks.load_test --compare benchmarks/results/<earlier run>.json
+
+With ``--workers N`` the app runs as ``uvicorn --factory --workers N`` in
+a child process instead, the way it is deployed on a multi-core node. With
+mongomock each worker then has its own in-memory database, seeded when it
+starts. benchmarks/worker_scaling.py runs this for several worker counts.
+
+Results are written to benchmarks/results/<timestamp>-<commit>.json (or
+``--output``); ``--compare`` prints the change in RPS and p95/p99 per scenario
+against an earlier result file.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+from benchmarks.auth_latency import summarize
+from benchmarks.fixtures import make_docx, make_pdf
+from benchmarks.stub_upstream import create_stub_app
+
+RESULTS_DIR = Path(__file__).parent / "results"
+SESSION_TOKEN = "load_test_session"
+USER_ID = "user_loadtest"
+
+FIXTURES = {
+    "pdf_1p": ("resume.pdf", lambda: make_pdf(1)),
+    "pdf_5p": ("resume.pdf", lambda: make_pdf(5)),
+    "pdf_20p": ("resume.pdf", lambda: make_pdf(20)),
+    "docx_40": ("resume.docx", lambda: make_docx(40)),
+    "docx_400": ("resume.docx", lambda: make_docx(400)),
+}
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process"""
+    with open("/proc/self/statm") as statm:
+        pages = int(statm.read().split()[1])
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+
+
+def peak_rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def git_commit() -> str:
+    """The commit results were measured on, marked "-dirty" when tracked files have uncommitted changes"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        changes = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if changes else commit
+
+
+async def start_server(app, port: int) -> tuple:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    return server, task
+
+
+def configure_environment(args):
+    """Point the app at the stand-ins; must run before ``server`` is imported"""
+    stub = f"http://127.0.0.1:{args.stub_port}"
+    if args.mongo_url:
+        os.environ["MONGO_URL"] = args.mongo_url
+    os.environ.setdefault("MONGO_URL", "mongodb://127.0.0.1:27017")
+    os.environ.setdefault("DB_NAME", "resumatch_load_test")
+    os.environ.setdefault("EMERGENT_LLM_KEY", "load-test")
+    # Every request comes from one user; keep the per-user rate limit out of the measurement
+    os.environ.setdefault("ANALYSIS_RATE_PER_MINUTE", "1000000")
+    os.environ["LLM_BASE_URL"] = f"{stub}/v1"
+    os.environ["OAUTH_SESSION_URL"] = f"{stub}/auth/v1/env/oauth/session-data"
+
+
+def use_mock_mongo(server):
+    """Swap the app's database, and the collections its components hold, for mongomock"""
+    from mongomock_motor import AsyncMongoMockClient
+
+    mock_db = AsyncMongoMockClient()[os.environ["DB_NAME"]]
+    server.db = mock_db
+    for component in (server.analysis_cache, server.analysis_jobs, server.contact_mailer, server.resume_store,
+                      server.user_rate_limiter, server.resume_search, server.job_search, server.job_store):
+        component.collection = mock_db[component.collection.name]
+
+
+def create_worker_app():
+    """App factory for the uvicorn workers started by ``--workers``"""
+    import server as api
+
+    logging.getLogger().setLevel(os.environ.get("LOAD_TEST_LOG_LEVEL", "WARNING").upper())
+    app = api.create_app()
+    if os.environ.get("LOAD_TEST_MOCK_MONGO"):
+        use_mock_mongo(api)
+        serve = app.router.lifespan_context
+
+        @asynccontextmanager
+        async def lifespan(app):
+            await seed(api.db, int(os.environ["LOAD_TEST_HISTORY"]))
+            async with serve(app):
+                yield
+
+        app.router.lifespan_context = lifespan
+    return app
+
+
+async def start_workers(args) -> subprocess.Popen:
+    """Start ``args.workers`` uvicorn workers and wait until each reports ready"""
+    env = {
+        **os.environ,
+        "LOAD_TEST_HISTORY": str(args.history),
+        "LOAD_TEST_LOG_LEVEL": args.log_level,
+        "LOAD_TEST_MOCK_MONGO": "" if args.mongo_url else "1",
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.load_test:create_worker_app", "--factory",
+         "--workers", str(args.workers), "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    # Connections are spread over the workers by the kernel; poll until every worker has answered
+    ready = set()
+    deadline = time.monotonic() + 60 + 10 * args.workers
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=5) as client:
+        while len(ready) < args.workers:
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.terminate()
+                raise RuntimeError(f"Only {len(ready)} of {args.workers} workers became ready")
+            try:
+                response = await client.get("/api/health/ready", headers={"Connection": "close"})
+                if response.status_code == 200:
+                    ready.add(response.json()["worker_id"])
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.05)
+    return process
+
+
+async def stop_workers(process: subprocess.Popen):
+    process.terminate()
+    await asyncio.to_thread(process.wait, 60)
+
+
+async def seed(db, history: int):
+    now = datetime.now(timezone.utc)
+    await db.users.update_one(
+        {"user_id": USER_ID},
+        {"$set": {"user_id": USER_ID, "email": "load@example.com", "name": "Load Test", "created_at": now.isoformat()}},
+        upsert=True,
+    )
+    await db.user_sessions.update_one(
+        {"session_token": SESSION_TOKEN},
+        {"$set": {"user_id": USER_ID, "session_token": SESSION_TOKEN,
+                  "expires_at": (now + timedelta(days=1)).isoformat(), "created_at": now.isoformat()}},
+        upsert=True,
+    )
+    await db.analyses.delete_many({"user_id": USER_ID})
+    if history:
+        await db.analyses.insert_many([
+            {
+                "analysis_id": f"analysis_load{i:08d}",
+                "user_id": USER_ID,
+                "resume_filename": "resume.pdf",
+                "job_description": "Backend engineer with Python and MongoDB " * 20,
+                "overall_score": 70.0, "skill_match_score": 70, "experience_score": 70, "ats_score": 70,
+                "matched_skills": ["Python", "MongoDB"], "missing_skills": ["Kubernetes"],
+                "suggestions": ["Quantify your impact"] * 5,
+                "keyword_analysis": {"resume_keywords": ["python"], "job_keywords": ["python"]},
+                "created_at": (now - timedelta(minutes=i)).isoformat(),
+            }
+            for i in range(history)
+        ])
+
+
+async def drive(client: httpx.AsyncClient, request, concurrency: int, duration: float) -> dict:
+    """Run ``request(client, n)`` from ``concurrency`` workers for ``duration`` seconds"""
+    latencies: list = []
+    statuses: dict = {}
+    counter = 0
+
+    async def worker(deadline: float):
+        nonlocal counter
+        while time.perf_counter() < deadline:
+            counter += 1
+            started = time.perf_counter()
+            try:
+                response = await request(client, counter)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(started + duration) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "latency": summarize(latencies),
+        "statuses": statuses,
+        "errors": sum(count for status, count in statuses.items() if not status.startswith("2")),
+        "rss_mb_before": rss_before,
+        "rss_mb_after": rss_mb(),
+    }
+
+
+def build_scenarios(args) -> dict:
+    scenarios = {
+        "auth_me": lambda client, n: client.get("/api/auth/me"),
+        "analyses": lambda client, n: client.get("/api/analyses", params={"limit": args.page_size}),
+    }
+    for name in args.fixtures:
+        filename, build = FIXTURES[name]
+        body = build()
+
+        def analyze(client, n, filename=filename, body=body, name=name):
+            job_description = "Senior backend engineer: Python, FastAPI, MongoDB, Docker, Kubernetes, AWS."
+            if not args.allow_cache:
+                job_description += f" Requisition {name}-{n}."
+            return client.post(
+                "/api/analyze",
+                files={"resume": (filename, body)},
+                data={"job_description": job_description},
+            )
+
+        scenarios[f"analyze_{name}"] = analyze
+    return scenarios
+
+
+async def run(args) -> dict:
+    configure_environment(args)
+    stub, stub_task = await start_server(create_stub_app(args.llm_latency_ms), args.stub_port)
+
+    if args.workers:
+        if args.mongo_url:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            await seed(AsyncIOMotorClient(args.mongo_url)[os.environ["DB_NAME"]], args.history)
+        workers = await start_workers(args)
+    else:
+        import server as api
+
+        # The app logs every analysis at INFO; keep the benchmark output readable
+        logging.getLogger().setLevel(args.log_level.upper())
+        if not args.mongo_url:
+            use_mock_mongo(api)
+        await seed(api.db, args.history)
+        app_server, app_task = await start_server(api.app, args.port)
+
+    results = {}
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{args.port}", cookies={"session_token": SESSION_TOKEN},
+            limits=limits, timeout=120,
+        ) as client:
+            for name, request in build_scenarios(args).items():
+                if args.scenarios and name not in args.scenarios:
+                    continue
+                await drive(client, request, args.concurrency, min(1.0, args.duration))  # warm-up
+                results[name] = await drive(client, request, args.concurrency, args.duration)
+                print(f"{name}: {results[name]['requests_per_second']} req/s, "
+                      f"p99 {results[name]['latency']['p99_ms']} ms", file=sys.stderr)
+    finally:
+        if args.workers:
+            await stop_workers(workers)
+        else:
+            app_server.should_exit = True
+            await app_task
+        stub.should_exit = True
+        await stub_task
+
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "llm_latency_ms": args.llm_latency_ms,
+            "history": args.history,
+            "page_size": args.page_size,
+            "allow_cache": args.allow_cache,
+            "mongo": "mongod" if args.mongo_url else "mongomock",
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "scenarios": results,
+    }
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    """Relative change of each scenario's throughput and tail latency against a baseline run"""
+    def change(new: float, old: float):
+        return round(100 * (new - old) / old, 1) if old else None
+
+    deltas = {}
+    for name, result in current["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        deltas[name] = {
+            "requests_per_second_pct": change(result["requests_per_second"], previous["requests_per_second"]),
+            "p95_ms_pct": change(result["latency"]["p95_ms"], previous["latency"]["p95_ms"]),
+            "p99_ms_pct": change(result["latency"]["p99_ms"], previous["latency"]["p99_ms"]),
+        }
+    return {"baseline_commit": baseline.get("commit"), "scenarios": deltas}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--history", type=int, default=500, help="analyses seeded for GET /api/analyses")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--fixtures", nargs="+", default=list(FIXTURES), choices=list(FIXTURES))
+    parser.add_argument("--scenarios", nargs="+", help="only run these scenarios")
+    parser.add_argument("--allow-cache", action="store_true", help="repeat job descriptions so cached analyses are reused")
+    parser.add_argument("--mongo-url", help="use this MongoDB instead of the in-memory stand-in")
+    parser.add_argument("--log-level", default="warning")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--stub-port", type=int, default=9102)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="serve with this many uvicorn worker processes instead of in-process")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+
+    result = asyncio.run(run(args))
+    if args.compare:
+        result["comparison"] = compare(result, json.loads(Path(args.compare).read_text()))
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{result['commit']}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2) + "\n")
+    print(json.dumps(result, indent=2))
+    print(f"Saved to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Compare per-message SMTP connections with the pooled background mailer
+
+Runs a local aiosmtpd server (see benchmarks/requirements.txt) and sends
+``--messages`` contact emails two ways: the old path, which opens, greets
+and closes an SMTP connection per message, and the Mailer, which reuses one
+connection from its background sender thread.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.mail_throughput --messages 300 --connect-latency-ms 50
+"""
+import argparse
+import asyncio
+import json
+import smtplib
+import time
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import SMTP as SMTPServer
+from mongomock_motor import AsyncMongoMockClient
+
+from mailer import Mailer, SMTPConnection
+
+
+class CountingHandler:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 Message accepted for delivery"
+
+
+class SlowGreetingSMTP(SMTPServer):
+    """SMTP server whose greeting is delayed, standing in for TLS/login round trips"""
+
+    connect_latency = 0.0
+
+    async def _handle_client(self):
+        await asyncio.sleep(self.connect_latency)
+        await super()._handle_client()
+
+
+class SlowGreetingController(Controller):
+    def factory(self):
+        return SlowGreetingSMTP(self.handler, **self.SMTP_kwargs)
+
+
+def build_message(doc: dict):
+    from email.mime.text import MIMEText
+
+    message = MIMEText(f"<p>{doc['message']}</p>", "html")
+    message["Subject"] = f"Contact Form Submission from {doc['name']}"
+    message["From"] = "bench@example.com"
+    message["To"] = doc["email"]
+    return message
+
+
+def contact_docs(count: int):
+    return [
+        {"contact_id": f"contact_{i}", "name": "Bench", "email": "bench@example.com",
+         "message": "hello " * 50, "delivery_status": "queued", "delivery_attempts": 0}
+        for i in range(count)
+    ]
+
+
+def send_per_connection(host: str, port: int, docs):
+    for doc in docs:
+        with smtplib.SMTP(host, port) as smtp:
+            smtp.send_message(build_message(doc))
+
+
+async def send_with_mailer(host: str, port: int, docs):
+    collection = AsyncMongoMockClient()["bench"]["contacts"]
+    await collection.insert_many([dict(doc) for doc in docs])
+    mailer = Mailer(collection, "contact_id", build_message, SMTPConnection(host, port, None, None, starttls=False))
+    mailer.start()
+    enqueue_started = time.perf_counter()
+    for doc in docs:
+        mailer.enqueue(doc)
+    enqueue_seconds = time.perf_counter() - enqueue_started
+    while await collection.count_documents({"delivery_status": "sent"}) < len(docs):
+        await asyncio.sleep(0.01)
+    await mailer.stop()
+    return enqueue_seconds
+
+
+def run(args):
+    SlowGreetingSMTP.connect_latency = args.connect_latency_ms / 1000
+    handler = CountingHandler()
+    controller = SlowGreetingController(handler, hostname="127.0.0.1", port=args.port)
+    controller.start()
+    try:
+        docs = contact_docs(args.messages)
+
+        started = time.perf_counter()
+        send_per_connection("127.0.0.1", args.port, docs)
+        per_connection = time.perf_counter() - started
+
+        started = time.perf_counter()
+        enqueue_seconds = asyncio.run(send_with_mailer("127.0.0.1", args.port, docs))
+        pooled = time.perf_counter() - started
+    finally:
+        controller.stop()
+
+    return {
+        "messages": args.messages,
+        "connect_latency_ms": args.connect_latency_ms,
+        "per_message_connection": {
+            "seconds": round(per_connection, 3),
+            "messages_per_second": round(args.messages / per_connection, 1),
+        },
+        "pooled_mailer": {
+            "seconds": round(pooled, 3),
+            "messages_per_second": round(args.messages / pooled, 1),
+            "enqueue_ms_per_message": round(enqueue_seconds / args.messages * 1000, 4),
+        },
+        "received": handler.received,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--connect-latency-ms", type=float, default=50.0)
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Measure tokens saved by prompt compaction over a corpus of resumes and job descriptions
+
+Usage (from the backend directory):
+
+    python -m benchmarks.prompt_compaction [--corpus benchmarks/corpus] [--resume-budget 3000]
+
+The corpus directory holds ``resumes/*.txt`` and ``jobs/*.txt``; every
+resume is paired with every job description. A long synthetic resume is
+added to show budget truncation.
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+from benchmarks.fixtures import resume_lines
+from prompting import compact_prompt_inputs
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+
+
+def load_corpus(corpus: Path):
+    resumes = {path.stem: path.read_text() for path in sorted((corpus / "resumes").glob("*.txt"))}
+    jobs = {path.stem: path.read_text() for path in sorted((corpus / "jobs").glob("*.txt"))}
+    long_lines = resume_lines(600)
+    resumes["synthetic_long"] = "\n".join(
+        ["Alex Long", "Summary", *long_lines[:20], "Skills", "Python, Docker, AWS", "Experience", *long_lines[20:],
+         "Education", "B.S. Computer Science", "References", "Available upon request."]
+    )
+    return resumes, jobs
+
+
+def run(args):
+    resumes, jobs = load_corpus(Path(args.corpus))
+    rows = []
+    for resume_name, resume_text in resumes.items():
+        for job_name, job_description in jobs.items():
+            started = time.perf_counter()
+            compact = compact_prompt_inputs(resume_text, job_description, args.resume_budget, args.job_budget)
+            rows.append({
+                "resume": resume_name,
+                "job": job_name,
+                "original_tokens": compact.original_tokens,
+                "compacted_tokens": compact.compacted_tokens,
+                "tokens_saved": compact.tokens_saved,
+                "saved_pct": round(100 * compact.tokens_saved / compact.original_tokens, 1),
+                "sections": compact.sections,
+                "compaction_ms": round((time.perf_counter() - started) * 1000, 2),
+            })
+    original = sum(row["original_tokens"] for row in rows)
+    saved = sum(row["tokens_saved"] for row in rows)
+    return {
+        "resume_budget": args.resume_budget,
+        "job_budget": args.job_budget,
+        "pairs": rows,
+        "total_original_tokens": original,
+        "total_tokens_saved": saved,
+        "total_saved_pct": round(100 * saved / original, 1) if original else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=str(CORPUS_DIR))
+    parser.add_argument("--resume-budget", type=int, default=3000)
+    parser.add_argument("--job-budget", type=int, default=1500)
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Local stand-in for the OAuth session service and an OpenAI-compatible LLM
+
+Usage (from the backend directory):
+
+    python -m benchmarks.stub_upstream --port 9100 --llm-latency-ms 800
+
+Requests with ``"stream": true`` get the analysis as server-sent chunks,
+one field per chunk, spread over the configured latency.
+
+Then point the API at it:
+
+    OAUTH_SESSION_URL=http://127.0.0.1:9100/auth/v1/env/oauth/session-data
+    LLM_BASE_URL=http://127.0.0.1:9100/v1
+"""
+import argparse
+import asyncio
+import json
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Header
+from fastapi.responses import StreamingResponse
+
+STUB_ANALYSIS = {
+    "skill_match_score": 78,
+    "experience_score": 72,
+    "ats_score": 81,
+    "matched_skills": ["Python", "FastAPI", "MongoDB"],
+    "missing_skills": ["Kubernetes", "Terraform"],
+    "experience_relevance": "Relevant backend experience with the required stack.",
+    "suggestions": [
+        "Quantify the impact of your API work",
+        "Mention container orchestration experience",
+        "Add a skills section near the top",
+        "Use the job's wording for key technologies",
+        "List relevant certifications",
+    ],
+    "resume_keywords": ["python", "fastapi", "mongodb"],
+    "job_keywords": ["python", "kubernetes", "terraform"],
+}
+
+
+def create_stub_app(llm_latency_ms: float = 0.0, oauth_latency_ms: float = 0.0) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/auth/v1/env/oauth/session-data")
+    async def session_data(x_session_id: str = Header(...)):
+        await asyncio.sleep(oauth_latency_ms / 1000)
+        return {
+            "id": x_session_id,
+            "email": f"{x_session_id}@example.com",
+            "name": "Benchmark User",
+            "picture": "",
+            "session_token": f"stub_{uuid.uuid4().hex}",
+        }
+
+    def stream_chunks(model: str):
+        members = [json.dumps({key: value})[1:-1] for key, value in STUB_ANALYSIS.items()]
+        pieces = ["{"] + [member + "," for member in members[:-1]] + [members[-1] + "}"]
+
+        async def events():
+            for piece in pieces:
+                await asyncio.sleep(llm_latency_ms / 1000 / len(pieces))
+                chunk = {"object": "chat.completion.chunk", "model": model,
+                         "choices": [{"index": 0, "delta": {"content": piece}}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(body: dict):
+        if body.get("stream"):
+            return stream_chunks(body.get("model", "stub"))
+        await asyncio.sleep(llm_latency_ms / 1000)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(STUB_ANALYSIS)},
+                "finish_reason": "stop",
+            }],
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--oauth-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    app = create_stub_app(args.llm_latency_ms, args.oauth_latency_ms)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Measure embedding throughput and top-k search latency over a synthetic job corpus
+
+Usage (from the backend directory):
+
+    python -m benchmarks.vector_search [--jobs 5000] [--dimensions 512] [--k 10]
+
+Synthetic job descriptions are built from the skill dictionary; the corpus
+job descriptions are included among them, and each corpus resume is used as
+a query, reporting which corpus job it ranks highest.
+"""
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+
+from benchmarks.auth_latency import summarize
+from embeddings import HashedEmbedder, VectorIndex
+from matcher import SKILL_SYNONYMS
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+FILLER = "design build maintain services customers product platform teams data reliable scalable".split()
+
+
+def synthetic_jobs(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    skills = list(SKILL_SYNONYMS)
+    return [
+        f"Engineer {i}: " + ", ".join(rng.sample(skills, 6)) + ". " + " ".join(rng.choices(FILLER, k=80))
+        for i in range(count)
+    ]
+
+
+def run(args):
+    corpus = Path(args.corpus)
+    jobs = {path.stem: path.read_text() for path in sorted((corpus / "jobs").glob("*.txt"))}
+    resumes = {path.stem: path.read_text() for path in sorted((corpus / "resumes").glob("*.txt"))}
+    ids = list(jobs) + [f"synthetic_{i}" for i in range(args.jobs)]
+    texts = list(jobs.values()) + synthetic_jobs(args.jobs)
+    embedder = HashedEmbedder(args.dimensions)
+
+    started = time.perf_counter()
+    vectors = [embedder.embed(text) for text in texts]
+    embed_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index = VectorIndex.build(ids, vectors, args.dimensions, version=())
+    build_seconds = time.perf_counter() - started
+
+    latencies = []
+    top = {}
+    for _ in range(args.repeat):
+        for name, text in resumes.items():
+            started = time.perf_counter()
+            results = index.search(embedder.embed(text), args.k)
+            latencies.append(time.perf_counter() - started)
+            top[name] = results[:3]
+
+    return {
+        "documents": len(ids),
+        "dimensions": args.dimensions,
+        "index_mb": round(index.nbytes / (1024 * 1024), 2),
+        "embed_docs_per_second": round(len(ids) / embed_seconds, 1),
+        "index_build_ms": round(build_seconds * 1000, 2),
+        "query": summarize(latencies),
+        "top_matches": top,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=str(CORPUS_DIR))
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--dimensions", type=int, default=512)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
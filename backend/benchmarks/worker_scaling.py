@@ -0,0 +1,75 @@
+"""Measure how throughput scales with the number of uvicorn workers
+
+Runs benchmarks/load_test.py with ``--workers`` set to each of ``--workers``
+in turn, passing every other option through, and prints requests per second
+and p99 latency per scenario as a Markdown table (the curve in
+DEPLOYMENT.md). The full results are saved as JSON.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.worker_scaling --workers 1 2 4 8 -- --duration 10 --concurrency 32
+    python -m benchmarks.worker_scaling --workers 1 2 4 -- --mongo-url mongodb://localhost:27017
+
+With mongomock every worker has a private in-memory database, so the curve
+shows how the app's own CPU work spreads over cores; with ``--mongo-url`` it
+includes contention on the shared database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks import load_test
+
+
+def table(runs: dict) -> str:
+    counts = list(runs)
+    scenarios = list(next(iter(runs.values()))["scenarios"])
+    lines = [
+        "| scenario | " + " | ".join(f"{n} worker{'s' if n > 1 else ''}" for n in counts) + " |",
+        "|---" * (len(counts) + 1) + "|",
+    ]
+    for scenario in scenarios:
+        cells = []
+        for n in counts:
+            result = runs[n]["scenarios"].get(scenario)
+            cells.append(f"{result['requests_per_second']} req/s, p99 {result['latency']['p99_ms']} ms" if result else "")
+        lines.append(f"| {scenario} | " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<timestamp>-workers.json)")
+    args, passthrough = parser.parse_known_args()
+    passthrough = [arg for arg in passthrough if arg != "--"]
+
+    runs = {}
+    for workers in args.workers:
+        print(f"--- {workers} workers", file=sys.stderr)
+        load_args = load_test.build_parser().parse_args([*passthrough, "--workers", str(workers)])
+        runs[workers] = asyncio.run(load_test.run(load_args))
+
+    first = runs[args.workers[0]]
+    result = {
+        "commit": first["commit"],
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "cpu_count": os.cpu_count(),
+        "settings": {key: value for key, value in first["settings"].items() if key != "workers"},
+        "runs": {str(workers): run for workers, run in runs.items()},
+    }
+    output = Path(args.output) if args.output else (
+        load_test.RESULTS_DIR / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-workers.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2) + "\n")
+    print(table(runs))
+    print(f"Saved to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
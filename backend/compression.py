@@ -0,0 +1,52 @@
+"""Compression of large text fields stored in MongoDB
+
+Text longer than ``threshold`` bytes is stored as compressed bytes and short
+text is stored as it is. Readers call ``unpack_text``, which recognises the
+codec from the data itself, so the codec or threshold can change without
+rewriting existing documents.
+"""
+import logging
+import zlib
+from typing import Union
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is used instead
+    zstandard = None
+
+
+class TextCodec:
+    """Compresses text fields with ``codec`` ("zlib", "zstd" or "none")"""
+
+    def __init__(self, codec: str = "zlib", threshold: int = 1024, level: int = 6):
+        if codec == "zstd" and zstandard is None:
+            logging.warning("zstandard is not installed; compressing text fields with zlib")
+            codec = "zlib"
+        if codec not in ("zlib", "zstd", "none"):
+            raise ValueError(f"Unknown text codec: {codec}")
+        self.codec = codec
+        self.threshold = threshold
+        self.level = level
+        self._zstd = zstandard.ZstdCompressor(level=level) if codec == "zstd" else None
+
+    def pack(self, text: str) -> Union[str, bytes]:
+        data = text.encode("utf-8")
+        if self.codec == "none" or len(data) < self.threshold:
+            return text
+        if self._zstd is not None:
+            return self._zstd.compress(data)
+        return zlib.compress(data, self.level)
+
+
+def unpack_text(value: Union[str, bytes]) -> str:
+    """Return the text of a field written by TextCodec.pack"""
+    if isinstance(value, str):
+        return value
+    value = bytes(value)
+    if value.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed text")
+        return zstandard.ZstdDecompressor().decompress(value).decode("utf-8")
+    return zlib.decompress(value).decode("utf-8")
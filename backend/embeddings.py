@@ -0,0 +1,230 @@
+"""Hashed TF-IDF embeddings and per-user nearest-neighbour search over stored documents
+
+Documents are embedded locally, without a model download or network call:
+terms and canonical skills are hashed into a fixed number of dimensions with
+sublinear term frequencies and stored as float32 bytes next to the document.
+Inverse document frequencies are taken from each user's own corpus when
+their index is built, and a query is scored against every document with one
+matrix-vector product, which keeps top-k search over a few thousand job
+descriptions in the low milliseconds.
+"""
+import asyncio
+import logging
+import math
+import time
+import zlib
+from collections import Counter as TermCounter, OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from compression import unpack_text
+from matcher import STOPWORDS, find_skills, tokenize
+from metrics import Counter, Gauge
+
+if TYPE_CHECKING:
+    # Imported where vectors are built, so workers that only read history skip it
+    import numpy as np
+
+INDEX_BUILDS = Counter("resumatch_vector_index_builds_total", "Per-user vector indexes built", ("collection",))
+INDEX_CACHE_BYTES = Gauge("resumatch_vector_index_cache_bytes", "Memory held by cached vector indexes", ("collection",))
+
+SKILL_WEIGHT = 2.0  # a canonical skill counts for more than any single term
+
+
+class HashedEmbedder:
+    """Embeds text with the hashing trick: signed term buckets, sublinear TF, L2-normalized"""
+
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+
+    @property
+    def name(self) -> str:
+        # Stored with every vector; bump the version whenever features or weights change
+        return f"hashed-tf-v1/{self.dimensions}"
+
+    def _features(self, text: str) -> TermCounter:
+        tokens = tokenize(text)
+        features = TermCounter(
+            token for token in tokens if token not in STOPWORDS and len(token) > 1 and not token.isdigit()
+        )
+        for skill, count in find_skills(tokens).items():
+            features[f"skill:{skill}"] += SKILL_WEIGHT * count
+        return features
+
+    def embed(self, text: str) -> "np.ndarray":
+        import numpy as np
+
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature, count in self._features(text).items():
+            digest = zlib.crc32(feature.encode())
+            # The top bit picks the sign so colliding features tend to cancel out rather than add up
+            sign = -1.0 if digest & 0x80000000 else 1.0
+            vector[digest % self.dimensions] += sign * (1.0 + math.log(count))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+def to_bytes(vector: "np.ndarray") -> bytes:
+    import numpy as np
+
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def from_bytes(data: bytes) -> "np.ndarray":
+    import numpy as np
+
+    return np.frombuffer(data, dtype=np.float32)
+
+
+@dataclass
+class VectorIndex:
+    """IDF-weighted, row-normalized vectors of one user's documents"""
+    ids: List[str]
+    matrix: "np.ndarray"
+    idf: "np.ndarray"
+    version: tuple
+
+    @classmethod
+    def build(cls, ids: List[str], vectors: List["np.ndarray"], dimensions: int, version: tuple) -> "VectorIndex":
+        import numpy as np
+
+        if not ids:
+            return cls([], np.zeros((0, dimensions), dtype=np.float32), np.ones(dimensions, dtype=np.float32), version)
+        matrix = np.vstack(vectors)
+        document_frequency = np.count_nonzero(matrix, axis=0)
+        idf = (np.log((1 + len(ids)) / (1 + document_frequency)) + 1).astype(np.float32)
+        matrix = matrix * idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        return cls(ids, matrix, idf, version)
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + self.idf.nbytes
+
+    def search(self, query: "np.ndarray", k: int) -> List[Tuple[str, float]]:
+        """Return up to ``k`` (id, cosine similarity) pairs, most similar first"""
+        import numpy as np
+
+        if not self.ids or k <= 0:
+            return []
+        query = query * self.idf
+        norm = np.linalg.norm(query)
+        if not norm:
+            return []
+        scores = self.matrix @ (query / norm)
+        k = min(k, len(self.ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], round(float(scores[i]), 4)) for i in top]
+
+
+class VectorSearch:
+    """Top-k search over the vectors stored in a per-user MongoDB collection
+
+    Each document holds ``user_id``, an id field, its ``text`` and, once
+    embedded, ``vector``, ``vector_model`` and ``indexed_at``. A user's index
+    is built on first search and cached in memory (LRU, bounded by
+    ``max_cache_bytes``); it is rebuilt when the user's document count or
+    newest ``indexed_at`` changes, so writes from other workers are picked up
+    by the next search. Callers that bring a document back into ``query``
+    must move its ``indexed_at`` forward. Documents without a current vector are embedded when
+    the index is built and written back. ``query`` narrows the searchable
+    documents, such as excluding deleted ones.
+    """
+
+    def __init__(self, collection, id_field: str, embedder: HashedEmbedder, max_cache_bytes: int = 256 * 1024 * 1024,
+                 query: Optional[dict] = None):
+        self.collection = collection
+        self.id_field = id_field
+        self.query = query or {}
+        self.embedder = embedder
+        self.max_cache_bytes = max_cache_bytes
+        self._indexes: "OrderedDict[str, VectorIndex]" = OrderedDict()
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("user_id", 1), ("indexed_at", -1)])
+
+    def vector_fields(self, text: str) -> dict:
+        """Fields to store with a document so it is searchable without re-embedding"""
+        return {
+            "vector": to_bytes(self.embedder.embed(text)),
+            "vector_model": self.embedder.name,
+            "indexed_at": datetime.now(timezone.utc),
+        }
+
+    async def _version(self, user_id: str) -> tuple:
+        count = await self.collection.count_documents({"user_id": user_id, **self.query})
+        newest = await self.collection.find_one(
+            {"user_id": user_id, **self.query}, {"_id": 0, "indexed_at": 1}, sort=[("indexed_at", -1)]
+        )
+        return count, newest.get("indexed_at") if newest else None
+
+    async def _build(self, user_id: str) -> VectorIndex:
+        ids, vectors, stale = [], [], []
+        cursor = self.collection.find(
+            {"user_id": user_id, **self.query}, {"_id": 0, self.id_field: 1, "vector": 1, "vector_model": 1}
+        )
+        async for doc in cursor:
+            if doc.get("vector_model") == self.embedder.name:
+                ids.append(doc[self.id_field])
+                vectors.append(from_bytes(doc["vector"]))
+            else:
+                stale.append(doc[self.id_field])
+
+        if stale:
+            texts = {}
+            async for doc in self.collection.find(
+                {"user_id": user_id, self.id_field: {"$in": stale}}, {"_id": 0, self.id_field: 1, "text": 1}
+            ):
+                texts[doc[self.id_field]] = unpack_text(doc["text"])
+            embedded = await asyncio.to_thread(lambda: {key: self.embedder.embed(text) for key, text in texts.items()})
+            await self.collection.bulk_write([
+                UpdateOne(
+                    {"user_id": user_id, self.id_field: key},
+                    {"$set": {"vector": to_bytes(vector), "vector_model": self.embedder.name}},
+                )
+                for key, vector in embedded.items()
+            ], ordered=False)
+            logging.info(f"Embedded {len(embedded)} {self.collection.name} documents for {user_id}")
+            ids.extend(embedded)
+            vectors.extend(embedded.values())
+
+        # The version is read after re-embedding, which leaves indexed_at alone, so it stays current
+        version = await self._version(user_id)
+        INDEX_BUILDS.inc(collection=self.collection.name)
+        return await asyncio.to_thread(VectorIndex.build, ids, vectors, self.embedder.dimensions, version)
+
+    def _cache(self, user_id: str, index: VectorIndex):
+        self._indexes[user_id] = index
+        self._indexes.move_to_end(user_id)
+        cached = sum(entry.nbytes for entry in self._indexes.values())
+        while cached > self.max_cache_bytes and len(self._indexes) > 1:
+            _, evicted = self._indexes.popitem(last=False)
+            cached -= evicted.nbytes
+        INDEX_CACHE_BYTES.set(cached, collection=self.collection.name)
+
+    async def index(self, user_id: str) -> VectorIndex:
+        """Return the user's current index, building it if the cached one is out of date"""
+        cached = self._indexes.get(user_id)
+        if cached is not None and cached.version == await self._version(user_id):
+            self._indexes.move_to_end(user_id)
+            return cached
+        started = time.perf_counter()
+        index = await self._build(user_id)
+        logging.info(
+            f"Built {self.collection.name} vector index for {user_id}: {len(index.ids)} documents "
+            f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+        self._cache(user_id, index)
+        return index
+
+    async def search(self, user_id: str, text: str, k: int, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Rank the user's documents by similarity to ``text``"""
+        index = await self.index(user_id)
+        query = await asyncio.to_thread(self.embedder.embed, text)
+        results = index.search(query, k + 1 if exclude else k)
+        return [(key, score) for key, score in results if key != exclude][:k]
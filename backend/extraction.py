@@ -0,0 +1,484 @@
+"""Resume text extraction and the executor that keeps it off the event loop
+
+PDFs are read with PyPDF2 unless another extractor is configured: pypdfium2
+or pdfminer.six (both optional), tried first and falling back to PyPDF2 when
+they fail. DOCX files are streamed from the document XML (``"xml"``), which
+covers tables, text boxes, headers and footers without building
+python-docx's object model, falling back to python-docx's body paragraphs.
+Parsers are imported on first use.
+"""
+import asyncio
+import hashlib
+import importlib.util
+import io
+import itertools
+import logging
+import mmap
+import multiprocessing
+import os
+import posixpath
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+from xml.etree import ElementTree
+
+from metrics import Counter, Gauge
+
+EXTRACTION_PENDING = Gauge("resumatch_extraction_pending", "Extraction jobs queued or running")
+EXTRACTION_REJECTED = Counter("resumatch_extraction_rejected_total", "Extraction jobs rejected because the queue was full")
+EXTRACTION_TIMEOUTS = Counter("resumatch_extraction_timeouts_total", "Extraction jobs that exceeded the time limit")
+EXTRACTION_FALLBACKS = Counter(
+    "resumatch_extraction_fallbacks_total", "Extractions where the configured extractor failed and the fallback was used",
+    ("extractor",),
+)
+
+
+class ExtractionError(Exception):
+    """The uploaded file could not be parsed"""
+
+
+class ExtractionTimeout(ExtractionError):
+    """Extraction did not finish within the per-job time limit"""
+
+
+class ExtractionBusy(Exception):
+    """Too many extraction jobs are already queued"""
+
+
+class UploadTooLarge(Exception):
+    """The upload exceeds the configured size limit"""
+
+
+@dataclass
+class ExtractionResult:
+    """Extracted resume text plus how much of the document was read"""
+    text: str
+    pages_read: int = 0
+    total_pages: int = 0
+    truncated: bool = False
+    page_seconds: List[float] = field(default_factory=list)
+    extractor: str = ""
+    # Why the configured extractor failed, when the fallback one produced the text
+    fallback_reason: Optional[str] = None
+
+
+@dataclass
+class SpooledUpload:
+    """An upload written to a temporary file, with its size and SHA-256"""
+    path: str
+    size: int
+    sha256: str
+
+
+async def spool_upload_to_file(upload, max_bytes: int, chunk_size: int = 1024 * 1024) -> SpooledUpload:
+    """Stream an UploadFile to a temporary file in fixed-size chunks; the caller deletes it"""
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(prefix="resume_")
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Resume exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+                digest.update(chunk)
+                spool.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return SpooledUpload(path=path, size=size, sha256=digest.hexdigest())
+
+
+def read_pages(pages: Iterable[Any], total_pages: int, page_text: Callable[[Any], str],
+               max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> ExtractionResult:
+    """Join ``page_text(page)`` over pages, stopping after max_pages pages or max_chars characters"""
+    result = ExtractionResult(text="", total_pages=total_pages)
+    parts = []
+    chars = 0
+    for page in itertools.islice(pages, max_pages):
+        started = time.perf_counter()
+        text = page_text(page)
+        parts.append(text)
+        result.page_seconds.append(time.perf_counter() - started)
+        chars += len(text)
+        if max_chars is not None and chars >= max_chars:
+            break
+    result.pages_read = len(parts)
+    result.text = "".join(parts)
+    if max_chars is not None and len(result.text) > max_chars:
+        result.text = result.text[:max_chars]
+    result.truncated = result.pages_read < result.total_pages or chars > len(result.text)
+    return result
+
+
+def pdf_text_pypdf2(path: str, max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> ExtractionResult:
+    import PyPDF2
+
+    with open(path, "rb") as pdf_file, mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as pdf_map:
+        pdf_reader = PyPDF2.PdfReader(pdf_map)
+        return read_pages(
+            pdf_reader.pages, len(pdf_reader.pages), lambda page: page.extract_text() or "", max_pages, max_chars
+        )
+
+
+def pdf_text_pypdfium2(path: str, max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> ExtractionResult:
+    import pypdfium2
+
+    document = pypdfium2.PdfDocument(path)
+
+    def page_text(index: int) -> str:
+        page = document[index]
+        text_page = page.get_textpage()
+        try:
+            text = text_page.get_text_range().replace("\r\n", "\n")
+            # End the page with a newline, as PyPDF2 does, so words on adjacent pages stay apart
+            return text if not text or text.endswith("\n") else text + "\n"
+        finally:
+            text_page.close()
+            page.close()
+
+    try:
+        return read_pages(range(len(document)), len(document), page_text, max_pages, max_chars)
+    finally:
+        document.close()
+
+
+def pdf_text_pdfminer(path: str, max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> ExtractionResult:
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdftypes import resolve1
+
+    with open(path, "rb") as pdf_file:
+        document = PDFDocument(PDFParser(pdf_file))
+        output = io.StringIO()
+        manager = PDFResourceManager()
+        interpreter = PDFPageInterpreter(manager, TextConverter(manager, output, laparams=LAParams()))
+
+        def page_text(page) -> str:
+            interpreter.process_page(page)
+            # The converter ends every page with a form feed
+            text = output.getvalue().rstrip("\f")
+            output.seek(0)
+            output.truncate()
+            return text
+
+        total_pages = resolve1(document.catalog["Pages"])["Count"]
+        return read_pages(PDFPage.create_pages(document), total_pages, page_text, max_pages, max_chars)
+
+
+def docx_text_python_docx(path: str, max_chars: Optional[int] = None) -> ExtractionResult:
+    import docx
+
+    doc = docx.Document(path)
+    text = "\n".join([para.text for para in doc.paragraphs])
+    truncated = max_chars is not None and len(text) > max_chars
+    return ExtractionResult(text=text[:max_chars] if truncated else text, truncated=truncated)
+
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+RELATIONSHIP = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+# Text equivalents of run content, as python-docx renders them
+RUN_TEXT = {f"{W}tab": "\t", f"{W}ptab": "\t", f"{W}cr": "\n", f"{W}noBreakHyphen": "-"}
+# Content Word does not show: deleted or moved-away revisions, and the legacy copy of each text box and
+# drawing kept for older readers
+HIDDEN = {f"{W}del", f"{W}moveFrom", "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"}
+# Top-level elements of each part; their finished children are dropped to keep memory bounded
+PART_ROOTS = {f"{W}body", f"{W}hdr", f"{W}ftr"}
+
+
+def iter_part_lines(part, max_chars: Optional[int] = None) -> Iterator[str]:
+    """Yield the paragraphs of a WordprocessingML part in reading order, parsing it incrementally
+
+    Table cells are read row by row, each cell's paragraphs in turn. A text
+    box's paragraphs come where the box is anchored, before the rest of the
+    paragraph holding it. Parsing stops once the lines yielded pass
+    ``max_chars``, and no more text is buffered past it, however long a
+    paragraph is.
+    """
+    parents = []
+    paragraphs = []
+    hidden = 0
+    # Characters yielded or buffered so far, counting a newline after each line
+    chars = 0
+    for event, element in ElementTree.iterparse(part, events=("start", "end")):
+        tag = element.tag
+        if event == "start":
+            if tag in HIDDEN:
+                hidden += 1
+            elif tag == f"{W}p" and not hidden:
+                paragraphs.append([])
+            parents.append(element)
+            continue
+        parents.pop()
+        text = None
+        if tag in HIDDEN:
+            hidden -= 1
+        elif hidden or not paragraphs:
+            pass
+        elif tag == f"{W}t":
+            text = element.text or ""
+        elif parents[-1].tag == f"{W}r" and (tag in RUN_TEXT or tag == f"{W}br"):
+            # Page and column breaks have no text
+            if tag != f"{W}br" or element.get(f"{W}type", "textWrapping") == "textWrapping":
+                text = RUN_TEXT.get(tag, "\n")
+        elif tag == f"{W}p":
+            yield "".join(paragraphs.pop())
+            element.clear()
+            chars += 1
+            if max_chars is not None and chars > max_chars + 1:
+                return
+        # One character past the budget is kept so that callers can tell the text was cut
+        if text and (max_chars is None or chars <= max_chars):
+            if max_chars is not None:
+                text = text[:max_chars + 1 - chars]
+            paragraphs[-1].append(text)
+            chars += len(text)
+        if parents and parents[-1].tag in PART_ROOTS:
+            parents[-1].remove(element)
+
+
+def docx_part_names(archive: zipfile.ZipFile) -> List[str]:
+    """The document part, preceded by its header parts and followed by its footer parts"""
+    headers, footers = [], []
+    try:
+        relationships = ElementTree.fromstring(archive.read("word/_rels/document.xml.rels")).iter(RELATIONSHIP)
+    except KeyError:
+        relationships = ()
+    for relationship in relationships:
+        kind = relationship.get("Type", "").rsplit("/", 1)[-1]
+        target = relationship.get("Target", "")
+        name = target[1:] if target.startswith("/") else posixpath.normpath(f"word/{target}")
+        if kind == "header":
+            headers.append(name)
+        elif kind == "footer":
+            footers.append(name)
+    return headers + ["word/document.xml"] + footers
+
+
+def iter_docx_lines(archive: zipfile.ZipFile, max_chars: Optional[int] = None) -> Iterator[str]:
+    """Yield the text of a DOCX line by line: headers, body, then footers
+
+    Headers and footers are usually repeated for the first page or even
+    pages, so a part with no text or the same text as an earlier one is skipped.
+    Each part is read up to ``max_chars`` characters.
+    """
+    seen = set()
+    for name in docx_part_names(archive):
+        if name == "word/document.xml":
+            with archive.open(name) as part:
+                yield from iter_part_lines(part, max_chars)
+            continue
+        try:
+            with archive.open(name) as part:
+                lines = list(iter_part_lines(part, max_chars))
+        except KeyError:
+            continue
+        text = "\n".join(lines).strip()
+        if text and text not in seen:
+            seen.add(text)
+            yield from lines
+
+
+def docx_text_xml(path: str, max_chars: Optional[int] = None) -> ExtractionResult:
+    """Stream the text of the document, its tables, text boxes, headers and footers from the DOCX XML"""
+    lines = []
+    chars = 0
+    with zipfile.ZipFile(path) as archive:
+        for line in iter_docx_lines(archive, max_chars):
+            lines.append(line)
+            chars += len(line) + 1
+            # The text joined so far is one character shorter than ``chars``
+            if max_chars is not None and chars > max_chars + 1:
+                break
+    text = "\n".join(lines)
+    truncated = max_chars is not None and len(text) > max_chars
+    return ExtractionResult(text=text[:max_chars] if truncated else text, truncated=truncated)
+
+
+FALLBACK_PDF_EXTRACTOR = "pypdf2"
+FALLBACK_DOCX_EXTRACTOR = "python-docx"
+PDF_EXTRACTORS = {"pypdf2": pdf_text_pypdf2, "pypdfium2": pdf_text_pypdfium2, "pdfminer": pdf_text_pdfminer}
+DOCX_EXTRACTORS = {"python-docx": docx_text_python_docx, "xml": docx_text_xml}
+# Package each extractor needs; optional ones may be missing
+EXTRACTOR_PACKAGES = {
+    "pypdf2": "PyPDF2", "pypdfium2": "pypdfium2", "pdfminer": "pdfminer",
+    "python-docx": "docx", "xml": None,
+}
+
+
+def _extract(extractors: dict, fallback: str, extractor: str, kind: str, *args) -> ExtractionResult:
+    """Run ``extractor``, falling back to ``fallback`` if it fails; raise ExtractionError if both do"""
+    if extractor not in extractors:
+        raise ValueError(f"Unknown {kind} extractor: {extractor}")
+    fallback_reason = None
+    if extractor != fallback:
+        try:
+            result = extractors[extractor](*args)
+            result.extractor = extractor
+            return result
+        except Exception as e:
+            fallback_reason = f"{type(e).__name__}: {e}"
+    try:
+        result = extractors[fallback](*args)
+    except Exception as e:
+        raise ExtractionError(f"Error parsing {kind}: {str(e)}")
+    result.extractor = fallback
+    result.fallback_reason = fallback_reason
+    return result
+
+
+def extract_text_from_pdf(path: str, max_pages: Optional[int] = None, max_chars: Optional[int] = None,
+                          extractor: str = FALLBACK_PDF_EXTRACTOR) -> ExtractionResult:
+    """Extract text from PDF file"""
+    return _extract(PDF_EXTRACTORS, FALLBACK_PDF_EXTRACTOR, extractor, "PDF", path, max_pages, max_chars)
+
+
+def extract_text_from_docx(path: str, max_chars: Optional[int] = None,
+                           extractor: str = "xml") -> ExtractionResult:
+    """Extract text from DOCX file"""
+    return _extract(DOCX_EXTRACTORS, FALLBACK_DOCX_EXTRACTOR, extractor, "DOCX", path, max_chars)
+
+
+def worker_ready(extractor: str = FALLBACK_PDF_EXTRACTOR) -> int:
+    """Runs in a pool worker to import the PDF readers there before the first PDF arrives"""
+    for name in {extractor, FALLBACK_PDF_EXTRACTOR}:
+        importlib.import_module(EXTRACTOR_PACKAGES[name])
+    return os.getpid()
+
+
+class ExtractionExecutor:
+    """Runs PDF extraction in a process pool and DOCX extraction in threads
+
+    At most ``max_pending`` jobs may be queued or running at once; further
+    submissions fail fast with ``ExtractionBusy``. PDFs are read page by page
+    and stop early once ``max_pages`` or ``max_chars`` is reached. Jobs exceeding
+    ``timeout_seconds`` raise ``ExtractionTimeout`` and the process pool is
+    recycled so the stuck worker is killed. ``pdf_extractor`` and
+    ``docx_extractor`` name entries of ``PDF_EXTRACTORS`` and ``DOCX_EXTRACTORS``.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: int = 32,
+                 timeout_seconds: float = 20.0, max_pages: int = 20, max_chars: int = 50000,
+                 pdf_extractor: str = FALLBACK_PDF_EXTRACTOR, docx_extractor: str = "xml"):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.pdf_extractor = self._available(pdf_extractor, PDF_EXTRACTORS, FALLBACK_PDF_EXTRACTOR, "PDF")
+        self.docx_extractor = self._available(docx_extractor, DOCX_EXTRACTORS, FALLBACK_DOCX_EXTRACTOR, "DOCX")
+        self._pending = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @staticmethod
+    def _available(extractor: str, extractors: dict, fallback: str, kind: str) -> str:
+        if extractor not in extractors:
+            raise ValueError(f"Unknown {kind} extractor: {extractor}")
+        package = EXTRACTOR_PACKAGES[extractor]
+        if package is not None and importlib.util.find_spec(package) is None:
+            logging.warning(f"{package} is not installed; extracting {kind} text with {fallback}")
+            return fallback
+        return extractor
+
+    @property
+    def variant(self) -> str:
+        """Identifies the settings that shape extracted text, so stored text from other settings is not reused"""
+        parts = [str(self.max_pages), str(self.max_chars)]
+        parts += [extractor for extractor, fallback in (
+            (self.pdf_extractor, FALLBACK_PDF_EXTRACTOR), (self.docx_extractor, FALLBACK_DOCX_EXTRACTOR),
+        ) if extractor != fallback]
+        return "/".join(parts)
+
+    @staticmethod
+    def _checked(result: ExtractionResult, filename: str, extractor: str) -> ExtractionResult:
+        if result.fallback_reason is not None:
+            EXTRACTION_FALLBACKS.inc(extractor=extractor)
+            logging.warning(f"{extractor} failed on {filename}, used {result.extractor}: {result.fallback_reason}")
+        return result
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn avoids forking the event loop and Mongo client threads into workers
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def _recycle_pool(self, pool: ProcessPoolExecutor):
+        if self._pool is not pool:
+            return
+        self._pool = None
+        processes = list((pool._processes or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    async def _run_pdf(self, path: str) -> ExtractionResult:
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            pool = self._get_pool()
+            future = loop.run_in_executor(
+                pool, extract_text_from_pdf, path, self.max_pages, self.max_chars, self.pdf_extractor
+            )
+            try:
+                return await asyncio.wait_for(future, self.timeout_seconds)
+            except asyncio.TimeoutError:
+                EXTRACTION_TIMEOUTS.inc()
+                logging.error("PDF extraction timed out, recycling extraction pool")
+                self._recycle_pool(pool)
+                raise ExtractionTimeout(f"PDF extraction timed out after {self.timeout_seconds:g}s")
+            except BrokenProcessPool:
+                # Another job's timeout killed this worker; retry once on a fresh pool
+                self._recycle_pool(pool)
+                if attempt:
+                    raise ExtractionError("PDF extraction worker crashed")
+
+    async def extract(self, filename: str, path: str) -> ExtractionResult:
+        """Extract text from a spooled PDF or DOCX without blocking the event loop"""
+        if self._pending >= self.max_pending:
+            EXTRACTION_REJECTED.inc()
+            raise ExtractionBusy("Too many resumes are being processed, please retry shortly")
+        self._pending += 1
+        EXTRACTION_PENDING.set(self._pending)
+        try:
+            if filename.lower().endswith(".pdf"):
+                return self._checked(await self._run_pdf(path), filename, self.pdf_extractor)
+            try:
+                result = await asyncio.wait_for(
+                    asyncio.to_thread(extract_text_from_docx, path, self.max_chars, self.docx_extractor),
+                    self.timeout_seconds,
+                )
+                return self._checked(result, filename, self.docx_extractor)
+            except asyncio.TimeoutError:
+                EXTRACTION_TIMEOUTS.inc()
+                raise ExtractionTimeout(f"DOCX extraction timed out after {self.timeout_seconds:g}s")
+        finally:
+            self._pending -= 1
+            EXTRACTION_PENDING.set(self._pending)
+
+    async def prewarm(self):
+        """Start every pool worker now, so the first PDFs do not wait for process spawn and imports"""
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        workers = self.max_workers or os.cpu_count() or 1
+        started = time.perf_counter()
+        # Without fork, the pool spawns a worker for each task submitted while the others are busy
+        await asyncio.gather(*(loop.run_in_executor(pool, worker_ready, self.pdf_extractor) for _ in range(workers)))
+        logging.info(f"Started {workers} PDF extraction workers in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,436 @@
+"""Streaming export and bulk import of analysis history as NDJSON or CSV
+
+Exports read the ``db.analyses`` cursor ``batch_size`` documents at a time,
+fill in each batch's job description text and yield it encoded, so memory
+stays flat however many analyses are exported. Imports parse the same
+formats line by line as they arrive and write ordered ``insert_many``
+batches. Job description text is stored once per user (see job_store), and
+analyses whose ``analysis_id`` is already stored are skipped, so an
+interrupted import can be re-run. In CSV, list and object fields are
+JSON-encoded cells.
+
+Usage (from the backend directory, with the API's .env or environment):
+
+    python -m history_io export --format csv --output analyses.csv
+    python -m history_io export --user-id user_123 > analyses.ndjson
+    python -m history_io import analyses.ndjson
+"""
+import argparse
+import asyncio
+import codecs
+import csv
+import io
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from compression import TextCodec
+from embeddings import HashedEmbedder, VectorSearch
+from job_store import JobDescriptionStore
+from metrics import Counter
+
+HISTORY_ROWS = Counter("resumatch_history_rows_total", "Analyses exported or imported", ("direction",))
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+CSV_COLUMNS = [
+    "analysis_id", "user_id", "resume_id", "resume_filename", "job_description_id", "job_description",
+    "overall_score", "skill_match_score", "experience_score", "ats_score",
+    "matched_skills", "missing_skills", "suggestions", "keyword_analysis", "routing", "delta", "created_at",
+]
+JSON_COLUMNS = {"matched_skills", "missing_skills", "suggestions", "keyword_analysis", "routing", "delta"}
+SCORE_COLUMNS = ("overall_score", "skill_match_score", "experience_score", "ats_score")
+# Section hashes only serve incremental analyses of the stored resume
+EXPORT_PROJECTION = {"_id": 0, "resume_sections": 0}
+MAX_REPORTED_ERRORS = 100
+# Longest line, or CSV record, an import holds in memory while it waits for the rest
+MAX_ROW_CHARS = 1024 * 1024
+
+
+class HistoryFormatError(ValueError):
+    """The input cannot be read as the given format at all"""
+
+
+class HistoryRowTooLong(HistoryFormatError):
+    """A line or CSV record of the input is longer than the import accepts"""
+
+    def __init__(self, max_chars: int):
+        super().__init__(f"Rows must be at most {max_chars} characters long")
+
+
+def _rate(rows: int, seconds: float) -> float:
+    return round(rows / seconds, 1) if seconds else 0.0
+
+
+# Export
+
+async def iter_analyses(db, job_store: JobDescriptionStore, query: dict, batch_size: int = 1000,
+                        include_job_description: bool = True) -> AsyncIterator[List[dict]]:
+    """Yield the analyses matching ``query`` in batches, with their job description text"""
+    # A single user's history is read newest first from the history index; a full export in _id order
+    sort = [("created_at", -1), ("analysis_id", -1)] if "user_id" in query else [("_id", 1)]
+    cursor = db.analyses.find(query, EXPORT_PROJECTION, batch_size=batch_size).sort(sort)
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield await _with_job_descriptions(job_store, batch, include_job_description)
+            batch = []
+    if batch:
+        yield await _with_job_descriptions(job_store, batch, include_job_description)
+
+
+async def _with_job_descriptions(job_store: JobDescriptionStore, batch: List[dict], include: bool) -> List[dict]:
+    if not include:
+        # Analyses stored before job descriptions were deduplicated still embed the text
+        for doc in batch:
+            doc.pop("job_description", None)
+        return batch
+    by_user = defaultdict(set)
+    for doc in batch:
+        if doc.get("job_description_id") and "job_description" not in doc:
+            by_user[doc["user_id"]].add(doc["job_description_id"])
+    texts = {}
+    for user_id, job_description_ids in by_user.items():
+        jobs = await job_store.get_many(user_id, list(job_description_ids), include_deleted=True)
+        texts.update(((user_id, key), job["text"]) for key, job in jobs.items())
+    for doc in batch:
+        text = texts.get((doc["user_id"], doc.get("job_description_id")))
+        if text is not None and "job_description" not in doc:
+            doc["job_description"] = text
+    return batch
+
+
+def encode_ndjson(batch: List[dict], header: bool = False) -> str:
+    return "".join(json.dumps(doc, default=str) + "\n" for doc in batch)
+
+
+def encode_csv(batch: List[dict], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_COLUMNS, extrasaction="ignore", lineterminator="\n")
+    if header:
+        writer.writeheader()
+    for doc in batch:
+        writer.writerow({
+            column: json.dumps(doc[column], default=str) if column in JSON_COLUMNS and doc.get(column) is not None
+            else doc.get(column)
+            for column in CSV_COLUMNS
+        })
+    return buffer.getvalue()
+
+
+async def export_chunks(db, job_store: JobDescriptionStore, query: dict, format: str = "ndjson",
+                        batch_size: int = 1000, include_job_description: bool = True,
+                        stats: Optional[dict] = None) -> AsyncIterator[str]:
+    """Yield the analyses matching ``query`` encoded as ``format``, one chunk per batch
+
+    ``stats``, if given, is filled with the row count and rate once the export ends.
+    """
+    encode = encode_csv if format == "csv" else encode_ndjson
+    started = time.perf_counter()
+    rows = 0
+    async for batch in iter_analyses(db, job_store, query, batch_size, include_job_description):
+        yield encode(batch, header=rows == 0)
+        rows += len(batch)
+        HISTORY_ROWS.inc(len(batch), direction="export")
+    if rows == 0 and format == "csv":
+        yield encode([], header=True)
+    elapsed = time.perf_counter() - started
+    logging.info(f"Exported {rows} analyses in {elapsed:.1f}s ({_rate(rows, elapsed)} rows/s)")
+    if stats is not None:
+        stats.update(rows=rows, seconds=round(elapsed, 2), rows_per_second=_rate(rows, elapsed))
+
+
+# Import
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_chars: int = MAX_ROW_CHARS) -> AsyncIterator[str]:
+    """Split a byte stream into lines, keeping their line endings
+
+    Raises HistoryRowTooLong as soon as a line exceeds ``max_chars``, rather
+    than buffering a body without line breaks.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            if len(line) > max_chars:
+                raise HistoryRowTooLong(max_chars)
+            yield line + "\n"
+        if len(pending) > max_chars:
+            raise HistoryRowTooLong(max_chars)
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def iter_records(lines: AsyncIterator[str], format: str = "ndjson",
+                       max_chars: int = MAX_ROW_CHARS) -> AsyncIterator[Tuple[int, Union[dict, str]]]:
+    """Yield ``(line number, row)`` for every record, or ``(line number, error)`` for unreadable ones
+
+    A CSV record spanning lines is limited to ``max_chars`` as well, so an
+    unterminated quoted cell raises HistoryRowTooLong instead of collecting
+    the rest of the input.
+    """
+    line_number = 0
+    if format == "ndjson":
+        async for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, f"Invalid JSON: {e}"
+                continue
+            yield line_number, row if isinstance(row, dict) else "Expected a JSON object"
+        return
+
+    header, record, record_start, quotes = None, "", 0, 0
+    async for line in lines:
+        line_number += 1
+        if not record:
+            record_start = line_number
+        record += line
+        if len(record) > max_chars:
+            raise HistoryRowTooLong(max_chars)
+        quotes += line.count('"')
+        # Quotes inside a quoted cell are doubled, so an odd count means the cell continues on the next line
+        if quotes % 2:
+            continue
+        values = next(csv.reader([record]), [])
+        record, quotes = "", 0
+        if not values:
+            continue
+        if header is None:
+            header = values
+            if "resume_filename" not in header:
+                raise HistoryFormatError("The first CSV line must be a header row of analysis fields")
+            continue
+        yield record_start, dict(zip(header, values))
+    if record:
+        yield record_start, "Unterminated quoted CSV cell"
+
+
+def normalize_row(row: dict, user_id: Optional[str] = None) -> dict:
+    """Validate an exported analysis and return the document to store
+
+    CSV cells arrive as strings and are decoded here. ``user_id``, when given,
+    replaces the row's owner. ``created_at`` is converted to UTC, taking
+    timestamps without an offset as UTC. Raises ValueError describing the
+    first problem.
+    """
+    doc = {}
+    for column in CSV_COLUMNS:
+        value = row.get(column)
+        if value == "" or value is None:
+            continue
+        if column in JSON_COLUMNS and isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise ValueError(f"{column} is not valid JSON")
+        doc[column] = value
+
+    if user_id is not None:
+        doc["user_id"] = user_id
+    for column in ("user_id", "resume_filename"):
+        if not isinstance(doc.get(column), str):
+            raise ValueError(f"{column} is required")
+    if not doc.get("job_description") and not doc.get("job_description_id"):
+        raise ValueError("job_description or job_description_id is required")
+    for column in SCORE_COLUMNS:
+        try:
+            doc[column] = float(doc[column])
+        except KeyError:
+            raise ValueError(f"{column} is required")
+        except (TypeError, ValueError):
+            raise ValueError(f"{column} must be a number")
+    for column in ("matched_skills", "missing_skills", "suggestions"):
+        doc.setdefault(column, [])
+        if not isinstance(doc[column], list):
+            raise ValueError(f"{column} must be a list")
+    doc.setdefault("keyword_analysis", {"resume_keywords": [], "job_keywords": []})
+
+    doc.setdefault("analysis_id", f"analysis_{uuid.uuid4().hex[:12]}")
+    if "created_at" in doc:
+        try:
+            created_at = datetime.fromisoformat(str(doc["created_at"]))
+        except ValueError:
+            raise ValueError("created_at must be an ISO 8601 timestamp")
+        # History pages are keyed on created_at as a string, so it is stored in the API's own format
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        doc["created_at"] = created_at.astimezone(timezone.utc).isoformat()
+    else:
+        doc["created_at"] = datetime.now(timezone.utc).isoformat()
+    return doc
+
+
+async def _store_batch(db, job_store: JobDescriptionStore, batch: List[dict]) -> Tuple[int, int]:
+    """Insert the analyses of a batch that are not stored yet; returns (inserted, skipped)"""
+    existing = set(await db.analyses.distinct(
+        "analysis_id", {"analysis_id": {"$in": [doc["analysis_id"] for doc in batch]}}
+    ))
+    new = []
+    for doc in batch:
+        if doc["analysis_id"] not in existing:
+            existing.add(doc["analysis_id"])
+            new.append(doc)
+    if not new:
+        return 0, len(batch)
+
+    # Job description text is stored once per user and referenced by id, as the API stores it
+    texts = defaultdict(dict)
+    for doc in new:
+        if doc.get("job_description"):
+            texts[doc["user_id"]].setdefault(doc["job_description"], None)
+    for user_id, by_text in texts.items():
+        ordered = list(by_text)
+        vectors = await asyncio.to_thread(lambda: [job_store.search.vector_fields(text) for text in ordered])
+        ids = await job_store.put_many(user_id, [{"text": text} for text in ordered], vectors, save=False)
+        by_text.update(zip(ordered, ids))
+    for doc in new:
+        text = doc.pop("job_description", None)
+        if text:
+            doc["job_description_id"] = texts[doc["user_id"]][text]
+
+    await db.analyses.insert_many(new, ordered=True)
+    return len(new), len(batch) - len(new)
+
+
+async def import_analyses(db, job_store: JobDescriptionStore, records: AsyncIterator[Tuple[int, Union[dict, str]]],
+                          user_id: Optional[str] = None, batch_size: int = 1000) -> dict:
+    """Store the records read by iter_records, ``batch_size`` analyses per insert
+
+    Invalid rows are counted and the first few reported with their line
+    numbers; they do not stop the import.
+    """
+    stats = {"imported": 0, "skipped_existing": 0, "invalid": 0, "errors": []}
+    started = time.perf_counter()
+    batch = []
+
+    async def flush():
+        inserted, skipped = await _store_batch(db, job_store, batch)
+        stats["imported"] += inserted
+        stats["skipped_existing"] += skipped
+        HISTORY_ROWS.inc(inserted, direction="import")
+        batch.clear()
+
+    async for line_number, row in records:
+        try:
+            if isinstance(row, str):
+                raise ValueError(row)
+            batch.append(normalize_row(row, user_id))
+        except ValueError as e:
+            stats["invalid"] += 1
+            if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+                stats["errors"].append({"line": line_number, "error": str(e)})
+            continue
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 2)
+    stats["rows_per_second"] = _rate(stats["imported"] + stats["skipped_existing"], elapsed)
+    logging.info(
+        f"Imported {stats['imported']} analyses ({stats['skipped_existing']} already stored, "
+        f"{stats['invalid']} invalid) in {elapsed:.1f}s ({stats['rows_per_second']} rows/s)"
+    )
+    return stats
+
+
+# Command line
+
+async def read_chunks(stream, size: int = 1024 * 1024) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await asyncio.to_thread(stream.read, size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def format_for(path: Optional[str], requested: Optional[str]) -> str:
+    if requested:
+        return requested
+    return "csv" if path and path.lower().endswith(".csv") else "ndjson"
+
+
+async def run(args) -> dict:
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    db = client[os.environ["DB_NAME"]]
+    # Same settings as the API, so imported job descriptions match what it writes
+    codec = TextCodec(
+        os.environ.get("TEXT_COMPRESSION", "zlib"),
+        threshold=int(os.environ.get("TEXT_COMPRESSION_MIN_BYTES", 1024)),
+    )
+    embedder = HashedEmbedder(int(os.environ.get("EMBEDDING_DIMENSIONS", 512)))
+    job_store = JobDescriptionStore(
+        db.job_descriptions, VectorSearch(db.job_descriptions, "job_description_id", embedder), codec=codec
+    )
+
+    try:
+        if args.command == "export":
+            format = format_for(args.output, args.format)
+            query = {"user_id": args.user_id} if args.user_id else {}
+            stats = {}
+            output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+            try:
+                async for chunk in export_chunks(
+                    db, job_store, query, format, args.batch_size, not args.without_job_description, stats
+                ):
+                    await asyncio.to_thread(output.write, chunk)
+            finally:
+                if args.output:
+                    output.close()
+            return {"exported": stats}
+
+        format = format_for(args.input, args.format)
+        source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+        try:
+            records = iter_records(iter_lines(read_chunks(source)), format)
+            return {"imported": await import_analyses(db, job_store, records, args.user_id, args.batch_size)}
+        finally:
+            if source is not sys.stdin.buffer:
+                source.close()
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write analyses as NDJSON or CSV")
+    export.add_argument("--output", help="file to write (default: stdout)")
+    export.add_argument("--user-id", help="export only this user's analyses")
+    export.add_argument("--without-job-description", action="store_true",
+                        help="leave out job description text; rows keep job_description_id")
+    imported = commands.add_parser("import", help="store analyses from an NDJSON or CSV export")
+    imported.add_argument("input", help="file to read, or - for stdin")
+    imported.add_argument("--user-id", help="import every row into this user's history")
+    for command in (export, imported):
+        command.add_argument("--format", choices=sorted(EXPORT_FORMATS), help="default: from the file extension")
+        command.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).resolve().parent / ".env")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    # The report goes to stderr so an export can be written to stdout
+    print(json.dumps(asyncio.run(run(args)), indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
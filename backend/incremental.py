@@ -0,0 +1,147 @@
+"""Diff-aware re-analysis of an edited resume against a job description it was analyzed with before
+
+Every analysis stores a hash of each resume section. When the same user
+analyzes an edited resume against the same job description, the sections
+are compared with the closest earlier analysis; if most are unchanged, the
+local matcher scores the old and new text and its changes are applied to
+the earlier AI analysis instead of running the model again. Either way the
+result carries a delta view against the earlier analysis.
+"""
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from matcher import SKILL_SYNONYMS, JobIndex, find_skills, match, tokenize
+from metrics import Counter
+from prompting import normalize_lines, segment_resume
+
+INCREMENTAL_ANALYSES = Counter(
+    "resumatch_incremental_analyses_total",
+    "Incremental analysis requests by outcome (merged, no_base, too_different, base_resume_missing)",
+    ("result",),
+)
+
+DELTA_SCORE_FIELDS = ("overall_score", "skill_match_score", "experience_score", "ats_score")
+
+
+def section_hashes(resume_text: str) -> Dict[str, str]:
+    """Hash each resume section; repeated section names are numbered ("experience", "experience_2")"""
+    hashes: Dict[str, str] = {}
+    for section in segment_resume(normalize_lines(resume_text)):
+        name = section.name
+        suffix = 2
+        while name in hashes:
+            name = f"{section.name}_{suffix}"
+            suffix += 1
+        hashes[name] = hashlib.sha256(section.text.lower().encode("utf-8")).hexdigest()[:16]
+    return hashes
+
+
+@dataclass
+class SectionDiff:
+    """Sections of a resume that changed since an earlier analysis"""
+    changed: List[str] = field(default_factory=list)
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged_ratio: float = 1.0
+
+    @classmethod
+    def between(cls, before: Dict[str, str], after: Dict[str, str]) -> "SectionDiff":
+        changed = [name for name in after if name in before and before[name] != after[name]]
+        added = [name for name in after if name not in before]
+        removed = [name for name in before if name not in after]
+        total = len(set(before) | set(after))
+        unchanged = total - len(changed) - len(added) - len(removed)
+        return cls(changed, added, removed, unchanged / total if total else 1.0)
+
+    def as_dict(self) -> dict:
+        return {"changed_sections": self.changed, "added_sections": self.added, "removed_sections": self.removed}
+
+
+def choose_base(candidates: List[dict], resume_sections: Dict[str, str]) -> Optional[Tuple[dict, SectionDiff]]:
+    """Pick the earlier analysis whose resume shares the most sections with this one"""
+    best = None
+    for candidate in candidates:
+        diff = SectionDiff.between(candidate.get("resume_sections") or {}, resume_sections)
+        if best is None or diff.unchanged_ratio > best[1].unchanged_ratio:
+            best = (candidate, diff)
+    return best
+
+
+def _canonical(skill: str) -> str:
+    if skill in SKILL_SYNONYMS:
+        return skill
+    found = find_skills(tokenize(skill))
+    return next(iter(found)) if len(found) == 1 else skill.strip().lower()
+
+
+def _clamp(score: float) -> float:
+    return round(min(100.0, max(0.0, score)), 1)
+
+
+def merge_analysis(base: dict, base_resume_text: str, resume_text: str, job_description: str) -> dict:
+    """Apply the local matcher's view of a resume edit to an earlier AI analysis
+
+    Skills the edit added move from missing to matched (and the reverse),
+    scores shift by the change in the local skill and keyword scores, and
+    suggestions about newly matched skills are dropped.
+    """
+    job_index = JobIndex.build(job_description)
+    before = match(base_resume_text, job_description, job_index)
+    after = match(resume_text, job_description, job_index)
+    matched_before = {_canonical(skill) for skill in before.matched_skills}
+    matched_after = {_canonical(skill) for skill in after.matched_skills}
+    gained, lost = matched_after - matched_before, matched_before - matched_after
+
+    matched = [skill for skill in base["matched_skills"] if _canonical(skill) not in lost]
+    missing = [skill for skill in base["missing_skills"] if _canonical(skill) not in gained]
+    known_matched = {_canonical(skill) for skill in matched}
+    known_missing = {_canonical(skill) for skill in missing}
+    matched += [skill for skill in after.matched_skills if skill in gained and skill not in known_matched]
+    missing += [skill for skill in before.matched_skills if skill in lost and skill not in known_missing]
+
+    skill_change = after.skill_match_score - before.skill_match_score
+    keyword_change = after.keyword_score - before.keyword_score
+    suggestions = [
+        suggestion for suggestion in base["suggestions"]
+        if not gained.intersection(find_skills(tokenize(suggestion)))
+    ] or ["Quantify achievements with concrete numbers and outcomes"]
+
+    resume_terms = set(tokenize(resume_text))
+    keyword_analysis = base.get("keyword_analysis") or {}
+    resume_keywords = [term for term in keyword_analysis.get("resume_keywords", []) if term.lower() in resume_terms]
+    resume_keywords += [term for term in after.resume_keywords if term not in resume_keywords]
+
+    return {
+        "skill_match_score": _clamp(base["skill_match_score"] + skill_change),
+        "experience_score": _clamp(base["experience_score"] + keyword_change),
+        "ats_score": _clamp(base["ats_score"] + (skill_change + keyword_change) / 2),
+        "matched_skills": matched,
+        "missing_skills": missing,
+        "suggestions": suggestions,
+        "resume_keywords": resume_keywords[:20],
+        "job_keywords": keyword_analysis.get("job_keywords", []),
+    }
+
+
+def analysis_delta(base: dict, analysis: dict, diff: SectionDiff, mode: str) -> dict:
+    """Describe how an analysis differs from the earlier one it was compared with"""
+    def list_change(name: str) -> dict:
+        before = {_canonical(skill) for skill in base.get(name, [])}
+        after = {_canonical(skill) for skill in analysis.get(name, [])}
+        return {
+            "added": [skill for skill in analysis.get(name, []) if _canonical(skill) not in before],
+            "removed": [skill for skill in base.get(name, []) if _canonical(skill) not in after],
+        }
+
+    return {
+        "base_analysis_id": base["analysis_id"],
+        "mode": mode,
+        **diff.as_dict(),
+        "matched_skills": list_change("matched_skills"),
+        "missing_skills": list_change("missing_skills"),
+        "scores": {
+            name: {"before": base[name], "after": analysis[name], "change": round(analysis[name] - base[name], 1)}
+            for name in DELTA_SCORE_FIELDS
+        },
+    }
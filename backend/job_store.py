@@ -0,0 +1,130 @@
+"""Per-user store of job descriptions, keyed by a hash of their normalized text
+
+Saving the same job description twice keeps its first ``job_description_id``.
+Job descriptions analyzed against a resume are stored here as well, and
+analyses reference them by id instead of embedding the text, so a job
+description analyzed against many resumes is stored once. Those are only
+listed, ranked and counted against the per-user limit once the user saves
+them. Each job
+description is embedded when it is first saved (see embeddings.VectorSearch)
+so it can be ranked against resumes without an LLM call.
+
+Deleting a job description only hides it, as analyses may still reference
+its text; migrations/compact_analyses.py --prune removes hidden job
+descriptions that no analysis uses.
+"""
+import hashlib
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from pymongo import UpdateOne
+
+from analysis_cache import normalize_text
+from compression import TextCodec, unpack_text
+from embeddings import VectorSearch
+
+# Job descriptions that have not been deleted; matches documents without the field
+VISIBLE = {"deleted_at": None}
+# Visible job descriptions the user saved rather than only analyzed; those stored before the flag count as saved
+SAVED = {**VISIBLE, "saved": {"$ne": False}}
+JOB_SUMMARY_PROJECTION = {"_id": 0, "job_description_id": 1, "title": 1, "text_bytes": 1, "created_at": 1}
+JOB_PROJECTION = {"_id": 0, "job_description_id": 1, "title": 1, "text": 1}
+
+
+def job_description_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def _unpack(doc: dict) -> dict:
+    doc["text"] = unpack_text(doc["text"])
+    return doc
+
+
+class JobDescriptionStore:
+    """Job descriptions in MongoDB, scoped per user, with their embeddings"""
+
+    def __init__(self, collection, search: VectorSearch, codec: Optional[TextCodec] = None,
+                 max_entries_per_user: int = 10000):
+        self.collection = collection
+        self.search = search
+        self.codec = codec or TextCodec("none")
+        self.max_entries_per_user = max_entries_per_user
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("user_id", 1), ("sha256", 1)], unique=True)
+        await self.collection.create_index("job_description_id", unique=True)
+        await self.collection.create_index([("user_id", 1), ("created_at", -1)])
+        await self.search.ensure_indexes()
+
+    async def count(self, user_id: str) -> int:
+        """Number of saved job descriptions, which max_entries_per_user limits"""
+        return await self.collection.count_documents({"user_id": user_id, **SAVED})
+
+    def _upsert(self, user_id: str, sha256: str, job: dict, vector_fields: dict, save: bool) -> UpdateOne:
+        inserted = {
+            "job_description_id": f"jd_{uuid.uuid4().hex[:12]}",
+            "user_id": user_id,
+            "sha256": sha256,
+            "text": self.codec.pack(job["text"]),
+            "text_bytes": len(job["text"].encode()),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            # The vector only depends on the text, so an existing one is kept
+            **vector_fields,
+        }
+        update = {"$setOnInsert": inserted}
+        if save:
+            # Saving a deleted job description again restores it; analyzing it does not. Moving indexed_at
+            # forward changes the VectorSearch version, which the document count alone may not
+            update["$set"] = {"saved": True, "indexed_at": inserted.pop("indexed_at")}
+            update["$unset"] = {"deleted_at": ""}
+        else:
+            inserted["saved"] = False
+        if job.get("title"):
+            update.setdefault("$set", {})["title"] = job["title"]
+        else:
+            inserted["title"] = ""
+        return UpdateOne({"user_id": user_id, "sha256": sha256}, update, upsert=True)
+
+    async def put_many(self, user_id: str, jobs: List[dict], vectors: List[dict], save: bool = True) -> List[str]:
+        """Store ``{"title", "text"}`` jobs with their precomputed vector fields, returning their ids in order
+
+        With ``save=False`` (job descriptions that were only analyzed) new
+        entries are not listed and deleted ones stay deleted.
+        """
+        hashes = [job_description_hash(job["text"]) for job in jobs]
+        await self.collection.bulk_write(
+            [self._upsert(user_id, sha256, job, fields, save) for job, sha256, fields in zip(jobs, hashes, vectors)],
+            ordered=False,
+        )
+        ids = {}
+        async for doc in self.collection.find(
+            {"user_id": user_id, "sha256": {"$in": hashes}}, {"_id": 0, "job_description_id": 1, "sha256": 1}
+        ):
+            ids[doc["sha256"]] = doc["job_description_id"]
+        return [ids[sha256] for sha256 in hashes]
+
+    async def get(self, user_id: str, job_description_id: str) -> Optional[dict]:
+        doc = await self.collection.find_one(
+            {"user_id": user_id, "job_description_id": job_description_id, **VISIBLE}, JOB_PROJECTION
+        )
+        return _unpack(doc) if doc else None
+
+    async def get_many(self, user_id: str, job_description_ids: List[str], include_deleted: bool = False) -> dict:
+        """Return job_description_id -> job description for the given ids"""
+        query = {"user_id": user_id, "job_description_id": {"$in": job_description_ids}}
+        if not include_deleted:
+            query.update(VISIBLE)
+        cursor = self.collection.find(query, JOB_PROJECTION)
+        return {doc["job_description_id"]: _unpack(doc) async for doc in cursor}
+
+    async def list(self, user_id: str, skip: int = 0, limit: int = 100) -> list:
+        cursor = self.collection.find({"user_id": user_id, **SAVED}, JOB_SUMMARY_PROJECTION).sort("created_at", -1)
+        return await cursor.skip(skip).limit(limit).to_list(limit)
+
+    async def delete(self, user_id: str, job_description_id: str) -> bool:
+        result = await self.collection.update_one(
+            {"user_id": user_id, "job_description_id": job_description_id, **VISIBLE},
+            {"$set": {"deleted_at": datetime.now(timezone.utc)}},
+        )
+        return result.modified_count > 0
@@ -0,0 +1,204 @@
+"""Background analysis jobs with Mongo-persisted status and progress events"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from metrics import Counter, Gauge
+from workers import WORKER_ID, worker_alive
+
+JOB_QUEUE_DEPTH = Gauge("resumatch_analysis_job_queue_depth", "Analysis jobs waiting for a worker")
+JOBS_FINISHED = Counter("resumatch_analysis_jobs_total", "Analysis jobs by final status", ("status",))
+
+# Stages reported while a job runs, in order
+STAGES = ("queued", "extracting", "analyzing", "scoring", "stored")
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class JobQueueFull(Exception):
+    """The job queue has no room for another job"""
+
+
+ProgressCallback = Callable[..., Awaitable[None]]
+JobHandler = Callable[[dict, dict, ProgressCallback], Awaitable[dict]]
+PayloadCallback = Callable[[dict], None]
+
+
+class AnalysisJobQueue:
+    """Bounded in-process queue of analysis jobs processed by a fixed pool of workers
+
+    Job status is persisted in ``collection`` so polling works from any worker
+    process. The job payload (e.g. the spooled upload) lives only in memory, so
+    jobs that were queued or running when the process stopped are marked failed
+    by ``recover_interrupted``.
+
+    ``drain`` stops taking jobs and waits for the queued ones before the
+    process exits; jobs it could not finish are failed right away. ``discard``
+    is called with the payload of every job still queued when the queue
+    stops, so it can release what the payload holds.
+
+    Handlers report progress with ``progress(stage, **extra)``; pass
+    ``persist=False`` for frequent updates (such as streamed partial results)
+    that only need to reach subscribers of this process.
+    """
+
+    def __init__(self, collection, handler: JobHandler, max_queue: int = 100, workers: int = 4,
+                 discard: Optional[PayloadCallback] = None):
+        self.collection = collection
+        self.handler = handler
+        self.discard = discard
+        self.workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._tasks: list = []
+        self._accepting = True
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("job_id", unique=True)
+        await self.collection.create_index([("user_id", 1), ("created_at", -1)])
+
+    async def recover_interrupted(self, stale_seconds: int = 3600):
+        """Fail jobs left unfinished by a process that is no longer running
+
+        Jobs owned by a dead process on this host are failed immediately; jobs
+        from other hosts are failed once they have not been updated for
+        ``stale_seconds``.
+        """
+        unfinished = {"status": {"$nin": list(TERMINAL_STATUSES)}}
+        dead_workers = [
+            worker_id for worker_id in await self.collection.distinct("worker_id", unfinished)
+            if worker_id and not worker_alive(worker_id)
+        ]
+        stale_before = (datetime.now(timezone.utc) - timedelta(seconds=stale_seconds)).isoformat()
+        result = await self.collection.update_many(
+            {**unfinished, "$or": [
+                {"worker_id": {"$in": dead_workers}},
+                {"updated_at": {"$lt": stale_before}},
+            ]},
+            {"$set": {
+                "status": "failed",
+                "error": "Interrupted by server restart, please resubmit",
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }},
+        )
+        if result.modified_count:
+            logging.warning(f"Marked {result.modified_count} interrupted analysis jobs as failed")
+
+    def start(self):
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # No worker will run the jobs left in the queue
+        while not self._queue.empty():
+            _, payload = self._queue.get_nowait()
+            self._queue.task_done()
+            if self.discard is not None:
+                try:
+                    self.discard(payload)
+                except Exception as e:
+                    logging.error(f"Failed to discard a queued analysis job: {e}")
+        JOB_QUEUE_DEPTH.set(0)
+
+    async def drain(self, timeout_seconds: float):
+        """Stop taking jobs, wait up to ``timeout_seconds`` for queued and running ones, then stop"""
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout_seconds)
+        except asyncio.TimeoutError:
+            logging.warning(f"Analysis jobs still unfinished after {timeout_seconds:g}s drain")
+        await self.stop()
+        # Their payloads die with this process, so fail them now rather than at the next startup
+        result = await self.collection.update_many(
+            {"worker_id": WORKER_ID, "status": {"$nin": list(TERMINAL_STATUSES)}},
+            {"$set": {
+                "status": "failed",
+                "error": "Interrupted by server shutdown, please resubmit",
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }},
+        )
+        if result.modified_count:
+            logging.warning(f"Marked {result.modified_count} unfinished analysis jobs as failed on shutdown")
+
+    async def submit(self, user_id: str, payload: dict, **fields) -> dict:
+        """Persist a new job and queue it, raising JobQueueFull when there is no room"""
+        if not self._accepting:
+            raise JobQueueFull("The server is shutting down, please retry shortly")
+        if self._queue.full():
+            raise JobQueueFull("Too many analyses are queued, please retry shortly")
+        now = datetime.now(timezone.utc).isoformat()
+        job = {
+            "job_id": f"job_{uuid.uuid4().hex[:12]}",
+            "user_id": user_id,
+            "worker_id": WORKER_ID,
+            "status": "queued",
+            "stage": "queued",
+            "analysis_id": None,
+            "error": None,
+            **fields,
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self.collection.insert_one(dict(job))
+        try:
+            self._queue.put_nowait((job, payload))
+        except asyncio.QueueFull:
+            # Another job took the last place while this one was being stored
+            await self.collection.delete_one({"job_id": job["job_id"]})
+            raise JobQueueFull("Too many analyses are queued, please retry shortly")
+        JOB_QUEUE_DEPTH.set(self._queue.qsize())
+        return job
+
+    async def get(self, job_id: str, user_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"job_id": job_id, "user_id": user_id}, {"_id": 0})
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        events: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(events)
+        return events
+
+    def unsubscribe(self, job_id: str, events: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(events)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    def _publish(self, job_id: str, event: dict):
+        for events in self._subscribers.get(job_id, ()):
+            events.put_nowait(event)
+
+    async def _update(self, job: dict, publish_extra: Optional[dict] = None, **fields):
+        fields["updated_at"] = datetime.now(timezone.utc).isoformat()
+        job.update(fields)
+        await self.collection.update_one({"job_id": job["job_id"]}, {"$set": fields})
+        self._publish(job["job_id"], {**job, **(publish_extra or {})})
+
+    async def _worker(self):
+        while True:
+            job, payload = await self._queue.get()
+            JOB_QUEUE_DEPTH.set(self._queue.qsize())
+            try:
+                async def progress(stage: str, persist: bool = True, **extra):
+                    if persist:
+                        await self._update(job, publish_extra=extra, status="running", stage=stage)
+                    else:
+                        self._publish(job["job_id"], {**job, "status": "running", "stage": stage, **extra})
+
+                result = await self.handler(job, payload, progress)
+                await self._update(job, status="completed", stage="stored", **result)
+                JOBS_FINISHED.inc(status="completed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                detail = getattr(e, "detail", None) or str(e) or "Analysis failed"
+                logging.error(f"Analysis job {job['job_id']} failed: {detail}")
+                await self._update(job, status="failed", error=detail)
+                JOBS_FINISHED.inc(status="failed")
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,120 @@
+"""Application-lifetime LLM client
+
+httpx and emergentintegrations (which loads litellm and the provider SDKs)
+are imported on first use, so workers that never call a model start faster.
+"""
+import json
+import uuid
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+
+if TYPE_CHECKING:
+    import httpx
+
+
+def create_http_client(max_connections: int = 100, max_keepalive_connections: int = 20,
+                       keepalive_expiry: float = 30.0, timeout_seconds: float = 30.0,
+                       base_url: str = "") -> "httpx.AsyncClient":
+    """Create a pooled HTTP client meant to live as long as the application"""
+    import httpx
+
+    return httpx.AsyncClient(
+        base_url=base_url,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(timeout_seconds),
+    )
+
+
+class LLMClient:
+    """Sends single-turn prompts to the configured model
+
+    With ``base_url`` set, prompts go to an OpenAI-compatible
+    ``/chat/completions`` endpoint over one pooled keep-alive HTTP client
+    (a self-hosted gateway, or the stub in ``benchmarks/stub_upstream.py``).
+    Otherwise they go through emergentintegrations' ``LlmChat``. An LlmChat
+    accumulates conversation history, so a fresh one is built per prompt; it
+    is a thin wrapper whose HTTP connections are pooled inside litellm.
+    """
+
+    def __init__(self, api_key: str, provider: str, model: str, system_message: str,
+                 base_url: Optional[str] = None, **http_options):
+        self.api_key = api_key
+        self.provider = provider
+        self.model = model
+        self.system_message = system_message
+        self.base_url = base_url
+        self.http_options = http_options
+        self._http: Optional["httpx.AsyncClient"] = None
+
+    def start(self):
+        """Create the gateway HTTP client; done on first use unless called earlier to prewarm"""
+        if self.base_url and self._http is None:
+            self._http = create_http_client(base_url=self.base_url.rstrip("/"), **self.http_options)
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def _chat_request(self, prompt: str, stream: bool = False) -> dict:
+        body = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.system_message},
+                {"role": "user", "content": prompt},
+            ],
+        }
+        if stream:
+            body["stream"] = True
+        return body
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Send one prompt and yield the model's text response as it arrives
+
+        LlmChat has no streaming interface, so without ``base_url`` the whole
+        response is yielded as a single chunk.
+        """
+        if not self.base_url:
+            yield await self.complete(prompt)
+            return
+        
+        self.start()
+        async with self._http.stream(
+            "POST", "/chat/completions",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            json=self._chat_request(prompt, stream=True),
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+
+    async def complete(self, prompt: str) -> str:
+        """Send one prompt and return the model's text response"""
+        if self.base_url:
+            self.start()
+            response = await self._http.post(
+                "/chat/completions",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json=self._chat_request(prompt),
+            )
+            response.raise_for_status()
+            return response.json()["choices"][0]["message"]["content"]
+
+        from emergentintegrations.llm.chat import LlmChat, UserMessage
+
+        chat = LlmChat(
+            api_key=self.api_key,
+            session_id=f"analysis_{uuid.uuid4().hex[:8]}",
+            system_message=self.system_message,
+        ).with_model(self.provider, self.model)
+        return await chat.send_message(UserMessage(text=prompt))
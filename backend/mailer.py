@@ -0,0 +1,231 @@
+"""Outbound mail: a background send queue over one reusable authenticated SMTP connection
+
+smtplib is imported when the first message is sent.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    import smtplib
+    from email.message import Message
+
+from metrics import Counter, Gauge
+from workers import WORKER_ID, worker_alive
+
+MAIL_QUEUE_DEPTH = Gauge("resumatch_mail_queue_depth", "Emails waiting to be sent")
+MAIL_DELIVERIES = Counter("resumatch_mail_deliveries_total", "Email delivery attempts by result", ("result",))
+
+PENDING_STATUSES = ("queued", "retrying")
+
+
+class SMTPConnection:
+    """A lazily opened SMTP session reused across messages
+
+    All methods block and must run on the mailer's single sender thread.
+    """
+
+    def __init__(self, host: str, port: int, username: Optional[str], password: Optional[str],
+                 starttls: bool = True, timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._smtp: Optional["smtplib.SMTP"] = None
+
+    def _connect(self) -> "smtplib.SMTP":
+        import smtplib
+
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls()
+        if self.username and self.password:
+            smtp.login(self.username, self.password)
+        return smtp
+
+    def send(self, message: "Message"):
+        import smtplib
+
+        if self._smtp is None:
+            self._smtp = self._connect()
+        try:
+            self._smtp.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped the idle connection; reconnect once and resend
+            self._smtp = self._connect()
+            self._smtp.send_message(message)
+
+    def close(self):
+        import smtplib
+
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+            self._smtp = None
+
+
+class Mailer:
+    """Sends emails for documents in ``collection`` and records their delivery status
+
+    Documents are persisted by the caller with ``delivery_status: "queued"`` and
+    then passed to ``enqueue``. A background task builds each message with
+    ``build_message(doc)``, sends it over a reused SMTP connection and retries
+    failures with exponential backoff, updating ``delivery_status`` to
+    ``retrying``, ``sent`` or ``failed``.
+
+    Documents carry the ``worker_id`` of the process that queued them. At
+    startup each worker takes over pending documents whose owner is no longer
+    running, so with several workers an email is not sent once per worker.
+    """
+
+    def __init__(self, collection, id_field: str, build_message: Callable[[dict], "Message"],
+                 connection: Optional[SMTPConnection], max_attempts: int = 5,
+                 retry_base_seconds: float = 2.0, idle_timeout_seconds: float = 60.0):
+        self.collection = collection
+        self.id_field = id_field
+        self.build_message = build_message
+        self.connection = connection
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mailer")
+        self._task: Optional[asyncio.Task] = None
+        self._retry_tasks: set = set()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for task in list(self._retry_tasks):
+            task.cancel()
+        if self.connection is not None:
+            await asyncio.get_running_loop().run_in_executor(self._thread, self.connection.close)
+        self._thread.shutdown(wait=False)
+
+    async def drain(self, timeout_seconds: float):
+        """Wait up to ``timeout_seconds`` for queued emails to be sent; retries still waiting are left to requeue_pending"""
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout_seconds)
+        except asyncio.TimeoutError:
+            logging.warning(f"{self._queue.qsize()} emails still queued after {timeout_seconds:g}s drain")
+
+    async def requeue_pending(self, stale_seconds: int = 3600):
+        """Take over and re-enqueue pending documents whose worker stopped before delivering them
+
+        Documents owned by a dead process on this host are taken over at once;
+        those from other hosts once they are ``stale_seconds`` old.
+        """
+        stale_before = (datetime.now(timezone.utc) - timedelta(seconds=stale_seconds)).isoformat()
+        count = 0
+        async for doc in self.collection.find({"delivery_status": {"$in": list(PENDING_STATUSES)}}, {"_id": 0}):
+            owner = doc.get("worker_id")
+            if owner and worker_alive(owner) and doc.get("created_at", "") >= stale_before:
+                continue
+            # Conditional on the previous owner, so only one starting worker takes each document
+            claimed = await self.collection.update_one(
+                {
+                    self.id_field: doc[self.id_field],
+                    "delivery_status": {"$in": list(PENDING_STATUSES)},
+                    "worker_id": owner,
+                },
+                {"$set": {"worker_id": WORKER_ID}},
+            )
+            if claimed.modified_count:
+                doc["worker_id"] = WORKER_ID
+                self.enqueue(doc)
+                count += 1
+        if count:
+            logging.info(f"Re-queued {count} pending emails")
+
+    def enqueue(self, doc: dict):
+        self._queue.put_nowait(doc)
+        MAIL_QUEUE_DEPTH.set(self._queue.qsize())
+
+    async def _set_status(self, doc: dict, status: str, **fields):
+        await self.collection.update_one(
+            {self.id_field: doc[self.id_field]},
+            {"$set": {"delivery_status": status, **fields}},
+        )
+
+    def _schedule_retry(self, doc: dict, delay: float):
+        async def retry_later():
+            await asyncio.sleep(delay)
+            self.enqueue(doc)
+
+        task = asyncio.create_task(retry_later())
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+    async def _deliver(self, doc: dict):
+        import smtplib
+
+        loop = asyncio.get_running_loop()
+        attempts = doc.get("delivery_attempts", 0) + 1
+        doc["delivery_attempts"] = attempts
+        if self.connection is None:
+            await self._set_status(doc, "failed", delivery_attempts=attempts, delivery_error="Email configuration missing")
+            MAIL_DELIVERIES.inc(result="failed")
+            logging.error("Email configuration missing, contact email not sent")
+            return
+        try:
+            message = self.build_message(doc)
+            await loop.run_in_executor(self._thread, self.connection.send, message)
+        except (smtplib.SMTPException, OSError) as e:
+            await loop.run_in_executor(self._thread, self.connection.close)
+            if attempts >= self.max_attempts:
+                await self._set_status(doc, "failed", delivery_attempts=attempts, delivery_error=str(e))
+                MAIL_DELIVERIES.inc(result="failed")
+                logging.error(f"Email sending error: {e}; giving up after {attempts} attempts")
+                return
+            delay = self.retry_base_seconds * 2 ** (attempts - 1)
+            await self._set_status(doc, "retrying", delivery_attempts=attempts, delivery_error=str(e))
+            MAIL_DELIVERIES.inc(result="retry")
+            logging.warning(f"Email sending error: {e}; retrying in {delay:g}s")
+            self._schedule_retry(doc, delay)
+            return
+        await self._set_status(
+            doc, "sent", delivery_attempts=attempts, delivery_error=None,
+            delivered_at=datetime.now(timezone.utc).isoformat(),
+        )
+        MAIL_DELIVERIES.inc(result="sent")
+        logging.info(f"Email sent successfully to {doc.get('email')}")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                doc = await asyncio.wait_for(self._queue.get(), timeout=self.idle_timeout_seconds)
+            except asyncio.TimeoutError:
+                # Release the SMTP session while idle; it reopens on the next message
+                if self.connection is not None:
+                    await loop.run_in_executor(self._thread, self.connection.close)
+                continue
+            MAIL_QUEUE_DEPTH.set(self._queue.qsize())
+            try:
+                await self._deliver(doc)
+            except Exception as e:
+                # Not an SMTP error (a message that cannot be built, say), so retrying would not help
+                logging.error(f"Email delivery error: {e}")
+                try:
+                    await self._set_status(
+                        doc, "failed", delivery_attempts=doc.get("delivery_attempts", 0),
+                        delivery_error=f"{type(e).__name__}: {e}",
+                    )
+                    MAIL_DELIVERIES.inc(result="failed")
+                except Exception as update_error:
+                    logging.error(f"Could not record email delivery failure: {update_error}")
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,248 @@
+"""Deterministic local skill and keyword matching between a resume and a job description
+
+Produces the skill/keyword fields of an analysis in milliseconds without an
+LLM call. Skills are recognised through a synonym dictionary (so "React.js",
+"ReactJS" and "React" are the same skill) and keywords are scored against an
+inverted index of the job description.
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+# Canonical skill name -> aliases (lowercase, as produced by tokenize)
+SKILL_SYNONYMS: Dict[str, List[str]] = {
+    "Python": ["python", "python3"],
+    "Java": ["java"],
+    "JavaScript": ["javascript", "js", "es6", "ecmascript"],
+    "TypeScript": ["typescript", "ts"],
+    "Go": ["golang"],
+    "Rust": ["rust"],
+    "C++": ["c++", "cpp"],
+    "C#": ["c#", "csharp"],
+    ".NET": [".net", "dotnet", "asp.net"],
+    "Ruby": ["ruby"],
+    "Ruby on Rails": ["rails", "ruby on rails", "ror"],
+    "PHP": ["php"],
+    "Kotlin": ["kotlin"],
+    "Swift": ["swift"],
+    "Scala": ["scala"],
+    "R": ["r programming", "rstats"],
+    "SQL": ["sql"],
+    "React": ["react", "react.js", "reactjs"],
+    "React Native": ["react native"],
+    "Angular": ["angular", "angularjs", "angular.js"],
+    "Vue.js": ["vue", "vue.js", "vuejs"],
+    "Next.js": ["next.js", "nextjs"],
+    "Node.js": ["node", "node.js", "nodejs"],
+    "Express": ["express.js", "expressjs"],
+    "Django": ["django"],
+    "Flask": ["flask"],
+    "FastAPI": ["fastapi"],
+    "Spring": ["spring", "spring boot", "springboot"],
+    "HTML": ["html", "html5"],
+    "CSS": ["css", "css3"],
+    "Tailwind CSS": ["tailwind", "tailwindcss", "tailwind css"],
+    "GraphQL": ["graphql"],
+    "REST APIs": ["restful", "rest api", "rest apis", "restful apis"],
+    "gRPC": ["grpc"],
+    "MongoDB": ["mongodb", "mongo"],
+    "PostgreSQL": ["postgresql", "postgres", "psql"],
+    "MySQL": ["mysql"],
+    "Redis": ["redis"],
+    "Elasticsearch": ["elasticsearch", "elastic search"],
+    "Kafka": ["kafka", "apache kafka"],
+    "RabbitMQ": ["rabbitmq"],
+    "AWS": ["aws", "amazon web services"],
+    "Azure": ["azure", "microsoft azure"],
+    "GCP": ["gcp", "google cloud", "google cloud platform"],
+    "Docker": ["docker", "containers", "containerization"],
+    "Kubernetes": ["kubernetes", "k8s"],
+    "Terraform": ["terraform"],
+    "Ansible": ["ansible"],
+    "CI/CD": ["ci/cd", "ci cd", "cicd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "Jenkins": ["jenkins"],
+    "GitHub Actions": ["github actions"],
+    "Git": ["git"],
+    "Linux": ["linux", "unix"],
+    "Microservices": ["microservices", "microservice"],
+    "Machine Learning": ["machine learning", "ml"],
+    "Deep Learning": ["deep learning"],
+    "NLP": ["nlp", "natural language processing"],
+    "TensorFlow": ["tensorflow"],
+    "PyTorch": ["pytorch"],
+    "scikit-learn": ["scikit-learn", "sklearn"],
+    "Pandas": ["pandas"],
+    "NumPy": ["numpy"],
+    "Spark": ["spark", "apache spark", "pyspark"],
+    "Airflow": ["airflow", "apache airflow"],
+    "Data Analysis": ["data analysis", "data analytics"],
+    "Tableau": ["tableau"],
+    "Power BI": ["power bi", "powerbi"],
+    "Excel": ["excel"],
+    "Agile": ["agile", "scrum", "kanban"],
+    "Unit Testing": ["unit testing", "unit tests", "pytest", "jest", "junit"],
+    "Figma": ["figma"],
+    "Project Management": ["project management"],
+    "Leadership": ["leadership", "team lead", "mentoring"],
+    "Communication": ["communication", "communication skills"],
+}
+
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could did do does
+for from had has have having he her his how i if in into is it its itself just may me more most my
+no nor not of off on once only or other our out over own per same she should so some such than that
+the their them then there these they this those through to too under until up very was we were what
+when where which while who whom why will with within would you your yours
+ability able experience years year work working team strong skills skill knowledge including
+required requirements preferred plus responsibilities role candidate looking join using use new need needs
+""".split())
+
+MAX_SKILL_WORDS = 3
+_TOKEN_RE = re.compile(r"\.?[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|\.?[a-z0-9]")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase text and split it into tokens, keeping forms like c++, c#, .net and ci/cd"""
+    return [token.rstrip(".") for token in _TOKEN_RE.findall(text.lower())]
+
+
+def _build_alias_index() -> Dict[Tuple[str, ...], str]:
+    index = {}
+    for skill, aliases in SKILL_SYNONYMS.items():
+        for alias in aliases:
+            index[tuple(tokenize(alias))] = skill
+    return index
+
+
+ALIAS_INDEX = _build_alias_index()
+
+
+def find_skills(tokens: List[str]) -> Dict[str, int]:
+    """Count canonical skills mentioned in a token stream, preferring the longest alias"""
+    found: Counter = Counter()
+    position = 0
+    while position < len(tokens):
+        for length in range(MAX_SKILL_WORDS, 0, -1):
+            skill = ALIAS_INDEX.get(tuple(tokens[position:position + length]))
+            if skill:
+                found[skill] += 1
+                position += length
+                break
+        else:
+            position += 1
+    return dict(found)
+
+
+@dataclass
+class JobIndex:
+    """Inverted index over a job description: term -> token positions"""
+    postings: Dict[str, List[int]]
+    skills: Dict[str, int]
+    keywords: List[str] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, job_description: str, max_keywords: int = 30) -> "JobIndex":
+        tokens = tokenize(job_description)
+        postings: Dict[str, List[int]] = {}
+        for position, token in enumerate(tokens):
+            if token not in STOPWORDS and len(token) > 1 and not token.isdigit():
+                postings.setdefault(token, []).append(position)
+        skill_terms = {term for alias in ALIAS_INDEX for term in alias}
+        ranked = sorted(
+            (term for term in postings if term not in skill_terms),
+            key=lambda term: (-len(postings[term]), postings[term][0]),
+        )
+        return cls(postings=postings, skills=find_skills(tokens), keywords=ranked[:max_keywords])
+
+    def term_weight(self, term: str) -> int:
+        return len(self.postings.get(term, ()))
+
+
+@dataclass
+class LocalMatch:
+    """Skill and keyword match computed locally"""
+    matched_skills: List[str]
+    missing_skills: List[str]
+    skill_match_score: float
+    keyword_score: float
+    resume_keywords: List[str]
+    job_keywords: List[str]
+
+    def as_analysis_fields(self) -> dict:
+        """Return the fields in the shape analyze_resume_with_ai produces"""
+        return {
+            "matched_skills": self.matched_skills,
+            "missing_skills": self.missing_skills,
+            "skill_match_score": self.skill_match_score,
+            "keyword_score": self.keyword_score,
+            "resume_keywords": self.resume_keywords,
+            "job_keywords": self.job_keywords,
+        }
+
+
+def match(resume_text: str, job_description: str, job_index: JobIndex = None) -> LocalMatch:
+    """Match a resume against a job description"""
+    job_index = job_index or JobIndex.build(job_description)
+    resume_tokens = tokenize(resume_text)
+    resume_terms: Set[str] = set(resume_tokens)
+    resume_skills = find_skills(resume_tokens)
+
+    # Order skills by how often the job description mentions them
+    required = sorted(job_index.skills, key=lambda skill: -job_index.skills[skill])
+    matched = [skill for skill in required if skill in resume_skills]
+    missing = [skill for skill in required if skill not in resume_skills]
+    skill_score = 100.0 * len(matched) / len(required) if required else 0.0
+
+    total_weight = sum(job_index.term_weight(term) for term in job_index.keywords)
+    found_weight = sum(job_index.term_weight(term) for term in job_index.keywords if term in resume_terms)
+    keyword_score = 100.0 * found_weight / total_weight if total_weight else 0.0
+
+    resume_counts = Counter(token for token in resume_tokens if token in job_index.postings)
+    return LocalMatch(
+        matched_skills=matched,
+        missing_skills=missing,
+        skill_match_score=round(skill_score, 1),
+        keyword_score=round(keyword_score, 1),
+        resume_keywords=[term for term, _ in resume_counts.most_common(20)],
+        job_keywords=list(job_index.keywords[:20]),
+    )
+
+
+def prefilter_resume(resume_text: str, job_index: JobIndex, heading_words: int = 6) -> str:
+    """Drop resume lines that share no terms or skills with the job description
+
+    Short lines are kept as they are usually headings, titles or dates that
+    give the model context for the lines around them.
+    """
+    kept = []
+    for line in resume_text.splitlines():
+        tokens = tokenize(line)
+        if (
+            len(tokens) <= heading_words
+            or any(token in job_index.postings for token in tokens)
+            or find_skills(tokens)
+        ):
+            kept.append(line)
+    return "\n".join(kept)
+
+
+def local_analysis(resume_text: str, job_description: str) -> dict:
+    """Build a complete analysis from the local match, used when no model answers in time"""
+    result = match(resume_text, job_description)
+    suggestions = [f"Add evidence of {skill} experience if you have it" for skill in result.missing_skills[:3]]
+    missing_keywords = [term for term in result.job_keywords if term not in result.resume_keywords]
+    if missing_keywords:
+        suggestions.append(f"Work these job description terms into your resume: {', '.join(missing_keywords[:5])}")
+    suggestions.append("Quantify achievements with concrete numbers and outcomes")
+    return {
+        "matched_skills": result.matched_skills,
+        "missing_skills": result.missing_skills,
+        "experience_relevance": "Estimated from keyword overlap; a detailed AI review was not available for this analysis.",
+        "skill_match_score": result.skill_match_score,
+        "experience_score": result.keyword_score,
+        "ats_score": round((result.skill_match_score + result.keyword_score) / 2, 1),
+        "suggestions": suggestions,
+        "resume_keywords": result.resume_keywords,
+        "job_keywords": result.job_keywords,
+    }
@@ -0,0 +1,149 @@
+"""Move job description text out of stored analyses and compress long stored text
+
+Analyses written before job descriptions were stored once per user embed the
+full ``job_description``. This stores each distinct job description in the
+``job_descriptions`` collection, replaces the text with its
+``job_description_id`` and, with ``--compress``, rewrites long resume and job
+description text with the configured codec. ``--prune`` removes deleted job
+descriptions that no analysis references. Safe to re-run; every step only
+touches documents still in the old layout.
+
+Usage (from the backend directory, with the API's .env or environment):
+
+    python -m migrations.compact_analyses --dry-run
+    python -m migrations.compact_analyses --compress --prune
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from compression import TextCodec
+from embeddings import HashedEmbedder, VectorSearch
+from job_store import JobDescriptionStore, job_description_hash
+
+LEGACY_ANALYSES = {"job_description": {"$type": "string"}}
+
+
+async def migrate_analyses(db, job_store: JobDescriptionStore, batch_size: int, dry_run: bool) -> dict:
+    """Reference job descriptions by id in analyses that still embed their text"""
+    stats = {"analyses": 0, "job_descriptions": 0, "bytes_removed": 0}
+    if dry_run:
+        distinct = set()
+        async for doc in db.analyses.find(LEGACY_ANALYSES, {"_id": 0, "user_id": 1, "job_description": 1}):
+            stats["analyses"] += 1
+            stats["bytes_removed"] += len(doc["job_description"].encode())
+            distinct.add((doc["user_id"], job_description_hash(doc["job_description"])))
+        stats["job_descriptions"] = len(distinct)
+        return stats
+
+    job_description_ids = set()
+    while True:
+        batch = await db.analyses.find(
+            LEGACY_ANALYSES, {"_id": 1, "user_id": 1, "job_description": 1}
+        ).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        by_user = defaultdict(dict)
+        for doc in batch:
+            by_user[doc["user_id"]].setdefault(doc["job_description"], None)
+        stats["analyses"] += len(batch)
+        stats["bytes_removed"] += sum(len(doc["job_description"].encode()) for doc in batch)
+        for user_id, texts in by_user.items():
+            ordered = list(texts)
+            vectors = [job_store.search.vector_fields(text) for text in ordered]
+            ids = await job_store.put_many(user_id, [{"text": text} for text in ordered], vectors, save=False)
+            texts.update(zip(ordered, ids))
+            job_description_ids.update(ids)
+        await db.analyses.bulk_write([
+            UpdateOne(
+                {"_id": doc["_id"]},
+                {
+                    "$set": {"job_description_id": by_user[doc["user_id"]][doc["job_description"]]},
+                    "$unset": {"job_description": ""},
+                },
+            )
+            for doc in batch
+        ], ordered=False)
+    stats["job_descriptions"] = len(job_description_ids)
+    return stats
+
+
+async def compress_text(collection, codec: TextCodec, batch_size: int, dry_run: bool) -> dict:
+    """Rewrite uncompressed ``text`` fields that are long enough to compress"""
+    stats = {"documents": 0, "bytes_before": 0, "bytes_after": 0}
+    updates = []
+    async for doc in collection.find({"text": {"$type": "string"}}, {"_id": 1, "text": 1}):
+        packed = codec.pack(doc["text"])
+        if isinstance(packed, str):
+            continue
+        stats["documents"] += 1
+        stats["bytes_before"] += len(doc["text"].encode())
+        stats["bytes_after"] += len(packed)
+        updates.append(UpdateOne({"_id": doc["_id"], "text": doc["text"]}, {"$set": {"text": packed}}))
+        if len(updates) >= batch_size and not dry_run:
+            await collection.bulk_write(updates, ordered=False)
+            updates = []
+    if updates and not dry_run:
+        await collection.bulk_write(updates, ordered=False)
+    return stats
+
+
+async def prune_job_descriptions(db, dry_run: bool) -> int:
+    """Delete hidden job descriptions that no analysis references"""
+    candidates = await db.job_descriptions.distinct("job_description_id", {"deleted_at": {"$ne": None}})
+    if not candidates:
+        return 0
+    referenced = set(await db.analyses.distinct("job_description_id", {"job_description_id": {"$in": candidates}}))
+    unused = [job_description_id for job_description_id in candidates if job_description_id not in referenced]
+    if unused and not dry_run:
+        await db.job_descriptions.delete_many({"job_description_id": {"$in": unused}})
+    return len(unused)
+
+
+async def run(args) -> dict:
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    db = client[os.environ["DB_NAME"]]
+    # Same settings as the API, so migrated documents match what it writes
+    codec = TextCodec(
+        os.environ.get("TEXT_COMPRESSION", "zlib"),
+        threshold=int(os.environ.get("TEXT_COMPRESSION_MIN_BYTES", 1024)),
+    )
+    embedder = HashedEmbedder(int(os.environ.get("EMBEDDING_DIMENSIONS", 512)))
+    job_store = JobDescriptionStore(
+        db.job_descriptions, VectorSearch(db.job_descriptions, "job_description_id", embedder), codec=codec
+    )
+
+    started = time.perf_counter()
+    result = {"dry_run": args.dry_run}
+    result["analyses"] = await migrate_analyses(db, job_store, args.batch_size, args.dry_run)
+    if args.compress:
+        result["resumes"] = await compress_text(db.resumes, codec, args.batch_size, args.dry_run)
+        result["job_descriptions"] = await compress_text(db.job_descriptions, codec, args.batch_size, args.dry_run)
+    if args.prune:
+        result["pruned_job_descriptions"] = await prune_job_descriptions(db, args.dry_run)
+    result["seconds"] = round(time.perf_counter() - started, 2)
+    client.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--compress", action="store_true", help="compress long resume and job description text")
+    parser.add_argument("--prune", action="store_true", help="delete unreferenced deleted job descriptions")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+    load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
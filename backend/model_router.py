@@ -0,0 +1,224 @@
+"""Route analysis prompts across models with latency budgets, hedging and circuit breaking"""
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from llm import LLMClient
+from metrics import Counter
+
+MODEL_ATTEMPTS = Counter("resumatch_llm_attempts_total", "LLM attempts by model and result", ("model", "result"))
+ROUTER_FALLBACKS = Counter("resumatch_llm_fallbacks_total", "Analyses served by the local scorer", ("reason",))
+
+
+class InvalidModelResponse(ValueError):
+    """The model replied, but not with a usable analysis"""
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and half-opens after ``reset_seconds``"""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release_trial(self):
+        """Give back a half-open trial whose attempt was cancelled before it finished"""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+class LatencyWindow:
+    """Recent successful latencies of one model"""
+
+    def __init__(self, size: int = 200):
+        self.samples: deque = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self.samples) < 20:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+@dataclass
+class ModelRoute:
+    client: LLMClient
+    breaker: CircuitBreaker
+    latencies: LatencyWindow = field(default_factory=LatencyWindow)
+
+    @property
+    def name(self) -> str:
+        return f"{self.client.provider}:{self.client.model}"
+
+
+class ModelRouter:
+    """Sends a prompt to the first healthy model and hedges slow attempts
+
+    If an attempt has not produced a valid result after the hedge delay (the
+    model's recent p95 latency, or ``hedge_delay_seconds`` until enough samples
+    exist) another attempt is fired at the next healthy model in the list (the
+    same model when only one is configured). The first valid result wins and
+    the others are cancelled. Failed attempts trip that model's circuit
+    breaker. When the latency budget expires or every attempt fails,
+    ``fallback()`` supplies the result.
+    """
+
+    def __init__(self, clients: List[LLMClient], budget_seconds: float = 45.0,
+                 hedge_delay_seconds: float = 15.0, min_hedge_delay_seconds: float = 2.0,
+                 max_attempts: int = 2, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.routes = [ModelRoute(client, CircuitBreaker(failure_threshold, reset_seconds)) for client in clients]
+        self.budget_seconds = budget_seconds
+        self.hedge_delay_seconds = hedge_delay_seconds
+        self.min_hedge_delay_seconds = min_hedge_delay_seconds
+        self.max_attempts = max_attempts
+
+    def start(self):
+        for route in self.routes:
+            route.client.start()
+
+    async def close(self):
+        for route in self.routes:
+            await route.client.close()
+
+    def _hedge_delay(self, route: ModelRoute) -> float:
+        p95 = route.latencies.percentile(95)
+        delay = p95 if p95 is not None else self.hedge_delay_seconds
+        return max(delay, self.min_hedge_delay_seconds)
+
+    def _next_route(self, start: int) -> Optional[int]:
+        for offset in range(len(self.routes)):
+            index = (start + offset) % len(self.routes)
+            if self.routes[index].breaker.allow():
+                return index
+        return None
+
+    async def _attempt(self, route: ModelRoute, request: Callable[[LLMClient, dict], Awaitable[Any]], record: dict):
+        started = time.perf_counter()
+        try:
+            result = await request(route.client, record)
+        except asyncio.CancelledError:
+            record.update(result="cancelled", latency_ms=round((time.perf_counter() - started) * 1000, 1))
+            MODEL_ATTEMPTS.inc(model=route.name, result="cancelled")
+            raise
+        except Exception as e:
+            outcome = "invalid" if isinstance(e, InvalidModelResponse) else "error"
+            record.update(result=outcome, error=str(e)[:200], latency_ms=round((time.perf_counter() - started) * 1000, 1))
+            MODEL_ATTEMPTS.inc(model=route.name, result=outcome)
+            route.breaker.record_failure()
+            raise
+        elapsed = time.perf_counter() - started
+        record.update(result="ok", latency_ms=round(elapsed * 1000, 1))
+        MODEL_ATTEMPTS.inc(model=route.name, result="ok")
+        route.latencies.add(elapsed)
+        route.breaker.record_success()
+        return result
+
+    async def run(self, request: Callable[[LLMClient, dict], Awaitable[Any]], fallback: Callable[[], Any],
+                  budget_seconds: Optional[float] = None):
+        """Return ``(result, routing)`` where routing records every attempt and how the result was chosen
+
+        ``request(client, record)`` performs one attempt against a model and
+        returns its result, raising ``InvalidModelResponse`` for unusable
+        output. It may add details about the attempt to ``record``.
+        """
+        budget = budget_seconds or self.budget_seconds
+        started = time.monotonic()
+        deadline = started + budget
+        routing: Dict[str, Any] = {"budget_ms": round(budget * 1000), "attempts": [], "hedged": False, "fallback": None}
+        pending: Dict[asyncio.Task, int] = {}
+        # Attempts holding their route's half-open trial, which must be released if they are cancelled
+        trials: set = set()
+        next_start = 0
+
+        def launch() -> bool:
+            nonlocal next_start
+            if len(routing["attempts"]) >= self.max_attempts:
+                return False
+            index = self._next_route(next_start)
+            if index is None:
+                return False
+            next_start = index + 1
+            route = self.routes[index]
+            record = {"model": route.name, "started_ms": round((time.monotonic() - started) * 1000, 1)}
+            routing["attempts"].append(record)
+            task = asyncio.create_task(self._attempt(route, request, record))
+            pending[task] = index
+            if route.breaker.state == "half-open":
+                trials.add(task)
+            return True
+
+        try:
+            if not launch():
+                routing["fallback"] = "circuit_open"
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    routing["fallback"] = "budget_expired"
+                    break
+                can_hedge = len(routing["attempts"]) < self.max_attempts
+                timeout = remaining
+                if can_hedge:
+                    timeout = min(remaining, min(self._hedge_delay(self.routes[i]) for i in pending.values()))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if can_hedge and timeout < remaining and launch():
+                        routing["hedged"] = True
+                    continue
+                for task in done:
+                    index = pending.pop(task)
+                    if task.exception() is None:
+                        routing["model"] = self.routes[index].name
+                        return task.result(), routing
+                # Move on to the next model straight away instead of waiting for a hedge
+                if not launch() and not pending:
+                    routing["fallback"] = "all_attempts_failed"
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for task, index in pending.items():
+                if task in trials and task.cancelled():
+                    self.routes[index].breaker.release_trial()
+            for record in routing["attempts"]:
+                record.setdefault("result", "cancelled")
+
+        ROUTER_FALLBACKS.inc(reason=routing["fallback"])
+        logging.warning(f"AI analysis fell back to the local scorer: {routing['fallback']}")
+        routing["model"] = "local"
+        return fallback(), routing
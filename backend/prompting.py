@@ -0,0 +1,169 @@
+"""Prompt compaction: normalize, de-duplicate and budget resume/job text before the LLM call"""
+import math
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+# Section name -> heading phrases that start it
+SECTION_HEADINGS = {
+    "summary": ("summary", "professional summary", "profile", "about me", "objective", "career objective"),
+    "skills": ("skills", "technical skills", "core skills", "key skills", "core competencies", "technologies", "tech stack"),
+    "experience": ("experience", "work experience", "professional experience", "employment", "employment history", "work history"),
+    "projects": ("projects", "personal projects", "key projects"),
+    "education": ("education", "academic background", "qualifications"),
+    "certifications": ("certifications", "certificates", "licenses", "courses"),
+    "awards": ("awards", "honors", "achievements", "accomplishments"),
+    "publications": ("publications",),
+    "languages": ("languages",),
+    "interests": ("interests", "hobbies", "activities"),
+    "references": ("references",),
+}
+
+# Sections kept first when the budget is tight; unlisted sections come last
+SECTION_PRIORITY = (
+    "skills", "experience", "header", "summary", "projects", "certifications",
+    "education", "awards", "publications", "languages", "other", "interests", "references",
+)
+
+DEDUPE_MIN_CHARS = 25
+
+_HEADING_LOOKUP = {phrase: name for name, phrases in SECTION_HEADINGS.items() for phrase in phrases}
+_INLINE_WHITESPACE_RE = re.compile(r"[ \t\u00a0\u2000-\u200b]+")
+_HEADING_STRIP_RE = re.compile(r"[^a-z ]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about four characters per token for English text)"""
+    return math.ceil(len(text) / 4)
+
+
+def normalize_lines(text: str) -> List[str]:
+    """Collapse runs of whitespace, drop repeated lines and squeeze blank lines
+
+    Only lines of at least ``DEDUPE_MIN_CHARS`` are de-duplicated, so short
+    repeated lines such as job titles and dates keep their place.
+    """
+    lines: List[str] = []
+    seen = set()
+    for raw_line in text.splitlines():
+        line = _INLINE_WHITESPACE_RE.sub(" ", raw_line).strip()
+        if not line:
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+        if len(line) >= DEDUPE_MIN_CHARS:
+            key = line.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def _section_for_heading(line: str) -> Optional[str]:
+    if len(line) > 40:
+        return None
+    phrase = _HEADING_STRIP_RE.sub("", line.lower()).strip()
+    return _HEADING_LOOKUP.get(phrase)
+
+
+@dataclass
+class Section:
+    name: str
+    lines: List[str]
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+
+def segment_resume(lines: List[str]) -> List[Section]:
+    """Split resume lines into sections at recognised headings; text before the first heading is the header"""
+    sections = [Section("header", [])]
+    for line in lines:
+        name = _section_for_heading(line)
+        if name:
+            sections.append(Section(name, [line]))
+        else:
+            sections[-1].lines.append(line)
+    return [section for section in sections if any(section.lines)]
+
+
+def _cut_line(line: str, token_budget: int) -> str:
+    """The start of ``line`` that fits ``token_budget`` tokens, cut at a word boundary where there is one"""
+    max_chars = max(token_budget, 0) * 4
+    if len(line) <= max_chars:
+        return line
+    cut = line[:max_chars + 1].rsplit(" ", 1)[0] if " " in line[:max_chars + 1] else ""
+    return (cut or line[:max_chars]).rstrip()
+
+
+def _truncate_lines(lines: List[str], token_budget: int) -> List[str]:
+    """Keep lines within the budget; the first line that does not fit is cut to fill what is left"""
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            # A single long line (a job description or paragraph with no line breaks) is cut, not dropped
+            cut = _cut_line(line, token_budget - used - 1)
+            if cut:
+                kept.append(cut)
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+def fit_sections(sections: List[Section], token_budget: int) -> List[Section]:
+    """Keep sections by priority within the budget, truncating the first that does not fit
+
+    Sections are returned in their original document order.
+    """
+    def priority(index_section: Tuple[int, Section]) -> int:
+        name = index_section[1].name
+        return SECTION_PRIORITY.index(name) if name in SECTION_PRIORITY else SECTION_PRIORITY.index("other")
+
+    remaining = token_budget
+    kept = {}
+    for index, section in sorted(enumerate(sections), key=priority):
+        cost = estimate_tokens(section.text) + 1
+        if cost <= remaining:
+            kept[index] = section
+            remaining -= cost
+        elif remaining > 0:
+            lines = _truncate_lines(section.lines, remaining)
+            if lines:
+                kept[index] = Section(section.name, lines)
+                remaining -= estimate_tokens("\n".join(lines)) + 1
+    return [kept[index] for index in sorted(kept)]
+
+
+@dataclass
+class CompactPrompt:
+    """Compacted prompt inputs and the token counts before and after"""
+    resume_text: str
+    job_description: str
+    original_tokens: int
+    compacted_tokens: int
+    sections: List[str]
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.compacted_tokens
+
+
+def compact_prompt_inputs(resume_text: str, job_description: str,
+                          resume_token_budget: int = 3000, job_token_budget: int = 1500) -> CompactPrompt:
+    """Normalize and budget the resume and job description that go into the analysis prompt"""
+    sections = fit_sections(segment_resume(normalize_lines(resume_text)), resume_token_budget)
+    compact_resume = "\n".join(section.text for section in sections)
+    compact_job = "\n".join(_truncate_lines(normalize_lines(job_description), job_token_budget))
+    return CompactPrompt(
+        resume_text=compact_resume,
+        job_description=compact_job,
+        original_tokens=estimate_tokens(resume_text) + estimate_tokens(job_description),
+        compacted_tokens=estimate_tokens(compact_resume) + estimate_tokens(compact_job),
+        sections=[section.name for section in sections],
+    )
@@ -0,0 +1,184 @@
+"""Per-user store of extracted resume text keyed by the SHA-256 of the uploaded file
+
+Re-uploading a file the user has uploaded before skips extraction, and stored
+resumes can be analyzed again by ``resume_id`` without uploading them at all.
+Each user keeps at most ``max_entries_per_user`` resumes and
+``max_bytes_per_user`` bytes of text; the least recently used are evicted
+first, and a TTL index drops resumes unused for ``ttl_seconds``. Long text is
+compressed with ``codec``. With a ``search`` index, resumes are embedded as
+they are stored so they can be ranked against job descriptions.
+"""
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from compression import TextCodec, unpack_text
+from embeddings import VectorSearch
+from extraction import ExtractionResult
+from metrics import Counter
+
+RESUME_STORE_LOOKUPS = Counter("resumatch_resume_store_lookups_total", "Resume text store lookups by result", ("result",))
+RESUME_STORE_EVICTIONS = Counter("resumatch_resume_store_evictions_total", "Stored resumes evicted to stay within limits")
+
+RESUME_SUMMARY_PROJECTION = {
+    "_id": 0, "resume_id": 1, "filename": 1, "size": 1, "text_bytes": 1,
+    "pages_read": 1, "total_pages": 1, "truncated": 1, "created_at": 1, "last_used_at": 1,
+}
+
+
+@dataclass
+class StoredResume:
+    """Extracted text of a resume and where it came from"""
+    resume_id: Optional[str]
+    filename: str
+    extraction: ExtractionResult
+    source: str  # "extracted", "store" (same file uploaded again) or "reused" (by resume_id)
+
+
+def _extraction_from_doc(doc: dict) -> ExtractionResult:
+    return ExtractionResult(
+        text=unpack_text(doc["text"]),
+        pages_read=doc.get("pages_read", 0),
+        total_pages=doc.get("total_pages", 0),
+        truncated=doc.get("truncated", False),
+    )
+
+
+class ResumeStore:
+    """Extracted resume text in MongoDB, scoped per user
+
+    ``variant`` identifies the extraction settings; text extracted with other
+    settings is treated as a miss and replaced.
+    """
+
+    def __init__(self, collection, variant: str, max_entries_per_user: int = 20,
+                 max_bytes_per_user: int = 2 * 1024 * 1024, ttl_seconds: int = 90 * 24 * 60 * 60,
+                 search: Optional[VectorSearch] = None, codec: Optional[TextCodec] = None):
+        self.collection = collection
+        self.codec = codec or TextCodec("none")
+        self.search = search
+        self.variant = variant
+        self.max_entries_per_user = max_entries_per_user
+        self.max_bytes_per_user = max_bytes_per_user
+        self.ttl_seconds = ttl_seconds
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("user_id", 1), ("sha256", 1)], unique=True)
+        await self.collection.create_index("resume_id", unique=True)
+        await self.collection.create_index([("user_id", 1), ("last_used_at", -1)])
+        # TTL indexes only act on BSON dates, not ISO strings
+        await self.collection.create_index("last_used_at", expireAfterSeconds=self.ttl_seconds)
+        if self.search is not None:
+            await self.search.ensure_indexes()
+
+    async def _touch(self, query: dict) -> Optional[dict]:
+        return await self.collection.find_one_and_update(
+            query,
+            {"$set": {"last_used_at": datetime.now(timezone.utc)}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def find_by_hash(self, user_id: str, sha256: str) -> Optional[StoredResume]:
+        """Return the stored text of a file the user uploaded before"""
+        try:
+            doc = await self._touch({"user_id": user_id, "sha256": sha256, "variant": self.variant})
+        except PyMongoError as e:
+            logging.error(f"Resume store lookup error: {e}")
+            doc = None
+        RESUME_STORE_LOOKUPS.inc(result="hit" if doc else "miss")
+        if doc is None:
+            return None
+        return StoredResume(doc["resume_id"], doc["filename"], _extraction_from_doc(doc), "store")
+
+    async def get(self, user_id: str, resume_id: str) -> Optional[StoredResume]:
+        """Return one of the user's stored resumes by id"""
+        doc = await self._touch({"user_id": user_id, "resume_id": resume_id})
+        if doc is None:
+            return None
+        return StoredResume(doc["resume_id"], doc["filename"], _extraction_from_doc(doc), "reused")
+
+    async def find_many(self, user_id: str, resume_ids: list) -> dict:
+        """Return resume_id -> summary of the given stored resumes, without touching them"""
+        cursor = self.collection.find(
+            {"user_id": user_id, "resume_id": {"$in": resume_ids}}, {"_id": 0, "resume_id": 1, "filename": 1, "size": 1, "created_at": 1}
+        )
+        return {doc["resume_id"]: doc async for doc in cursor}
+
+    async def put(self, user_id: str, sha256: str, filename: str, size: int,
+                  extraction: ExtractionResult) -> StoredResume:
+        """Store extracted text, keeping the resume_id of an earlier upload of the same file"""
+        now = datetime.now(timezone.utc)
+        vector_fields = {}
+        if self.search is not None:
+            vector_fields = await asyncio.to_thread(self.search.vector_fields, extraction.text)
+        try:
+            doc = await self.collection.find_one_and_update(
+                {"user_id": user_id, "sha256": sha256},
+                {
+                    "$set": {
+                        "filename": filename,
+                        "size": size,
+                        "variant": self.variant,
+                        "text": self.codec.pack(extraction.text),
+                        "text_bytes": len(extraction.text.encode()),
+                        "pages_read": extraction.pages_read,
+                        "total_pages": extraction.total_pages,
+                        "truncated": extraction.truncated,
+                        "last_used_at": now,
+                        **vector_fields,
+                    },
+                    "$setOnInsert": {
+                        "resume_id": f"resume_{uuid.uuid4().hex[:12]}",
+                        "user_id": user_id,
+                        "sha256": sha256,
+                        "created_at": now.isoformat(),
+                    },
+                },
+                projection={"_id": 0, "resume_id": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except PyMongoError as e:
+            # The analysis can go ahead without a stored copy of the resume
+            logging.error(f"Resume store error: {e}")
+            return StoredResume(None, filename, extraction, "extracted")
+        await self._evict(user_id)
+        return StoredResume(doc["resume_id"], filename, extraction, "extracted")
+
+    async def _evict(self, user_id: str):
+        """Drop the user's least recently used resumes beyond the entry and size limits"""
+        kept_bytes = 0
+        evict = []
+        cursor = self.collection.find(
+            {"user_id": user_id}, {"_id": 0, "resume_id": 1, "text_bytes": 1}
+        ).sort("last_used_at", -1)
+        index = 0
+        async for doc in cursor:
+            kept_bytes += doc.get("text_bytes", 0)
+            # The most recent resume is always kept, even if it alone exceeds the size limit
+            if index and (index >= self.max_entries_per_user or kept_bytes > self.max_bytes_per_user):
+                evict.append(doc["resume_id"])
+            index += 1
+        if evict:
+            await self.collection.delete_many({"user_id": user_id, "resume_id": {"$in": evict}})
+            RESUME_STORE_EVICTIONS.inc(len(evict))
+
+    async def list(self, user_id: str) -> list:
+        cursor = self.collection.find({"user_id": user_id}, RESUME_SUMMARY_PROJECTION).sort("last_used_at", -1)
+        resumes = await cursor.to_list(self.max_entries_per_user)
+        for resume in resumes:
+            # MongoDB returns naive UTC datetimes
+            resume["last_used_at"] = resume["last_used_at"].replace(tzinfo=timezone.utc).isoformat()
+        return resumes
+
+    async def delete(self, user_id: str, resume_id: str) -> bool:
+        result = await self.collection.delete_one({"user_id": user_id, "resume_id": resume_id})
+        return result.deleted_count > 0
+
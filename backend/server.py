@@ -1,34 +1,253 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Depends, Cookie, Response
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Depends, Cookie, Request, Response, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from cachetools import TTLCache
 import os
+import asyncio
+import importlib
 import logging
+import time
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, List, Optional, Tuple
 import uuid
 from datetime import datetime, timezone, timedelta
-from emergentintegrations.llm.chat import LlmChat, UserMessage
-import PyPDF2
-import docx
 import json
-import httpx
-import io
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import base64
+from analysis_cache import AnalysisCache, analysis_cache_key
+from extraction import (
+    ExtractionExecutor, ExtractionResult, ExtractionError, ExtractionTimeout, ExtractionBusy,
+    UploadTooLarge, spool_upload_to_file,
+)
+from mailer import Mailer, SMTPConnection
+from llm import LLMClient, create_http_client
+from matcher import JobIndex, match, local_analysis, prefilter_resume
+from model_router import ModelRouter, InvalidModelResponse
+from analysis_schema import AnalysisStream, SCORE_FIELDS, parse_analysis, repair_prompt
+from prompting import compact_prompt_inputs, estimate_tokens
+from resume_store import ResumeStore, StoredResume
+from compression import TextCodec
+from embeddings import HashedEmbedder, VectorSearch
+from job_store import SAVED, JobDescriptionStore
+from history_io import EXPORT_FORMATS, HistoryFormatError, HistoryRowTooLong, export_chunks, import_analyses, iter_lines, iter_records
+from incremental import INCREMENTAL_ANALYSES, SectionDiff, analysis_delta, choose_base, merge_analysis, section_hashes
+from admission import AdmissionRejected, LLMAdmission, UserRateLimiter
+from jobs import AnalysisJobQueue, JobQueueFull, TERMINAL_STATUSES
+import metrics
+from workers import WORKER_ID
+from timing import PAYLOAD_BYTES, TOKENS, TimingMiddleware, record_stage, span
+
+if TYPE_CHECKING:
+    # Imported when the first contact email is built
+    from email.mime.multipart import MIMEMultipart
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection; each worker process opens MONGO_MIN_POOL_SIZE connections before it reports ready
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 4))
+client = AsyncIOMotorClient(
+    mongo_url,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxPoolSize=int(os.environ.get('MONGO_MAX_POOL_SIZE', 100)),
+)
 db = client[os.environ['DB_NAME']]
 
-# Create the main app without a prefix
-app = FastAPI()
+# Validated sessions, cached briefly so the auth path skips a Mongo round trip.
+# Logout invalidates the local entry; other workers see it within the TTL.
+session_cache = TTLCache(
+    maxsize=int(os.environ.get('SESSION_CACHE_MAX_ENTRIES', 10000)),
+    ttl=int(os.environ.get('SESSION_CACHE_TTL_SECONDS', 60)),
+)
+
+# AI analysis models in routing order ("provider:model,..."); bump the prompt version whenever the prompt changes so cached results are not reused
+LLM_MODELS = [
+    tuple(entry.strip().split(":", 1))
+    for entry in os.environ.get('LLM_MODELS', "gemini:gemini-2.5-flash").split(",")
+    if entry.strip()
+]
+LLM_PROVIDER, LLM_MODEL = LLM_MODELS[0]
+ANALYSIS_PROMPT_VERSION = "2"
+
+# Drop resume lines unrelated to the job description before prompting the model
+LLM_PREFILTER = os.environ.get('LLM_PREFILTER', '').lower() in ('1', 'true', 'yes')
+# Normalize, de-duplicate and budget resume/job text before prompting the model
+PROMPT_COMPACTION = os.environ.get('PROMPT_COMPACTION', 'true').lower() in ('1', 'true', 'yes')
+PROMPT_RESUME_TOKEN_BUDGET = int(os.environ.get('PROMPT_RESUME_TOKEN_BUDGET', 3000))
+PROMPT_JOB_TOKEN_BUDGET = int(os.environ.get('PROMPT_JOB_TOKEN_BUDGET', 1500))
+# Cached analyses depend on the prompt and on what the preprocessing stages send
+ANALYSIS_CACHE_VARIANT = ANALYSIS_PROMPT_VERSION
+if LLM_PREFILTER:
+    ANALYSIS_CACHE_VARIANT += "+prefilter"
+if PROMPT_COMPACTION:
+    ANALYSIS_CACHE_VARIANT += f"+compact{PROMPT_RESUME_TOKEN_BUDGET}/{PROMPT_JOB_TOKEN_BUDGET}"
+
+PROMPT_TOKENS = metrics.Counter("resumatch_prompt_tokens_total", "Estimated resume/job tokens sent to the model")
+PROMPT_TOKENS_SAVED = metrics.Counter("resumatch_prompt_tokens_saved_total", "Estimated tokens removed by prompt compaction")
+TIME_TO_FIRST_SCORE = metrics.Histogram("resumatch_analysis_time_to_first_score_seconds", "Time from prompt to the first streamed score")
+ANALYSIS_REPAIRS = metrics.Counter("resumatch_analysis_repairs_total", "Malformed model analyses sent back for repair", ("result",))
+
+# Connection pool settings shared by the application-lifetime HTTP clients
+HTTP_POOL_OPTIONS = {
+    "max_connections": int(os.environ.get('HTTP_MAX_CONNECTIONS', 100)),
+    "max_keepalive_connections": int(os.environ.get('HTTP_MAX_KEEPALIVE_CONNECTIONS', 20)),
+    "keepalive_expiry": float(os.environ.get('HTTP_KEEPALIVE_EXPIRY_SECONDS', 30)),
+    "timeout_seconds": float(os.environ.get('HTTP_TIMEOUT_SECONDS', 30)),
+}
+OAUTH_SESSION_URL = os.environ.get(
+    'OAUTH_SESSION_URL', "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data"
+)
+
+# Created on first use (or on startup when prewarming imports) and closed on shutdown
+http_client = None
+model_router = ModelRouter(
+    [
+        LLMClient(
+            api_key=os.environ.get('EMERGENT_LLM_KEY', ''),
+            provider=provider,
+            model=model,
+            system_message="You are an expert ATS (Applicant Tracking System) and resume analyzer. Provide detailed, actionable analysis.",
+            # Responses only stream field by field through a gateway (see DEPLOYMENT.md)
+            base_url=os.environ.get('LLM_BASE_URL'),
+            **HTTP_POOL_OPTIONS,
+        )
+        for provider, model in LLM_MODELS
+    ],
+    # Total time an analysis may wait on models before the local scorer answers instead
+    budget_seconds=float(os.environ.get('LLM_LATENCY_BUDGET_SECONDS', 45)),
+    # Hedge after the model's observed p95 latency, or this delay until enough samples exist
+    hedge_delay_seconds=float(os.environ.get('LLM_HEDGE_DELAY_SECONDS', 15)),
+    max_attempts=int(os.environ.get('LLM_MAX_ATTEMPTS', 2)),
+    failure_threshold=int(os.environ.get('LLM_CIRCUIT_FAILURE_THRESHOLD', 5)),
+    reset_seconds=float(os.environ.get('LLM_CIRCUIT_RESET_SECONDS', 30)),
+)
+LLM_MIN_LATENCY_BUDGET_SECONDS = 1.0
+
+# Cache of AI analyses keyed by resume text + job description
+analysis_cache = AnalysisCache(
+    db.analysis_cache,
+    max_entries=int(os.environ.get('ANALYSIS_CACHE_MAX_ENTRIES', 1024)),
+    ttl_seconds=int(os.environ.get('ANALYSIS_CACHE_TTL_SECONDS', 7 * 24 * 60 * 60)),
+)
+
+# PDF/DOCX text extraction runs outside the event loop. PDF_EXTRACTOR is "pypdf2", "pypdfium2" or "pdfminer",
+# DOCX_EXTRACTOR "xml" (body, tables, text boxes, headers and footers) or "python-docx" (body paragraphs only);
+# other extractors fall back to PyPDF2 or python-docx when they fail
+extraction_executor = ExtractionExecutor(
+    max_workers=int(os.environ['EXTRACTION_WORKERS']) if os.environ.get('EXTRACTION_WORKERS') else None,
+    max_pending=int(os.environ.get('EXTRACTION_MAX_PENDING', 32)),
+    timeout_seconds=float(os.environ.get('EXTRACTION_TIMEOUT_SECONDS', 20)),
+    max_pages=int(os.environ.get('EXTRACTION_MAX_PAGES', 20)),
+    max_chars=int(os.environ.get('EXTRACTION_MAX_CHARS', 50000)),
+    pdf_extractor=os.environ.get('PDF_EXTRACTOR', 'pypdf2'),
+    docx_extractor=os.environ.get('DOCX_EXTRACTOR', 'xml'),
+)
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', 10 * 1024 * 1024))
+
+# Resume and job description text longer than the threshold is stored compressed ("zlib", "zstd" or "none")
+text_codec = TextCodec(
+    os.environ.get('TEXT_COMPRESSION', 'zlib'),
+    threshold=int(os.environ.get('TEXT_COMPRESSION_MIN_BYTES', 1024)),
+)
+
+# Local embeddings of stored resumes and job descriptions, for ranking one against the other without the LLM
+embedder = HashedEmbedder(int(os.environ.get('EMBEDDING_DIMENSIONS', 512)))
+EMBEDDING_INDEX_CACHE_BYTES = int(os.environ.get('EMBEDDING_INDEX_CACHE_MB', 256)) * 1024 * 1024
+resume_search = VectorSearch(db.resumes, "resume_id", embedder, EMBEDDING_INDEX_CACHE_BYTES)
+job_search = VectorSearch(
+    db.job_descriptions, "job_description_id", embedder, EMBEDDING_INDEX_CACHE_BYTES, query=SAVED
+)
+# Job descriptions are stored once per user and referenced by id from analyses; the limit counts saved ones
+job_store = JobDescriptionStore(
+    db.job_descriptions, job_search, codec=text_codec,
+    max_entries_per_user=int(os.environ.get('JOB_STORE_MAX_ENTRIES_PER_USER', 10000)),
+)
+JOB_IMPORT_MAX_ITEMS = int(os.environ.get('JOB_IMPORT_MAX_ITEMS', 1000))
+MATCH_MAX_K = int(os.environ.get('MATCH_MAX_K', 100))
+MATCH_MAX_ANALYZE = int(os.environ.get('MATCH_MAX_ANALYZE', 10))
+
+# Extracted resume text keyed by upload hash, so re-uploads and resume_id reuse skip extraction
+resume_store = ResumeStore(
+    db.resumes,
+    variant=extraction_executor.variant,
+    max_entries_per_user=int(os.environ.get('RESUME_STORE_MAX_ENTRIES_PER_USER', 20)),
+    max_bytes_per_user=int(os.environ.get('RESUME_STORE_MAX_BYTES_PER_USER', 2 * 1024 * 1024)),
+    ttl_seconds=int(os.environ.get('RESUME_STORE_TTL_SECONDS', 90 * 24 * 60 * 60)),
+    search=resume_search,
+    codec=text_codec,
+)
+
+# Batch analysis limits
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 50))
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', 5))
+
+# Admission control: a per-user token bucket shared by all workers through MongoDB
+# (a batch takes one token per analysis, so the burst must fit a full batch) and
+# a per-worker cap on concurrent LLM calls with a bounded wait queue
+user_rate_limiter = UserRateLimiter(
+    db.rate_limits,
+    rate_per_minute=float(os.environ.get('ANALYSIS_RATE_PER_MINUTE', 30)),
+    burst=int(os.environ.get('ANALYSIS_RATE_BURST', BATCH_MAX_ITEMS)),
+)
+llm_admission = LLMAdmission(
+    max_concurrent=int(os.environ.get('LLM_MAX_CONCURRENCY', 8)),
+    max_waiting=int(os.environ.get('LLM_MAX_WAITING', 32)),
+    max_wait_seconds=float(os.environ.get('LLM_MAX_WAIT_SECONDS', 10)),
+)
+
+# How often job event streams re-read job state written by other workers
+JOB_EVENTS_POLL_SECONDS = float(os.environ.get('JOB_EVENTS_POLL_SECONDS', 2))
+
+# Worker lifecycle: start PDF extraction processes before reporting ready, how long shutdown waits for
+# queued jobs, detached batches and emails, and how long readiness waits on MongoDB
+PREWARM_EXTRACTION = os.environ.get('PREWARM_EXTRACTION', 'true').lower() in ('1', 'true', 'yes')
+# Import the modules below and open the HTTP clients before reporting ready instead of on first use;
+# slower startup, but the first upload, sign-in or model call doesn't pay for them
+PREWARM_IMPORTS = os.environ.get('PREWARM_IMPORTS', '').lower() in ('1', 'true', 'yes')
+HEAVY_MODULES = (
+    "PyPDF2", "docx", "numpy", "httpx", "emergentintegrations.llm.chat", "smtplib", "email.mime.multipart",
+)
+SHUTDOWN_DRAIN_SECONDS = float(os.environ.get('SHUTDOWN_DRAIN_SECONDS', 30))
+READINESS_TIMEOUT_SECONDS = float(os.environ.get('READINESS_TIMEOUT_SECONDS', 2))
+
+# Set by the lifespan: ready once prewarmed, draining once shutdown begins
+worker_ready = False
+worker_draining = False
+WORKER_STARTED_AT = time.monotonic()
+# Detached tasks that shutdown waits for
+background_tasks: set = set()
+
+# Report per-stage timings of each request in a Server-Timing response header
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+
+# Incremental re-analysis reuses the closest of the last few analyses against the same job description
+# when at least this share of the resume's sections is unchanged
+INCREMENTAL_MIN_UNCHANGED = float(os.environ.get('INCREMENTAL_MIN_UNCHANGED', 0.5))
+INCREMENTAL_CANDIDATES = int(os.environ.get('INCREMENTAL_CANDIDATES', 5))
+
+# History pagination
+ANALYSES_PAGE_MAX = int(os.environ.get('ANALYSES_PAGE_MAX', 500))
+# Analyses read or written per database round trip by history export and import
+HISTORY_BATCH_SIZE = int(os.environ.get('HISTORY_BATCH_SIZE', 1000))
+# Longest row (NDJSON line or CSV record) an import accepts
+HISTORY_IMPORT_MAX_ROW_CHARS = int(os.environ.get('HISTORY_IMPORT_MAX_ROW_KB', 1024)) * 1024
+ANALYSIS_SUMMARY_PROJECTION = {
+    "_id": 0,
+    "analysis_id": 1,
+    "resume_id": 1,
+    "resume_filename": 1,
+    "overall_score": 1,
+    "skill_match_score": 1,
+    "experience_score": 1,
+    "ats_score": 1,
+    "matched_skills_count": {"$size": {"$ifNull": ["$matched_skills", []]}},
+    "missing_skills_count": {"$size": {"$ifNull": ["$missing_skills", []]}},
+    "created_at": 1,
+}
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -53,7 +272,9 @@ class AnalysisResult(BaseModel):
     model_config = ConfigDict(extra="ignore")
     analysis_id: str
     user_id: str
+    resume_id: Optional[str] = None
     resume_filename: str
+    job_description_id: Optional[str] = None
     job_description: str
     overall_score: float
     skill_match_score: float
@@ -63,11 +284,20 @@ class AnalysisResult(BaseModel):
     missing_skills: List[str]
     suggestions: List[str]
     keyword_analysis: dict
+    routing: Optional[dict] = None
+    delta: Optional[dict] = None
     created_at: datetime
 
 class AnalysisRequest(BaseModel):
     job_description: str
 
+class JobDescriptionInput(BaseModel):
+    title: Optional[str] = None
+    text: str = Field(min_length=1)
+
+class JobDescriptionsRequest(BaseModel):
+    job_descriptions: List[JobDescriptionInput] = Field(min_length=1)
+
 class SessionData(BaseModel):
     id: str
     email: str
@@ -86,10 +316,18 @@ async def get_current_user(session_token: Optional[str] = Cookie(None)) -> str:
     if not session_token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
+    # Serve recently validated sessions from memory
+    cached = session_cache.get(session_token)
+    if cached is not None:
+        user_id, expires_at = cached
+        if expires_at >= datetime.now(timezone.utc):
+            return user_id
+        session_cache.pop(session_token, None)
+    
     # Find session in database
     session_doc = await db.user_sessions.find_one(
         {"session_token": session_token},
-        {"_id": 0}
+        {"_id": 0, "user_id": 1, "expires_at": 1}
     )
     
     if not session_doc:
@@ -105,39 +343,119 @@ async def get_current_user(session_token: Optional[str] = Cookie(None)) -> str:
     if expires_at < datetime.now(timezone.utc):
         raise HTTPException(status_code=401, detail="Session expired")
     
+    session_cache[session_token] = (session_doc["user_id"], expires_at)
     return session_doc["user_id"]
 
-def extract_text_from_pdf(file_content: bytes) -> str:
-    """Extract text from PDF file"""
+async def ensure_indexes():
+    """Create the indexes backing every query the API issues"""
+    await db.user_sessions.create_index("session_token")
+    await db.users.create_index("email")
+    await db.users.create_index("user_id")
+    await db.analyses.create_index("analysis_id")
+    await db.analyses.create_index([("user_id", 1), ("created_at", -1), ("analysis_id", -1)])
+    await db.analyses.create_index([("user_id", 1), ("job_description_id", 1), ("created_at", -1)])
+    await db.contacts.create_index("contact_id")
+    await db.contacts.create_index("delivery_status")
+
+def validate_resume_filename(filename: str):
+    """Reject uploads that are not PDF or DOCX files"""
+    filename = filename.lower()
+    if not (filename.endswith('.pdf') or filename.endswith('.docx')):
+        raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
+
+async def extract_spooled_resume(filename: str, path: str) -> ExtractionResult:
+    """Extract text from a spooled resume in the extraction executor"""
     try:
-        pdf_file = io.BytesIO(file_content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        return text
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error parsing PDF: {str(e)}")
+        with span("extraction"):
+            extraction = await extraction_executor.extract(filename, path)
+    except ExtractionBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except ExtractionTimeout as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ExtractionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not extraction.text.strip():
+        raise HTTPException(status_code=400, detail="Could not extract text from resume")
+    PAYLOAD_BYTES.observe(len(extraction.text.encode()), kind="resume_text")
+    
+    if extraction.page_seconds:
+        slowest = max(range(len(extraction.page_seconds)), key=extraction.page_seconds.__getitem__)
+        logging.info(
+            f"Extracted {extraction.pages_read}/{extraction.total_pages} pages of {filename} "
+            f"in {sum(extraction.page_seconds) * 1000:.1f}ms "
+            f"(slowest page {slowest + 1}: {extraction.page_seconds[slowest] * 1000:.1f}ms, "
+            f"truncated={extraction.truncated})"
+        )
+    return extraction
 
-def extract_text_from_docx(file_content: bytes) -> str:
-    """Extract text from DOCX file"""
+async def spool_resume(resume: UploadFile):
+    """Validate an uploaded resume and spool it to disk; the caller deletes the file"""
+    validate_resume_filename(resume.filename)
     try:
-        docx_file = io.BytesIO(file_content)
-        doc = docx.Document(docx_file)
-        text = "\n".join([para.text for para in doc.paragraphs])
-        return text
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error parsing DOCX: {str(e)}")
+        with span("upload"):
+            upload = await spool_upload_to_file(resume, MAX_UPLOAD_BYTES)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    PAYLOAD_BYTES.observe(upload.size, kind="upload")
+    return upload
 
-async def analyze_resume_with_ai(resume_text: str, job_description: str) -> dict:
-    """Use Gemini to analyze resume against job description"""
+async def load_resume(resume: UploadFile, user_id: str) -> StoredResume:
+    """Extract an uploaded resume's text, reusing the stored text when the user uploaded the same file before"""
+    upload = await spool_resume(resume)
     try:
-        # Initialize Gemini chat
-        chat = LlmChat(
-            api_key=os.environ['EMERGENT_LLM_KEY'],
-            session_id=f"analysis_{uuid.uuid4().hex[:8]}",
-            system_message="You are an expert ATS (Applicant Tracking System) and resume analyzer. Provide detailed, actionable analysis."
-        ).with_model("gemini", "gemini-2.5-flash")
+        stored = await resume_store.find_by_hash(user_id, upload.sha256)
+        if stored is not None:
+            stored.filename = resume.filename
+            return stored
+        extraction = await extract_spooled_resume(resume.filename, upload.path)
+    finally:
+        os.unlink(upload.path)
+    return await resume_store.put(user_id, upload.sha256, resume.filename, upload.size, extraction)
+
+async def resolve_resume(resume: Optional[UploadFile], resume_id: Optional[str], user_id: str) -> StoredResume:
+    """Return the resume to analyze, either uploaded or stored earlier and referenced by resume_id"""
+    if (resume is None) == (resume_id is None):
+        raise HTTPException(status_code=400, detail="Provide either a resume file or a resume_id")
+    if resume is not None:
+        return await load_resume(resume, user_id)
+    stored = await resume_store.get(user_id, resume_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    return stored
+
+async def analyze_resume_with_ai(resume_text: str, job_description: str, latency_budget: Optional[float] = None,
+                                 on_field: Optional[Callable[[str, Any], Awaitable[None]]] = None,
+                                 bounded: bool = True) -> dict:
+    """Route the analysis prompt through the configured models, falling back to the local scorer
+
+    The response is streamed and ``on_field(name, value)`` is awaited as each
+    field of the analysis arrives, scores first. Malformed output is sent back
+    to the same model once for repair. The returned analysis carries a
+    ``routing`` record of every model attempt. Model calls wait for an LLM
+    slot; with ``bounded`` a full wait queue rejects the analysis with 429.
+    """
+    original_resume_text, original_job_description = resume_text, job_description
+    prompt_started = time.perf_counter()
+    PAYLOAD_BYTES.observe(len(job_description.encode()), kind="job_description")
+    try:
+        if LLM_PREFILTER:
+            resume_text = prefilter_resume(resume_text, JobIndex.build(job_description))
+        
+        if PROMPT_COMPACTION:
+            compact = compact_prompt_inputs(
+                resume_text, job_description, PROMPT_RESUME_TOKEN_BUDGET, PROMPT_JOB_TOKEN_BUDGET
+            )
+            resume_text, job_description = compact.resume_text, compact.job_description
+            PROMPT_TOKENS_SAVED.inc(compact.tokens_saved)
+            TOKENS.observe(compact.original_tokens, kind="original")
+            logging.info(
+                f"Prompt compaction: {compact.original_tokens} -> {compact.compacted_tokens} tokens "
+                f"(saved {compact.tokens_saved}, sections: {', '.join(compact.sections)})"
+            )
+        prompt_tokens = estimate_tokens(resume_text) + estimate_tokens(job_description)
+        PROMPT_TOKENS.inc(prompt_tokens)
+        TOKENS.observe(prompt_tokens, kind="prompt")
         
         # Create analysis prompt
         prompt = f"""Analyze this resume against the job description and provide a comprehensive assessment.
@@ -148,14 +466,14 @@ RESUME:
 JOB DESCRIPTION:
 {job_description}
 
-Provide your analysis in the following JSON format (respond ONLY with valid JSON, no markdown):
+Provide your analysis in the following JSON format, with the fields in this order (respond ONLY with valid JSON, no markdown):
 {{
-  "matched_skills": ["list of skills from resume that match job requirements"],
-  "missing_skills": ["list of skills required in job but missing from resume"],
-  "experience_relevance": "brief analysis of experience relevance (2-3 sentences)",
   "skill_match_score": 0-100,
   "experience_score": 0-100,
   "ats_score": 0-100,
+  "matched_skills": ["list of skills from resume that match job requirements"],
+  "missing_skills": ["list of skills required in job but missing from resume"],
+  "experience_relevance": "brief analysis of experience relevance (2-3 sentences)",
   "suggestions": [
     "Specific improvement suggestion 1",
     "Specific improvement suggestion 2",
@@ -173,102 +491,368 @@ IMPORTANT:
 - Consider industry-standard skill variations (e.g., "React.js" = "ReactJS" = "React")
 - ATS score should reflect formatting quality and keyword optimization
 - Provide actionable, specific suggestions"""
+        record_stage("prompt_build", time.perf_counter() - prompt_started)
         
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+        # Hedged attempts stream concurrently; each field is reported once, from whichever arrives first
+        started = time.perf_counter()
+        reported = {}
         
-        # Parse JSON response
-        response_text = response.strip()
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
+        async def report_field(name: str, value):
+            if name in reported:
+                return
+            reported[name] = value
+            if name in SCORE_FIELDS and "first_score" not in reported:
+                reported["first_score"] = time.perf_counter() - started
+                TIME_TO_FIRST_SCORE.observe(reported["first_score"])
+            if on_field is not None:
+                await on_field(name, value)
         
-        analysis = json.loads(response_text.strip())
+        async def request(llm: LLMClient, record: dict) -> dict:
+            stream = AnalysisStream(report_field)
+            async for chunk in llm.stream(prompt):
+                await stream.feed(chunk)
+            if stream.first_score_seconds is not None:
+                record["first_score_ms"] = round(stream.first_score_seconds * 1000, 1)
+            try:
+                return stream.result()
+            except InvalidModelResponse as e:
+                logging.warning(f"Invalid analysis from {llm.model}, asking for a repair: {e}")
+                record["repair"] = str(e)[:200]
+            finally:
+                record_stage("parse", stream.parse_seconds)
+            try:
+                repaired = await llm.complete(repair_prompt(prompt, stream.parser.text, record["repair"]))
+                analysis = parse_analysis(repaired)
+            except InvalidModelResponse:
+                ANALYSIS_REPAIRS.inc(result="failed")
+                raise
+            ANALYSIS_REPAIRS.inc(result="repaired")
+            return analysis
+        
+        queued = time.perf_counter()
+        async with llm_admission.slot(bounded):
+            record_stage("llm_queue", time.perf_counter() - queued)
+            with span("llm"):
+                analysis, routing = await model_router.run(
+                    request,
+                    lambda: local_analysis(original_resume_text, original_job_description),
+                    budget_seconds=latency_budget,
+                )
+        if "first_score" in reported:
+            routing["time_to_first_score_ms"] = round(reported["first_score"] * 1000, 1)
+        analysis["routing"] = routing
         return analysis
         
-    except json.JSONDecodeError as e:
-        logging.error(f"JSON parse error: {e}, Response: {response}")
-        # Return a fallback response
-        return {
-            "matched_skills": ["API Development", "Problem Solving"],
-            "missing_skills": ["Cloud Technologies", "CI/CD"],
-            "experience_relevance": "Analysis completed. Please review the results.",
-            "skill_match_score": 70,
-            "experience_score": 65,
-            "ats_score": 75,
-            "suggestions": [
-                "Add more specific technical skills",
-                "Include measurable achievements",
-                "Improve formatting for ATS compatibility",
-                "Add relevant certifications",
-                "Include more keywords from job description"
-            ],
-            "resume_keywords": ["development", "engineering"],
-            "job_keywords": ["software", "development"]
-        }
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         logging.error(f"AI analysis error: {e}")
         raise HTTPException(status_code=500, detail=f"AI analysis failed: {str(e)}")
 
-async def send_email(to_email: str, name: str, user_message: str):
-    """Send email using Gmail SMTP"""
+async def admit_analyses(user_id: str, count: int = 1):
+    """Charge the user's rate limit for ``count`` analyses, rejecting with 429 when it is exhausted"""
     try:
-        # Email configuration
-        smtp_server = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
-        smtp_port = int(os.environ.get('EMAIL_PORT', 587))
-        sender_email = os.environ.get('EMAIL_USER')
-        sender_password = os.environ.get('EMAIL_PASS')
-        
-        if not sender_email or not sender_password:
-            raise HTTPException(status_code=500, detail="Email configuration missing")
-        
-        # Create message
-        message = MIMEMultipart("alternative")
-        message["Subject"] = f"Contact Form Submission from {name}"
-        message["From"] = sender_email
-        message["To"] = to_email
-        
-        # Create HTML content
-        html_content = f"""
-        <html>
-          <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; border-radius: 5px;">
-              <h2 style="color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px;">
-                New Contact Form Submission
-              </h2>
-              <div style="margin: 20px 0;">
-                <p><strong>From:</strong> {name}</p>
-                <p><strong>Email:</strong> {to_email}</p>
-              </div>
-              <div style="background-color: #f8f9fa; padding: 15px; border-left: 4px solid #3498db; margin: 20px 0;">
-                <h3 style="margin-top: 0; color: #2c3e50;">Message:</h3>
-                <p style="white-space: pre-wrap;">{user_message}</p>
-              </div>
-              <div style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #ddd; font-size: 12px; color: #7f8c8d;">
-                <p>This is an automated message from ResuMatch AI Contact Form.</p>
-                <p>Support: helpfinsight@gmail.com</p>
-              </div>
-            </div>
-          </body>
-        </html>
-        """
-        
-        # Attach HTML content
-        html_part = MIMEText(html_content, "html")
-        message.attach(html_part)
-        
-        # Send email
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.send_message(message)
-        
-        logging.info(f"Email sent successfully to {to_email}")
-        
-    except Exception as e:
-        logging.error(f"Email sending error: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to send email: {str(e)}")
+        await user_rate_limiter.acquire(user_id, count)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+async def cached_analysis(resume_text: str, job_description: str) -> Tuple[Optional[dict], str]:
+    """Look up an analysis in the analysis cache, returning it (or None) and the tier that served it"""
+    cache_key = analysis_cache_key(resume_text, job_description, LLM_MODEL, ANALYSIS_CACHE_VARIANT)
+    with span("cache_lookup"):
+        ai_analysis, cache_tier = await analysis_cache.get(cache_key)
+    if ai_analysis is not None:
+        return {**ai_analysis, "routing": {"model": "cache", "cache_tier": cache_tier}}, cache_tier
+    return None, cache_tier
+
+async def analyze_and_cache(resume_text: str, job_description: str, latency_budget: Optional[float] = None,
+                            on_field: Optional[Callable[[str, Any], Awaitable[None]]] = None,
+                            bounded: bool = True) -> dict:
+    """Analyze with AI and store the result in the analysis cache"""
+    ai_analysis = await analyze_resume_with_ai(resume_text, job_description, latency_budget, on_field, bounded)
+    # Local fallback results are not cached so the next request gets another chance at the model
+    if not ai_analysis["routing"]["fallback"]:
+        cached = {key: value for key, value in ai_analysis.items() if key != "routing"}
+        cache_key = analysis_cache_key(resume_text, job_description, LLM_MODEL, ANALYSIS_CACHE_VARIANT)
+        await analysis_cache.set(cache_key, cached, LLM_MODEL, ANALYSIS_CACHE_VARIANT)
+    return ai_analysis
+
+async def get_ai_analysis(resume_text: str, job_description: str, latency_budget: Optional[float] = None,
+                          on_field: Optional[Callable[[str, Any], Awaitable[None]]] = None,
+                          bounded: bool = True, admit_user_id: Optional[str] = None) -> Tuple[dict, str]:
+    """Analyze with AI through the analysis cache, returning the analysis and the cache tier
+
+    With ``admit_user_id``, that user's rate limit is charged on a cache miss,
+    just before the model is called.
+    """
+    ai_analysis, cache_tier = await cached_analysis(resume_text, job_description)
+    if ai_analysis is not None:
+        return ai_analysis, cache_tier
+    
+    if admit_user_id is not None:
+        await admit_analyses(admit_user_id)
+    return await analyze_and_cache(resume_text, job_description, latency_budget, on_field, bounded), cache_tier
+
+async def admit_cache_misses(user_id: str, pairs: List[Tuple[str, str]]) -> List[Tuple[Optional[dict], str]]:
+    """Look up many (resume text, job description) pairs in the analysis cache, charging the misses
+
+    The user's rate limit is charged once for every pair the cache cannot
+    answer, rejecting them all with 429 when it is exhausted. Returns what
+    cached_analysis returns for each pair; misses are then analyzed with
+    analyze_and_cache.
+    """
+    cached = await asyncio.gather(*(cached_analysis(*pair) for pair in pairs))
+    misses = sum(ai_analysis is None for ai_analysis, _ in cached)
+    if misses:
+        await admit_analyses(user_id, misses)
+    return cached
+
+async def store_job_descriptions(user_id: str, job_descriptions: List[str]) -> List[str]:
+    """Store job descriptions once per user and return the ids analyses reference them by"""
+    with span("embedding"):
+        vectors = await asyncio.to_thread(
+            lambda: [job_search.vector_fields(job_description) for job_description in job_descriptions]
+        )
+    return await job_store.put_many(user_id, [{"text": text} for text in job_descriptions], vectors, save=False)
+
+async def hydrate_job_descriptions(user_id: str, analyses: List[dict]):
+    """Fill in the job description text of analyses that reference a stored job description"""
+    job_description_ids = list({
+        analysis["job_description_id"] for analysis in analyses if analysis.get("job_description_id")
+    })
+    if not job_description_ids:
+        return
+    with span("hydrate"):
+        jobs = await job_store.get_many(user_id, job_description_ids, include_deleted=True)
+    for analysis in analyses:
+        job = jobs.get(analysis.get("job_description_id"))
+        if job is not None:
+            analysis["job_description"] = job["text"]
+
+def build_analysis_doc(user_id: str, resume_filename: str, job_description_id: str, ai_analysis: dict,
+                       resume_id: Optional[str] = None, resume_sections: Optional[dict] = None) -> dict:
+    """Build the document stored in db.analyses from an AI analysis
+
+    The job description is referenced by id; see hydrate_job_descriptions.
+    ``resume_sections`` holds section hashes for later incremental analyses.
+    """
+    # Calculate overall score
+    overall_score = (
+        ai_analysis["skill_match_score"] * 0.4 +
+        ai_analysis["experience_score"] * 0.3 +
+        ai_analysis["ats_score"] * 0.3
+    )
+    
+    return {
+        "analysis_id": f"analysis_{uuid.uuid4().hex[:12]}",
+        "user_id": user_id,
+        "resume_id": resume_id,
+        "resume_filename": resume_filename,
+        "job_description_id": job_description_id,
+        "overall_score": round(overall_score, 1),
+        "skill_match_score": ai_analysis["skill_match_score"],
+        "experience_score": ai_analysis["experience_score"],
+        "ats_score": ai_analysis["ats_score"],
+        "matched_skills": ai_analysis["matched_skills"],
+        "missing_skills": ai_analysis["missing_skills"],
+        "suggestions": ai_analysis["suggestions"],
+        "keyword_analysis": {
+            "resume_keywords": ai_analysis.get("resume_keywords", []),
+            "job_keywords": ai_analysis.get("job_keywords", [])
+        },
+        "routing": ai_analysis.get("routing"),
+        "resume_sections": resume_sections,
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+
+def analysis_response(analysis_doc: dict, job_description: str) -> dict:
+    """Return a stored analysis as the API shows it, with its job description text"""
+    response = {k: v for k, v in analysis_doc.items() if k not in ("_id", "resume_sections")}
+    response["job_description"] = job_description
+    return response
+
+async def reanalyze_incrementally(user_id: str, job_description_id: str, resume_text: str, job_description: str,
+                                  resume_sections: dict) -> Tuple[Optional[dict], Optional[Tuple[dict, SectionDiff]]]:
+    """Merge a resume edit into the closest earlier analysis of the same job description
+
+    Returns the merged analysis, or None when a full analysis is needed, and
+    the earlier analysis with its section diff when there is one. Only
+    model analyses are used as a base: merged ones would let edits drift
+    further from a model's view with every run, and local fallback scores
+    are not worth carrying forward.
+    """
+    candidates = await db.analyses.find(
+        {
+            "user_id": user_id,
+            "job_description_id": job_description_id,
+            "resume_sections": {"$ne": None},
+            "routing.model": {"$nin": ["incremental", "local"]},
+        },
+        {"_id": 0},
+    ).sort("created_at", -1).limit(INCREMENTAL_CANDIDATES).to_list(INCREMENTAL_CANDIDATES)
+    base = choose_base(candidates, resume_sections)
+    if base is None:
+        INCREMENTAL_ANALYSES.inc(result="no_base")
+        return None, None
+    
+    base_analysis, diff = base
+    if diff.unchanged_ratio < INCREMENTAL_MIN_UNCHANGED:
+        INCREMENTAL_ANALYSES.inc(result="too_different")
+        return None, base
+    base_resume = await resume_store.get(user_id, base_analysis["resume_id"]) if base_analysis.get("resume_id") else None
+    if base_resume is None:
+        INCREMENTAL_ANALYSES.inc(result="base_resume_missing")
+        return None, base
+    
+    with span("incremental_merge"):
+        merged = merge_analysis(base_analysis, base_resume.extraction.text, resume_text, job_description)
+    merged["routing"] = {"model": "incremental", "base_analysis_id": base_analysis["analysis_id"]}
+    INCREMENTAL_ANALYSES.inc(result="merged")
+    return merged, base
+
+async def analyze_shortlist(user_id: str, pairs: List[Tuple[StoredResume, dict]]) -> List[dict]:
+    """Run the full AI analysis for shortlisted resume/job description pairs and store them in the history
+
+    Job descriptions are ``{"job_description_id", "text"}`` dicts. Failed pairs
+    are returned as ``{"error": ...}`` in their place. The user is charged
+    for the pairs the analysis cache cannot answer (429 when over the limit).
+    """
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    cached = await admit_cache_misses(user_id, [(stored.extraction.text, job["text"]) for stored, job in pairs])
+    
+    async def analyze_pair(stored: StoredResume, job: dict, ai_analysis: Optional[dict]) -> dict:
+        try:
+            if ai_analysis is None:
+                async with semaphore:
+                    ai_analysis = await analyze_and_cache(stored.extraction.text, job["text"], bounded=False)
+        except HTTPException as e:
+            return {"error": e.detail}
+        return build_analysis_doc(
+            user_id, stored.filename, job["job_description_id"], ai_analysis, stored.resume_id,
+            section_hashes(stored.extraction.text),
+        )
+    
+    analysis_docs = await asyncio.gather(
+        *(analyze_pair(stored, job, ai_analysis) for (stored, job), (ai_analysis, _) in zip(pairs, cached))
+    )
+    stored_docs = [doc for doc in analysis_docs if "analysis_id" in doc]
+    if stored_docs:
+        with span("db_insert"):
+            await db.analyses.insert_many(stored_docs, ordered=False)
+    return [
+        analysis_response(doc, job["text"]) if "analysis_id" in doc else doc
+        for doc, (_, job) in zip(analysis_docs, pairs)
+    ]
+
+async def run_analysis_job(job: dict, payload: dict, progress) -> dict:
+    """Run a queued analysis through each stage, reporting progress as it goes"""
+    stored = payload.get("resume")
+    if stored is None:
+        try:
+            await progress("extracting")
+            extraction = await extract_spooled_resume(job["resume_filename"], payload["path"])
+        finally:
+            os.unlink(payload["path"])
+        stored = await resume_store.put(
+            job["user_id"], payload["sha256"], job["resume_filename"], payload["size"], extraction
+        )
+    
+    await progress("analyzing")
+    
+    async def publish_field(name: str, value):
+        await progress("analyzing", persist=False, partial={name: value})
+    
+    # Queued jobs are already bounded by the job queue, so they wait for an LLM slot as long as it takes
+    ai_analysis, _ = await get_ai_analysis(
+        stored.extraction.text, payload["job_description"], on_field=publish_field, bounded=False,
+        admit_user_id=job["user_id"],
+    )
+    
+    await progress("scoring")
+    job_description_ids = await store_job_descriptions(job["user_id"], [payload["job_description"]])
+    analysis_doc = build_analysis_doc(
+        job["user_id"], job["resume_filename"], job_description_ids[0], ai_analysis, stored.resume_id,
+        section_hashes(stored.extraction.text),
+    )
+    with span("db_insert"):
+        await db.analyses.insert_one(analysis_doc)
+    return {"analysis_id": analysis_doc["analysis_id"]}
+
+def discard_analysis_job(payload: dict):
+    """Delete the spooled upload of a job that will not run"""
+    if "path" in payload:
+        try:
+            os.unlink(payload["path"])
+        except FileNotFoundError:
+            pass
+
+# Queue for analyses submitted in async job mode
+analysis_jobs = AnalysisJobQueue(
+    db.analysis_jobs,
+    run_analysis_job,
+    max_queue=int(os.environ.get('ANALYSIS_JOB_QUEUE_SIZE', 100)),
+    workers=int(os.environ.get('ANALYSIS_JOB_WORKERS', 4)),
+    discard=discard_analysis_job,
+)
+
+def build_contact_email(contact_doc: dict) -> "MIMEMultipart":
+    """Build the email sent for a contact form submission"""
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    
+    # Create message
+    message = MIMEMultipart("alternative")
+    message["Subject"] = f"Contact Form Submission from {contact_doc['name']}"
+    message["From"] = EMAIL_SENDER
+    message["To"] = contact_doc["email"]
+    
+    # Create HTML content
+    html_content = f"""
+    <html>
+      <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+        <div style="max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #ddd; border-radius: 5px;">
+          <h2 style="color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px;">
+            New Contact Form Submission
+          </h2>
+          <div style="margin: 20px 0;">
+            <p><strong>From:</strong> {contact_doc['name']}</p>
+            <p><strong>Email:</strong> {contact_doc['email']}</p>
+          </div>
+          <div style="background-color: #f8f9fa; padding: 15px; border-left: 4px solid #3498db; margin: 20px 0;">
+            <h3 style="margin-top: 0; color: #2c3e50;">Message:</h3>
+            <p style="white-space: pre-wrap;">{contact_doc['message']}</p>
+          </div>
+          <div style="margin-top: 30px; padding-top: 20px; border-top: 1px solid #ddd; font-size: 12px; color: #7f8c8d;">
+            <p>This is an automated message from ResuMatch AI Contact Form.</p>
+            <p>Support: helpfinsight@gmail.com</p>
+          </div>
+        </div>
+      </body>
+    </html>
+    """
+    
+    # Attach HTML content
+    html_part = MIMEText(html_content, "html")
+    message.attach(html_part)
+    return message
+
+# Contact emails are sent in the background over a reused SMTP connection
+EMAIL_SENDER = os.environ.get('EMAIL_USER')
+contact_mailer = Mailer(
+    db.contacts,
+    "contact_id",
+    build_contact_email,
+    SMTPConnection(
+        host=os.environ.get('EMAIL_HOST', 'smtp.gmail.com'),
+        port=int(os.environ.get('EMAIL_PORT', 587)),
+        username=EMAIL_SENDER,
+        password=os.environ.get('EMAIL_PASS'),
+        starttls=os.environ.get('EMAIL_STARTTLS', 'true').lower() in ('1', 'true', 'yes'),
+    ) if EMAIL_SENDER and os.environ.get('EMAIL_PASS') else None,
+    max_attempts=int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5)),
+    retry_base_seconds=float(os.environ.get('EMAIL_RETRY_BASE_SECONDS', 2)),
+    idle_timeout_seconds=float(os.environ.get('EMAIL_IDLE_TIMEOUT_SECONDS', 60)),
+)
 
 # Auth Routes
 @api_router.post("/auth/session")
@@ -279,17 +863,16 @@ async def create_session(session_data: dict, response: Response):
         if not session_id:
             raise HTTPException(status_code=400, detail="session_id required")
         
-        # Call Google OAuth API with provided credentials
-        async with httpx.AsyncClient() as client:
-            auth_response = await client.get(
-                "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
-                headers={"X-Session-ID": session_id}
-            )
-            
-            if auth_response.status_code != 200:
-                raise HTTPException(status_code=401, detail="Invalid session_id")
-            
-            user_data = auth_response.json()
+        # Call Google OAuth API with provided credentials over the shared HTTP client
+        auth_response = await get_http_client().get(
+            OAUTH_SESSION_URL,
+            headers={"X-Session-ID": session_id}
+        )
+        
+        if auth_response.status_code != 200:
+            raise HTTPException(status_code=401, detail="Invalid session_id")
+        
+        user_data = auth_response.json()
         
         # Generate user_id and session_token
         user_id = f"user_{uuid.uuid4().hex[:12]}"
@@ -362,6 +945,7 @@ async def get_current_user_info(user_id: str = Depends(get_current_user)):
 async def logout(response: Response, session_token: Optional[str] = Cookie(None)):
     """Logout user and delete session"""
     if session_token:
+        session_cache.pop(session_token, None)
         await db.user_sessions.delete_one({"session_token": session_token})
     
     response.delete_cookie(
@@ -375,20 +959,23 @@ async def logout(response: Response, session_token: Optional[str] = Cookie(None)
 # Contact API Route
 @api_router.post("/contact")
 async def contact_form(contact: ContactRequest):
-    """Handle contact form submission and send email"""
+    """Handle contact form submission and queue the email"""
     try:
-        # Send email to user
-        await send_email(contact.email, contact.name, contact.message)
-        
-        # Store contact submission in database
+        # Store contact submission in database first so it survives delivery failures
         contact_doc = {
             "contact_id": f"contact_{uuid.uuid4().hex[:12]}",
             "name": contact.name,
             "email": contact.email,
             "message": contact.message,
+            "delivery_status": "queued",
+            "delivery_attempts": 0,
+            "worker_id": WORKER_ID,
             "created_at": datetime.now(timezone.utc).isoformat()
         }
-        await db.contacts.insert_one(contact_doc)
+        await db.contacts.insert_one(dict(contact_doc))
+        
+        # Send email to user in the background
+        contact_mailer.enqueue(contact_doc)
         
         return {"message": "Contact form submitted successfully. We'll get back to you soon!"}
         
@@ -401,64 +988,64 @@ async def contact_form(contact: ContactRequest):
 # Resume Analysis Routes
 @api_router.post("/analyze")
 async def analyze_resume(
-    resume: UploadFile = File(...),
+    response: Response,
+    resume: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None, description="Analyze a previously uploaded resume instead of uploading it again"),
     job_description: str = Form(...),
+    latency_budget: Optional[float] = Form(
+        None, ge=LLM_MIN_LATENCY_BUDGET_SECONDS, le=model_router.budget_seconds,
+        description="Seconds to wait on the AI models before answering with the local scorer",
+    ),
+    incremental: bool = Form(
+        False, description="Re-score only what changed since the closest earlier analysis against this job description",
+    ),
     user_id: str = Depends(get_current_user)
 ):
-    """Analyze resume against job description"""
+    """Analyze resume against job description
+
+    With ``incremental``, an edited resume is merged into the earlier AI
+    analysis when most of its sections are unchanged, and the result carries
+    a ``delta`` against that analysis. The rate limit is only charged when
+    the model is called, not for cached or merged results.
+    """
     try:
-        # Validate file type
-        filename = resume.filename.lower()
-        if not (filename.endswith('.pdf') or filename.endswith('.docx')):
-            raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
+        # Validate file type and extract text, or reuse text stored for this resume
+        stored = await resolve_resume(resume, resume_id, user_id)
+        extraction = stored.extraction
+        resume_text = extraction.text
+        response.headers["X-Resume-Store"] = stored.source
+        if extraction.total_pages:
+            response.headers["X-Extraction-Pages"] = f"{extraction.pages_read}/{extraction.total_pages}"
         
-        # Read file content
-        file_content = await resume.read()
-        
-        # Extract text based on file type
-        if filename.endswith('.pdf'):
-            resume_text = extract_text_from_pdf(file_content)
-        else:
-            resume_text = extract_text_from_docx(file_content)
-        
-        if not resume_text.strip():
-            raise HTTPException(status_code=400, detail="Could not extract text from resume")
-        
-        # Analyze with AI
-        ai_analysis = await analyze_resume_with_ai(resume_text, job_description)
+        # The job description is stored once for this user and referenced by id
+        job_description_id = (await store_job_descriptions(user_id, [job_description]))[0]
+        resume_sections = section_hashes(resume_text)
+        ai_analysis, base = None, None
+        if incremental:
+            ai_analysis, base = await reanalyze_incrementally(
+                user_id, job_description_id, resume_text, job_description, resume_sections
+            )
         
-        # Calculate overall score
-        overall_score = (
-            ai_analysis["skill_match_score"] * 0.4 +
-            ai_analysis["experience_score"] * 0.3 +
-            ai_analysis["ats_score"] * 0.3
-        )
+        # Analyze with AI, reusing a cached result for identical resume + job description
+        mode = "incremental" if ai_analysis is not None else "full"
+        if ai_analysis is None:
+            ai_analysis, cache_tier = await get_ai_analysis(
+                resume_text, job_description, latency_budget, admit_user_id=user_id
+            )
+            response.headers["X-Analysis-Cache"] = "miss" if cache_tier == "miss" else f"hit-{cache_tier}"
+        response.headers["X-Analysis-Mode"] = mode
         
         # Create analysis result
-        analysis_id = f"analysis_{uuid.uuid4().hex[:12]}"
-        analysis_doc = {
-            "analysis_id": analysis_id,
-            "user_id": user_id,
-            "resume_filename": resume.filename,
-            "job_description": job_description,
-            "overall_score": round(overall_score, 1),
-            "skill_match_score": ai_analysis["skill_match_score"],
-            "experience_score": ai_analysis["experience_score"],
-            "ats_score": ai_analysis["ats_score"],
-            "matched_skills": ai_analysis["matched_skills"],
-            "missing_skills": ai_analysis["missing_skills"],
-            "suggestions": ai_analysis["suggestions"],
-            "keyword_analysis": {
-                "resume_keywords": ai_analysis.get("resume_keywords", []),
-                "job_keywords": ai_analysis.get("job_keywords", [])
-            },
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
-        
-        await db.analyses.insert_one(analysis_doc)
+        analysis_doc = build_analysis_doc(
+            user_id, stored.filename, job_description_id, ai_analysis, stored.resume_id, resume_sections
+        )
+        if base is not None:
+            base_analysis, diff = base
+            analysis_doc["delta"] = analysis_delta(base_analysis, analysis_doc, diff, mode)
+        with span("db_insert"):
+            await db.analyses.insert_one(analysis_doc)
         
-        # Return analysis (without _id)
-        return {k: v for k, v in analysis_doc.items() if k != "_id"}
+        return analysis_response(analysis_doc, job_description)
         
     except HTTPException:
         raise
@@ -466,16 +1053,342 @@ async def analyze_resume(
         logging.error(f"Analysis error: {e}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@api_router.post("/analyze/preview")
+async def preview_resume_match(
+    resume: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+    job_description: str = Form(...),
+    user_id: str = Depends(get_current_user)
+):
+    """Instantly match resume skills and keywords against a job description without the AI model
+
+    The preview is computed locally and is not stored in the analysis history.
+    """
+    stored = await resolve_resume(resume, resume_id, user_id)
+    started = time.perf_counter()
+    local_match = match(stored.extraction.text, job_description)
+    return {
+        "resume_id": stored.resume_id,
+        "resume_filename": stored.filename,
+        "matched_skills": local_match.matched_skills,
+        "missing_skills": local_match.missing_skills,
+        "skill_match_score": local_match.skill_match_score,
+        "keyword_score": local_match.keyword_score,
+        "keyword_analysis": {
+            "resume_keywords": local_match.resume_keywords,
+            "job_keywords": local_match.job_keywords
+        },
+        "match_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+
+@api_router.post("/analyze/batch")
+async def analyze_resume_batch(
+    resumes: List[UploadFile] = File(...),
+    job_descriptions: List[str] = Form(...),
+    format: str = "ndjson",
+    user_id: str = Depends(get_current_user)
+):
+    """Analyze one resume against many job descriptions, or many resumes against one job description
+
+    Results are streamed back as NDJSON (or SSE with format=sse) as each analysis completes.
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    if len(resumes) != 1 and len(job_descriptions) != 1:
+        raise HTTPException(status_code=400, detail="Provide either one resume or one job description")
+    if len(resumes) * len(job_descriptions) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {BATCH_MAX_ITEMS} analyses")
+    
+    # Extract every resume once, before the uploads are closed, and store each job description once
+    stored_resumes = await asyncio.gather(
+        *(load_resume(resume, user_id) for resume in resumes), return_exceptions=True
+    )
+    pairs = [
+        (resume_index, job_index)
+        for resume_index in range(len(resumes))
+        for job_index in range(len(job_descriptions))
+    ]
+    # The batch is charged up front, only for pairs with a readable resume that the cache cannot answer
+    readable = [pair for pair in pairs if not isinstance(stored_resumes[pair[0]], BaseException)]
+    cached = dict(zip(readable, await admit_cache_misses(
+        user_id, [(stored_resumes[r].extraction.text, job_descriptions[j]) for r, j in readable]
+    )))
+    job_description_ids = await store_job_descriptions(user_id, job_descriptions)
+    results: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def analyze_pair(resume_index: int, job_index: int) -> Optional[dict]:
+        item = {"resume_index": resume_index, "job_index": job_index, "resume_filename": resumes[resume_index].filename}
+        stored = stored_resumes[resume_index]
+        try:
+            if isinstance(stored, BaseException):
+                raise stored
+            item["resume_id"] = stored.resume_id
+            ai_analysis, cache_tier = cached[(resume_index, job_index)]
+            if ai_analysis is None:
+                async with semaphore:
+                    # The batch was charged up front and runs at most BATCH_CONCURRENCY analyses at a time
+                    ai_analysis = await analyze_and_cache(
+                        stored.extraction.text, job_descriptions[job_index], bounded=False
+                    )
+            analysis_doc = build_analysis_doc(
+                user_id, resumes[resume_index].filename, job_description_ids[job_index], ai_analysis, stored.resume_id,
+                section_hashes(stored.extraction.text),
+            )
+            analysis = analysis_response(analysis_doc, job_descriptions[job_index])
+            await results.put({**item, "status": "ok", "cache": cache_tier, "analysis": analysis})
+            return analysis_doc
+        except HTTPException as e:
+            await results.put({**item, "status": "error", "error": e.detail})
+        except Exception as e:
+            logging.error(f"Batch analysis error: {e}")
+            await results.put({**item, "status": "error", "error": "Analysis failed"})
+        return None
+    
+    async def run_batch():
+        # Runs independently of the response so finished analyses are stored even if the client disconnects
+        analysis_docs = await asyncio.gather(*(analyze_pair(*pair) for pair in pairs))
+        analysis_docs = [doc for doc in analysis_docs if doc is not None]
+        if analysis_docs:
+            with span("db_insert"):
+                await db.analyses.insert_many(analysis_docs, ordered=False)
+        await results.put({"status": "done", "total": len(pairs), "succeeded": len(analysis_docs)})
+    
+    batch_task = asyncio.create_task(run_batch())
+    background_tasks.add(batch_task)
+    batch_task.add_done_callback(background_tasks.discard)
+    
+    def encode(item: dict) -> str:
+        if format == "sse":
+            event = "done" if item["status"] == "done" else "result"
+            return f"event: {event}\ndata: {json.dumps(item)}\n\n"
+        return json.dumps(item) + "\n"
+    
+    async def stream_results():
+        while True:
+            item = await results.get()
+            yield encode(item)
+            if item["status"] == "done":
+                break
+        await batch_task
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream_results(), media_type=media_type)
+
+@api_router.post("/analyses/jobs", status_code=202)
+async def create_analysis_job(
+    resume: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+    job_description: str = Form(...),
+    user_id: str = Depends(get_current_user)
+):
+    """Queue a resume analysis and return its job id immediately
+
+    The rate limit is charged when the job reaches the model, not for jobs
+    whose upload cannot be read or whose analysis is cached.
+    """
+    # Uploads are extracted by the job worker unless the same file's text is already stored
+    if resume is not None and resume_id is None:
+        upload = await spool_resume(resume)
+        payload = {"path": upload.path, "sha256": upload.sha256, "size": upload.size}
+        filename = resume.filename
+    else:
+        stored = await resolve_resume(resume, resume_id, user_id)
+        payload = {"resume": stored}
+        filename = stored.filename
+    
+    job = None
+    try:
+        if "path" in payload:
+            stored = await resume_store.find_by_hash(user_id, payload["sha256"])
+            if stored is not None:
+                discard_analysis_job(payload)
+                payload = {"resume": stored}
+        job = await analysis_jobs.submit(
+            user_id,
+            {**payload, "job_description": job_description},
+            resume_filename=filename,
+        )
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "10"})
+    finally:
+        # Once queued, the spooled upload belongs to the job
+        if job is None:
+            discard_analysis_job(payload)
+    
+    return {"job_id": job["job_id"], "status": job["status"], "stage": job["stage"]}
+
+@api_router.get("/analyses/jobs/{job_id}")
+async def get_analysis_job(job_id: str, user_id: str = Depends(get_current_user)):
+    """Get the status of a queued analysis"""
+    job = await analysis_jobs.get(job_id, user_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@api_router.get("/analyses/jobs/{job_id}/events")
+async def stream_analysis_job(job_id: str, user_id: str = Depends(get_current_user)):
+    """Stream job progress as server-sent events until the job finishes"""
+    job = await analysis_jobs.get(job_id, user_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    # Sent, and the stream closed, if the job expires or is deleted while it is being followed
+    job_gone = {"job_id": job_id, "status": "failed", "error": "Job not found"}
+    
+    async def stream_events():
+        events = analysis_jobs.subscribe(job_id)
+        try:
+            current = await analysis_jobs.get(job_id, user_id)
+            if current is None:
+                yield f"event: error\ndata: {json.dumps(job_gone)}\n\n"
+                return
+            yield f"event: progress\ndata: {json.dumps(current)}\n\n"
+            while current["status"] not in TERMINAL_STATUSES:
+                try:
+                    current = await asyncio.wait_for(events.get(), timeout=JOB_EVENTS_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    # The job may be running in another worker process; fall back to its stored state
+                    latest = await analysis_jobs.get(job_id, user_id)
+                    if latest is None:
+                        yield f"event: error\ndata: {json.dumps(job_gone)}\n\n"
+                        return
+                    if latest["updated_at"] == current["updated_at"]:
+                        yield ": keep-alive\n\n"
+                        continue
+                    current = latest
+                # Fields of the analysis streamed from the model arrive as "partial" events
+                event = "partial" if "partial" in current else "progress"
+                yield f"event: {event}\ndata: {json.dumps(current)}\n\n"
+        finally:
+            analysis_jobs.unsubscribe(job_id, events)
+    
+    return StreamingResponse(stream_events(), media_type="text/event-stream")
+
+def encode_analyses_cursor(analysis: dict) -> str:
+    """Encode the keyset position after an analysis as an opaque cursor"""
+    position = json.dumps([analysis["created_at"], analysis["analysis_id"]])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+def decode_analyses_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        created_at, analysis_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(created_at), str(analysis_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @api_router.get("/analyses")
-async def get_user_analyses(user_id: str = Depends(get_current_user)):
-    """Get all analyses for current user"""
-    analyses = await db.analyses.find(
-        {"user_id": user_id},
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(100)
+async def get_user_analyses(
+    response: Response,
+    limit: int = Query(100, ge=1, le=ANALYSES_PAGE_MAX),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: str = "full",
+    include_job_description: bool = True,
+    user_id: str = Depends(get_current_user)
+):
+    """Get analyses for current user, newest first
+
+    Pages are keyed on (created_at, analysis_id); pass the X-Next-Cursor header
+    of one page as ``cursor`` to fetch the next. ``view=summary`` returns only
+    scores and skill counts, and ``fields`` selects specific fields. With
+    ``include_job_description=false`` the full view returns only each
+    analysis's ``job_description_id``.
+    """
+    if view not in ("full", "summary"):
+        raise HTTPException(status_code=400, detail="view must be 'full' or 'summary'")
+    
+    query = {"user_id": user_id}
+    if cursor:
+        created_at, analysis_id = decode_analyses_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "analysis_id": {"$lt": analysis_id}},
+        ]
+    
+    hydrate = False
+    if fields:
+        requested = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = requested - set(AnalysisResult.model_fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        if "job_description" in requested:
+            requested.add("job_description_id")
+            hydrate = True
+        projection = {"$project": {"_id": 0, "created_at": 1, "analysis_id": 1, **{field: 1 for field in requested}}}
+    elif view == "summary":
+        projection = {"$project": ANALYSIS_SUMMARY_PROJECTION}
+    elif include_job_description:
+        projection = {"$project": {"_id": 0, "resume_sections": 0}}
+        hydrate = True
+    else:
+        # Analyses stored before job descriptions were deduplicated still embed the text
+        projection = {"$project": {"_id": 0, "resume_sections": 0, "job_description": 0}}
     
+    analyses = await db.analyses.aggregate([
+        {"$match": query},
+        {"$sort": {"created_at": -1, "analysis_id": -1}},
+        {"$limit": limit},
+        projection,
+    ]).to_list(limit)
+    if hydrate:
+        await hydrate_job_descriptions(user_id, analyses)
+    
+    if len(analyses) == limit:
+        response.headers["X-Next-Cursor"] = encode_analyses_cursor(analyses[-1])
     return analyses
 
+@api_router.get("/analyses/count")
+async def count_user_analyses(user_id: str = Depends(get_current_user)):
+    """Count analyses for current user"""
+    return {"count": await db.analyses.count_documents({"user_id": user_id})}
+
+@api_router.get("/analyses/export")
+async def export_user_analyses(
+    format: str = "ndjson",
+    include_job_description: bool = True,
+    user_id: str = Depends(get_current_user)
+):
+    """Stream the current user's whole analysis history as NDJSON or CSV, newest first
+
+    Rows are written as the database cursor is read, with chunked transfer
+    encoding, so exports of any size use constant memory.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    filename = f"analyses-{datetime.now(timezone.utc):%Y%m%d}.{format}"
+    return StreamingResponse(
+        export_chunks(db, job_store, {"user_id": user_id}, format, HISTORY_BATCH_SIZE, include_job_description),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@api_router.post("/analyses/import")
+async def import_user_analyses(
+    request: Request,
+    format: str = "ndjson",
+    user_id: str = Depends(get_current_user)
+):
+    """Add analyses from an NDJSON or CSV export to the current user's history
+
+    The request body is parsed as it arrives and stored in ordered batches.
+    Analyses that are already stored are skipped; invalid rows are reported
+    with their line numbers.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    records = iter_records(
+        iter_lines(request.stream(), HISTORY_IMPORT_MAX_ROW_CHARS), format, HISTORY_IMPORT_MAX_ROW_CHARS
+    )
+    try:
+        return await import_analyses(db, job_store, records, user_id=user_id, batch_size=HISTORY_BATCH_SIZE)
+    except HistoryRowTooLong as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except HistoryFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="The import must be UTF-8 encoded")
+
 @api_router.get("/analyses/{analysis_id}")
 async def get_analysis_by_id(
     analysis_id: str,
@@ -484,12 +1397,13 @@ async def get_analysis_by_id(
     """Get specific analysis by ID"""
     analysis = await db.analyses.find_one(
         {"analysis_id": analysis_id, "user_id": user_id},
-        {"_id": 0}
+        {"_id": 0, "resume_sections": 0}
     )
     
     if not analysis:
         raise HTTPException(status_code=404, detail="Analysis not found")
     
+    await hydrate_job_descriptions(user_id, [analysis])
     return analysis
 
 @api_router.delete("/analyses/{analysis_id}")
@@ -507,16 +1421,140 @@ async def delete_analysis(
     
     return {"message": "Analysis deleted successfully"}
 
-# Include the router in the main app
-app.include_router(api_router)
+@api_router.get("/resumes")
+async def get_user_resumes(user_id: str = Depends(get_current_user)):
+    """List the user's stored resumes, most recently used first, for analyzing again by resume_id"""
+    return await resume_store.list(user_id)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@api_router.delete("/resumes/{resume_id}")
+async def delete_resume(resume_id: str, user_id: str = Depends(get_current_user)):
+    """Delete a stored resume's text; analyses that used it are kept"""
+    if not await resume_store.delete(user_id, resume_id):
+        raise HTTPException(status_code=404, detail="Resume not found")
+    return {"message": "Resume deleted successfully"}
+
+# Job Description and Matching Routes
+@api_router.post("/job-descriptions", status_code=201)
+async def save_job_descriptions(request: JobDescriptionsRequest, user_id: str = Depends(get_current_user)):
+    """Save job descriptions for matching against resumes; saving one again returns its existing id"""
+    jobs = [job.model_dump() for job in request.job_descriptions]
+    if len(jobs) > JOB_IMPORT_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {JOB_IMPORT_MAX_ITEMS} job descriptions can be saved at once")
+    if await job_store.count(user_id) + len(jobs) > job_store.max_entries_per_user:
+        raise HTTPException(status_code=400, detail=f"At most {job_store.max_entries_per_user} job descriptions can be stored")
+    
+    with span("embedding"):
+        vectors = await asyncio.to_thread(lambda: [job_search.vector_fields(job["text"]) for job in jobs])
+    job_description_ids = await job_store.put_many(user_id, jobs, vectors)
+    return {"job_description_ids": job_description_ids}
+
+@api_router.get("/job-descriptions")
+async def get_job_descriptions(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=ANALYSES_PAGE_MAX),
+    user_id: str = Depends(get_current_user)
+):
+    """List the user's saved job descriptions, newest first"""
+    return await job_store.list(user_id, skip, limit)
+
+@api_router.delete("/job-descriptions/{job_description_id}")
+async def delete_job_description(job_description_id: str, user_id: str = Depends(get_current_user)):
+    """Delete a saved job description; analyses that used it are kept"""
+    if not await job_store.delete(user_id, job_description_id):
+        raise HTTPException(status_code=404, detail="Job description not found")
+    return {"message": "Job description deleted successfully"}
+
+@api_router.post("/match/job-descriptions")
+async def match_job_descriptions_for_resume(
+    resume: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+    k: int = Form(10, ge=1, le=MATCH_MAX_K),
+    analyze: int = Form(0, ge=0, le=MATCH_MAX_ANALYZE, description="Run the full AI analysis for this many of the top matches"),
+    user_id: str = Depends(get_current_user)
+):
+    """Rank the user's saved job descriptions by similarity to a resume
+
+    Ranking uses local embeddings only; the AI analysis runs just for the
+    ``analyze`` most similar jobs, whose analyses are stored in the history.
+    """
+    stored = await resolve_resume(resume, resume_id, user_id)
+    with span("vector_search"):
+        ranked = await job_search.search(user_id, stored.extraction.text, k)
+    jobs = await job_store.get_many(user_id, [jd_id for jd_id, _ in ranked])
+    matches = [
+        {"job_description_id": jd_id, "title": jobs[jd_id]["title"], "similarity": similarity}
+        for jd_id, similarity in ranked
+        if jd_id in jobs
+    ]
+    
+    shortlist = matches[:analyze]
+    analyses = await analyze_shortlist(user_id, [(stored, jobs[item["job_description_id"]]) for item in shortlist])
+    for item, analysis in zip(shortlist, analyses):
+        item["analysis"] = analysis
+    return {"resume_id": stored.resume_id, "resume_filename": stored.filename, "matches": matches}
+
+@api_router.post("/match/resumes")
+async def match_resumes_for_job(
+    job_description_id: Optional[str] = Form(None),
+    job_description: Optional[str] = Form(None),
+    k: int = Form(10, ge=1, le=MATCH_MAX_K),
+    analyze: int = Form(0, ge=0, le=MATCH_MAX_ANALYZE, description="Run the full AI analysis for this many of the top matches"),
+    user_id: str = Depends(get_current_user)
+):
+    """Rank the user's stored resumes by similarity to a saved or given job description"""
+    if (job_description_id is None) == (job_description is None):
+        raise HTTPException(status_code=400, detail="Provide either a job_description_id or a job_description")
+    if job_description_id is not None:
+        job = await job_store.get(user_id, job_description_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job description not found")
+        job_description = job["text"]
+    else:
+        job = {"job_description_id": None, "text": job_description}
+    
+    with span("vector_search"):
+        ranked = await resume_search.search(user_id, job_description, k)
+    resumes = await resume_store.find_many(user_id, [resume_id for resume_id, _ in ranked])
+    matches = [
+        {"resume_id": resume_id, "resume_filename": resumes[resume_id]["filename"], "similarity": similarity}
+        for resume_id, similarity in ranked
+        if resume_id in resumes
+    ]
+    
+    shortlist = []
+    for item in matches[:analyze]:
+        stored = await resume_store.get(user_id, item["resume_id"])
+        if stored is not None:
+            shortlist.append((item, stored))
+    if shortlist and job["job_description_id"] is None:
+        job["job_description_id"] = (await store_job_descriptions(user_id, [job_description]))[0]
+    analyses = await analyze_shortlist(user_id, [(stored, job) for _, stored in shortlist])
+    for (item, _), analysis in zip(shortlist, analyses):
+        item["analysis"] = analysis
+    return {"job_description_id": job["job_description_id"], "matches": matches}
+
+@api_router.get("/health/live")
+async def liveness():
+    """Report that this worker is running and its event loop is responsive"""
+    return {"status": "ok", "worker_id": WORKER_ID, "uptime_seconds": round(time.monotonic() - WORKER_STARTED_AT, 1)}
+
+@api_router.get("/health/ready")
+async def readiness():
+    """Report whether this worker should receive traffic: prewarmed, not shutting down, and MongoDB reachable"""
+    if worker_draining:
+        raise HTTPException(status_code=503, detail="Shutting down")
+    if not worker_ready:
+        raise HTTPException(status_code=503, detail="Starting")
+    try:
+        await asyncio.wait_for(db.command("ping"), READINESS_TIMEOUT_SECONDS)
+    except Exception as e:
+        logging.warning(f"Readiness check failed: {e!r}")
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return {"status": "ready", "worker_id": WORKER_ID}
+
+async def get_metrics():
+    """Expose metrics in the Prometheus text format"""
+    return metrics.render()
 
 # Configure logging
 logging.basicConfig(
@@ -525,6 +1563,102 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+def get_http_client():
+    """Return the shared HTTP client for OAuth calls, creating it on first use"""
+    global http_client
+    if http_client is None:
+        http_client = create_http_client(**HTTP_POOL_OPTIONS)
+    return http_client
+
+def prewarm_imports():
+    """Import the modules that are otherwise loaded on first use, and open the HTTP clients"""
+    started = time.perf_counter()
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logging.warning(f"Could not prewarm {name}: {e}")
+    get_http_client()
+    model_router.start()
+    logging.info(f"Imported {len(HEAVY_MODULES)} modules in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+async def prewarm():
+    """Open database connections, create indexes and start extraction workers before taking traffic"""
+    started = time.perf_counter()
+    if PREWARM_IMPORTS:
+        prewarm_imports()
+    # Concurrent pings make the driver open that many pooled connections
+    await asyncio.gather(*(db.command("ping") for _ in range(max(1, MONGO_MIN_POOL_SIZE))))
+    await ensure_indexes()
+    await analysis_cache.ensure_indexes()
+    await resume_store.ensure_indexes()
+    await user_rate_limiter.ensure_indexes()
+    await job_store.ensure_indexes()
+    await analysis_jobs.ensure_indexes()
+    if PREWARM_EXTRACTION:
+        await extraction_executor.prewarm()
+    logging.info(f"Worker {WORKER_ID} prewarmed in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+async def drain_background_tasks(timeout_seconds: float):
+    """Wait for detached work, such as batches whose client went away, to finish storing its results"""
+    if background_tasks:
+        _, pending = await asyncio.wait(list(background_tasks), timeout=timeout_seconds)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logging.warning(f"Cancelled {len(pending)} background tasks after {timeout_seconds:g}s drain")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prewarm the worker before it reports ready, and drain its background work before it exits"""
+    global http_client, worker_ready, worker_draining
+    await prewarm()
+    await analysis_jobs.recover_interrupted()
+    analysis_jobs.start()
+    contact_mailer.start()
+    await contact_mailer.requeue_pending()
+    worker_ready = True
+    try:
+        yield
+    finally:
+        # The server has stopped accepting connections and finished in-flight requests by now
+        worker_ready, worker_draining = False, True
+        await asyncio.gather(
+            analysis_jobs.drain(SHUTDOWN_DRAIN_SECONDS),
+            contact_mailer.drain(SHUTDOWN_DRAIN_SECONDS),
+            drain_background_tasks(SHUTDOWN_DRAIN_SECONDS),
+        )
+        await contact_mailer.stop()
+        extraction_executor.shutdown()
+        await model_router.close()
+        if http_client is not None:
+            await http_client.aclose()
+            http_client = None
+        client.close()
+
+def create_app() -> FastAPI:
+    """Build the ASGI app
+
+    ``uvicorn server:app`` runs one worker; ``uvicorn server:create_app
+    --factory --workers N`` (or gunicorn with uvicorn workers, without
+    ``--preload``) runs N, each importing this module and building its own
+    clients and caches. See DEPLOYMENT.md.
+    """
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(api_router)
+    app.add_api_route("/metrics", get_metrics, methods=["GET"], response_class=PlainTextResponse)
+    
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Analysis-Cache", "X-Analysis-Mode", "X-Extraction-Pages", "X-Next-Cursor", "X-Resume-Store", "Server-Timing"],
+    )
+    
+    # Added last so it also times CORS handling; Server-Timing headers are opt-in
+    app.add_middleware(TimingMiddleware, server_timing=SERVER_TIMING)
+    return app
+
+app = create_app()
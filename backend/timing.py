@@ -0,0 +1,94 @@
+"""Per-request stage timings: Prometheus histograms plus an optional Server-Timing header"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from metrics import Histogram, exponential_buckets
+
+REQUEST_SECONDS = Histogram(
+    "resumatch_http_request_duration_seconds", "HTTP request latency", ("method", "endpoint", "status")
+)
+STAGE_SECONDS = Histogram("resumatch_stage_duration_seconds", "Time spent in each request stage", ("stage",))
+PAYLOAD_BYTES = Histogram(
+    "resumatch_payload_bytes", "Sizes of uploads, extracted text and responses", ("kind",),
+    buckets=exponential_buckets(256, 4, 10),
+)
+TOKENS = Histogram(
+    "resumatch_prompt_tokens", "Estimated tokens per analysis prompt", ("kind",),
+    buckets=exponential_buckets(64, 2, 10),
+)
+
+# Stage durations of the current request in seconds, keyed by stage name
+_request_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_stages", default=None)
+
+
+def record_stage(stage: str, seconds: float):
+    """Record a stage measured elsewhere"""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def span(stage: str):
+    """Time the enclosed block as ``stage``"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def server_timing_header(stages: Dict[str, float], total: float) -> str:
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in stages.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class TimingMiddleware:
+    """Records request latency and response size, and collects the stage spans of each request
+
+    With ``server_timing`` enabled, stages finished before the response
+    headers are sent are reported in a ``Server-Timing`` header.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stages: Dict[str, float] = {}
+        token = _request_stages.set(stages)
+        started = time.perf_counter()
+        status = 500
+        response_bytes = 0
+
+        async def send_with_timing(message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    header = server_timing_header(stages, time.perf_counter() - started)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode())]}
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stages.reset(token)
+            endpoint = scope.get("endpoint")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                endpoint=getattr(endpoint, "__name__", "unmatched"),
+                status=status,
+            )
+            PAYLOAD_BYTES.observe(response_bytes, kind="response")
@@ -0,0 +1,27 @@
+"""Identity and liveness of the API worker processes that share a database
+
+Several workers (uvicorn/gunicorn processes, on one or more hosts) serve the
+same MongoDB. Work that only lives in one process's memory, such as a queued
+analysis job's payload or an email waiting for a retry, is tagged with that
+process's ``WORKER_ID`` so the others can tell whether its owner is gone.
+"""
+import os
+import socket
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def worker_alive(worker_id: str) -> bool:
+    """Whether the worker with this id is still running (assumed alive on other hosts)"""
+    hostname, _, pid = worker_id.rpartition(":")
+    if hostname != socket.gethostname() or not pid.isdigit():
+        return True
+    if int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
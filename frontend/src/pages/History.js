@@ -18,7 +18,7 @@ const History = () => {
 
   const fetchAnalyses = async () => {
     try {
-      const response = await fetch(`${BACKEND_URL}/api/analyses`, {
+      const response = await fetch(`${BACKEND_URL}/api/analyses?view=summary`, {
         credentials: 'include'
       });
 
@@ -179,7 +179,7 @@ const History = () => {
                     </div>
 
                     <div className="text-sm text-primary/70 line-clamp-2">
-                      {analysis.matched_skills.length} matched skills • {analysis.missing_skills.length} missing skills
+                      {analysis.matched_skills_count} matched skills • {analysis.missing_skills_count} missing skills
                     </div>
                   </div>
 
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import admission
+from admission import AdmissionRejected, LLMAdmission, UserRateLimiter
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission.time, "time", clock.time)
+    return clock
+
+
+def make_limiter(**options) -> UserRateLimiter:
+    return UserRateLimiter(AsyncMongoMockClient()["test"]["rate_limits"], **options)
+
+
+def test_rate_limiter_allows_a_burst_then_refills(clock):
+    limiter = make_limiter(rate_per_minute=60, burst=3)
+
+    async def run():
+        for _ in range(3):
+            await limiter.acquire("alice")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire("alice")
+        assert rejected.value.retry_after == 1
+        # Other users have their own bucket
+        await limiter.acquire("bob")
+        clock.now += 1
+        await limiter.acquire("alice")
+        with pytest.raises(AdmissionRejected):
+            await limiter.acquire("alice")
+
+    asyncio.run(run())
+
+
+def test_rate_limiter_charges_cost(clock):
+    limiter = make_limiter(rate_per_minute=6, burst=4)
+
+    async def run():
+        await limiter.acquire("alice", 3)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limiter.acquire("alice", 2)
+        assert rejected.value.retry_after == 10
+        with pytest.raises(AdmissionRejected, match="At most 4"):
+            await limiter.acquire("alice", 5)
+        await limiter.acquire("alice", 1)
+
+    asyncio.run(run())
+
+
+def test_rate_limiter_rejects_after_losing_every_update(clock):
+    limiter = make_limiter(rate_per_minute=60, burst=3, max_retries=2)
+
+    async def run():
+        await limiter.acquire("alice")
+        original = limiter.collection.update_one
+
+        async def lose(*args, **kwargs):
+            # Another worker updates the bucket between our read and our compare-and-set
+            await original({"_id": "alice"}, {"$inc": {"full_at": 0.001}})
+            return await original(*args, **kwargs)
+
+        limiter.collection.update_one = lose
+        with pytest.raises(AdmissionRejected, match="slow down"):
+            await limiter.acquire("alice")
+
+    asyncio.run(run())
+
+
+def test_admission_queues_up_to_max_waiting():
+    async def run():
+        gate = LLMAdmission(max_concurrent=1, max_waiting=1, max_wait_seconds=5)
+        release = asyncio.Event()
+        order = []
+
+        async def call(name, bounded=True):
+            async with gate.slot(bounded):
+                order.append(name)
+                await release.wait()
+
+        first = asyncio.create_task(call("first"))
+        await settle()
+        second = asyncio.create_task(call("second"))
+        await settle()
+        assert gate._in_use == 1 and gate._waiting == 1
+        with pytest.raises(AdmissionRejected, match="busy"):
+            async with gate.slot():
+                pass
+        # Background work is not bounded by the queue
+        background = asyncio.create_task(call("background", bounded=False))
+        await settle()
+        assert gate._waiting == 2
+        release.set()
+        await asyncio.gather(first, second, background)
+        assert order == ["first", "second", "background"]
+        assert gate._waiting == 0 and gate._in_use == 0
+
+    asyncio.run(run())
+
+
+def test_admission_times_out_waiting_for_a_slot():
+    async def run():
+        gate = LLMAdmission(max_concurrent=1, max_waiting=4, max_wait_seconds=0.01)
+        async with gate.slot():
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with gate.slot():
+                    pass
+        assert rejected.value.retry_after >= 1
+        assert gate._waiting == 0
+        async with gate.slot():
+            pass
+
+    asyncio.run(run())
@@ -0,0 +1,82 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import HTTPException, Response
+from mongomock_motor import AsyncMongoMockClient
+
+for name, value in {"MONGO_URL": "mongodb://localhost:1", "DB_NAME": "test", "EMERGENT_LLM_KEY": "test"}.items():
+    os.environ.setdefault(name, value)
+
+import server  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(server, "db", db)
+    return db
+
+
+def analysis(n: int, created_at: str, user_id: str = "user_1") -> dict:
+    return {
+        "analysis_id": f"analysis_{n:02d}", "user_id": user_id, "resume_filename": f"{n}.pdf",
+        "job_description_id": None, "overall_score": n, "skill_match_score": n, "experience_score": n,
+        "ats_score": n, "matched_skills": [], "missing_skills": [], "suggestions": [],
+        "keyword_analysis": {}, "created_at": created_at,
+    }
+
+
+async def page(cursor=None, limit=3, user_id="user_1"):
+    response = Response()
+    analyses = await server.get_user_analyses(
+        response, limit=limit, cursor=cursor, fields="overall_score", view="full",
+        include_job_description=False, user_id=user_id,
+    )
+    return [doc["analysis_id"] for doc in analyses], response.headers.get("X-Next-Cursor")
+
+
+def test_cursor_round_trip():
+    cursor = server.encode_analyses_cursor({"created_at": "2026-01-02T03:04:05+00:00", "analysis_id": "analysis_1"})
+    assert server.decode_analyses_cursor(cursor) == ("2026-01-02T03:04:05+00:00", "analysis_1")
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "e30=", "WzEsIDIsIDNd"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as error:
+        server.decode_analyses_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_pages_cover_every_analysis_once_despite_ties(db):
+    # Several analyses share a created_at, so the analysis_id breaks the tie
+    times = ["2026-01-01T00:00:00+00:00"] * 3 + ["2026-01-02T00:00:00+00:00"] * 4 + ["2026-01-03T00:00:00+00:00"]
+    docs = [analysis(n, created_at) for n, created_at in enumerate(times)] + [analysis(99, times[-1], "user_2")]
+
+    async def run():
+        await db.analyses.insert_many(docs)
+        seen, cursor = [], None
+        while True:
+            ids, cursor = await page(cursor)
+            seen.append(ids)
+            # A newer analysis does not shift the pages after it
+            await db.analyses.insert_one(analysis(50 + len(seen), "2026-02-01T00:00:00+00:00"))
+            if cursor is None:
+                return seen
+
+    pages = asyncio.run(run())
+    assert pages == [
+        ["analysis_07", "analysis_06", "analysis_05"],
+        ["analysis_04", "analysis_03", "analysis_02"],
+        ["analysis_01", "analysis_00"],
+    ]
+
+
+def test_full_last_page_ends_with_an_empty_page(db):
+    async def run():
+        await db.analyses.insert_many([analysis(n, f"2026-01-0{n + 1}T00:00:00+00:00") for n in range(2)])
+        ids, cursor = await page(limit=2)
+        assert ids == ["analysis_01", "analysis_00"] and cursor is not None
+        assert await page(cursor, limit=2) == ([], None)
+
+    asyncio.run(run())
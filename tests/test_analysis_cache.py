@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import analysis_cache
+from analysis_cache import AnalysisCache, analysis_cache_key
+
+ANALYSIS = {"skill_match_score": 80.0}
+
+
+def make_cache(**kwargs) -> AnalysisCache:
+    return AnalysisCache(AsyncMongoMockClient()["test"]["analysis_cache"], **kwargs)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_least_recently_used_entries_are_evicted_from_memory():
+    async def run():
+        cache = make_cache(max_entries=2)
+        for key in ("a", "b"):
+            await cache.set(key, {"key": key}, "model", "v1")
+        # Reading "a" makes "b" the least recently used
+        assert await cache.get("a") == ({"key": "a"}, "memory")
+        await cache.set("c", {"key": "c"}, "model", "v1")
+        assert list(cache._entries) == ["a", "c"]
+        # The evicted entry is still served by MongoDB
+        assert await cache.get("b") == ({"key": "b"}, "mongo")
+
+    asyncio.run(run())
+
+
+def test_mongo_hits_are_promoted_to_memory():
+    async def run():
+        cache = make_cache()
+        await cache.set("key", ANALYSIS, "model", "v1")
+        # Another worker, with an empty memory tier, sharing the collection
+        other = AnalysisCache(cache.collection)
+        assert await other.get("key") == (ANALYSIS, "mongo")
+        assert await other.get("key") == (ANALYSIS, "memory")
+        assert await other.get("unknown") == (None, "miss")
+
+    asyncio.run(run())
+
+
+def test_memory_entries_expire_after_the_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(analysis_cache.time, "monotonic", clock)
+
+    async def run():
+        cache = make_cache(ttl_seconds=60)
+        await cache.ensure_indexes()
+        info = await cache.collection.index_information()
+        assert info["created_at_1"]["expireAfterSeconds"] == 60
+
+        await cache.set("key", ANALYSIS, "model", "v1")
+        clock.now += 60
+        assert await cache.get("key") == (ANALYSIS, "memory")
+        clock.now += 1
+        # The TTL index has removed the MongoDB copy by now
+        await cache.collection.delete_many({})
+        assert await cache.get("key") == (None, "miss")
+        assert "key" not in cache._entries
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("resume, job_description", [
+    ("Jane  Doe\n\nPython,\tGo ", "Senior PYTHON developer"),
+    ("jane doe python, go", "  senior python\r\ndeveloper"),
+    # NFKC folds full-width letters
+    ("Ｊａｎｅ Doe Python, Go", "Senior python developer"),
+])
+def test_keys_ignore_cosmetic_differences(resume, job_description):
+    assert analysis_cache_key(resume, job_description, "model", "v1") == analysis_cache_key(
+        "Jane Doe Python, Go", "senior python developer", "model", "v1"
+    )
+
+
+def test_keys_change_with_content_model_and_prompt_version():
+    key = analysis_cache_key("Jane Doe", "Python developer", "model", "v1")
+    assert len({
+        key,
+        analysis_cache_key("Jane Doe", "Go developer", "model", "v1"),
+        analysis_cache_key("Jane Roe", "Python developer", "model", "v1"),
+        analysis_cache_key("Jane Doe", "Python developer", "other-model", "v1"),
+        analysis_cache_key("Jane Doe", "Python developer", "model", "v2"),
+        # Parts are separated, so moving text between them changes the key
+        analysis_cache_key("Jane Doe Python", "developer", "model", "v1"),
+    }) == 6
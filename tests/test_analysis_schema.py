@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+import pytest
+
+from analysis_schema import AnalysisStream, IncrementalObjectParser, parse_analysis, repair_prompt
+from model_router import InvalidModelResponse
+
+ANALYSIS = {
+    "skill_match_score": 80,
+    "experience_score": 70.5,
+    "ats_score": 90,
+    "matched_skills": ["Python", "C++"],
+    "missing_skills": ["Kubernetes"],
+    "experience_relevance": 'Led "platform" work, {mostly} backend, \\ and [infra]',
+    "suggestions": ["Quantify impact", "Add a, b and c"],
+    "resume_keywords": ["python"],
+    "job_keywords": ["python", "kubernetes"],
+}
+RESPONSE = "```json\n" + json.dumps(ANALYSIS, indent=2) + "\n```"
+
+
+def feed_in_chunks(text: str, size: int) -> dict:
+    parser = IncrementalObjectParser()
+    members = {}
+    for start in range(0, len(text), size):
+        chunk = parser.feed(text[start:start + size])
+        assert not set(chunk) & set(members), "a member was returned twice"
+        members.update(chunk)
+    assert parser.complete and not parser.errors
+    return members
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10000])
+def test_chunking_does_not_change_result(size):
+    assert feed_in_chunks(RESPONSE, size) == ANALYSIS
+
+
+def test_members_are_returned_as_soon_as_they_complete():
+    parser = IncrementalObjectParser()
+    assert parser.feed('{"skill_match_score": 8') == {}
+    assert parser.feed('0, "matched_skills": ["a", ') == {"skill_match_score": 80}
+    assert parser.feed('"b"], "ats_score"') == {"matched_skills": ["a", "b"]}
+    assert not parser.complete
+    assert parser.feed(": 1}") == {"ats_score": 1}
+    assert parser.complete
+
+
+def test_text_after_object_is_ignored():
+    parser = IncrementalObjectParser()
+    assert parser.feed('{"a": 1}\n{"b": 2}') == {"a": 1}
+    assert parser.complete
+
+
+def test_invalid_member_is_reported():
+    parser = IncrementalObjectParser()
+    assert parser.feed('{"a": 1, "b": tru, "c": 3}') == {"a": 1, "c": 3}
+    assert parser.errors and "'\"b\": tru'" in parser.errors[0]
+
+
+def test_parse_analysis_validates():
+    assert parse_analysis(RESPONSE)["matched_skills"] == ["Python", "C++"]
+    with pytest.raises(InvalidModelResponse, match="complete JSON object"):
+        parse_analysis(json.dumps(ANALYSIS)[:-1])
+    with pytest.raises(InvalidModelResponse, match="ats_score"):
+        parse_analysis(json.dumps({**ANALYSIS, "ats_score": 140}))
+    with pytest.raises(InvalidModelResponse, match="suggestions"):
+        parse_analysis(json.dumps({key: value for key, value in ANALYSIS.items() if key != "suggestions"}))
+
+
+def test_analysis_stream_reports_fields_in_order():
+    seen = []
+
+    async def on_field(name, value):
+        seen.append(name)
+
+    async def run():
+        stream = AnalysisStream(on_field)
+        for start in range(0, len(RESPONSE), 5):
+            await stream.feed(RESPONSE[start:start + 5])
+        return stream
+
+    stream = asyncio.run(run())
+    assert seen == list(ANALYSIS)
+    assert stream.first_score_seconds is not None
+    assert stream.result()["ats_score"] == 90
+
+
+def test_analysis_stream_rejects_truncated_response():
+    async def run():
+        stream = AnalysisStream()
+        await stream.feed(RESPONSE[:len(RESPONSE) // 2])
+        return stream
+
+    with pytest.raises(InvalidModelResponse, match="ended before"):
+        asyncio.run(run()).result()
+
+
+def test_invalid_fields_are_not_reported():
+    seen = {}
+
+    async def on_field(name, value):
+        seen[name] = value
+
+    async def run():
+        stream = AnalysisStream(on_field)
+        await stream.feed(json.dumps({**ANALYSIS, "ats_score": 140, "suggestions": [], "skill_match_score": "80"}))
+        return stream
+
+    stream = asyncio.run(run())
+    assert "ats_score" not in seen and "suggestions" not in seen
+    # Valid fields are reported as the schema reads them
+    assert seen["skill_match_score"] == 80.0
+    with pytest.raises(InvalidModelResponse, match="ats_score"):
+        stream.result()
+
+
+def test_repair_prompt_repeats_the_request():
+    prompt = "Analyze this resume against the job description.\n\nRESUME:\nJane Doe, Python"
+    repair = repair_prompt(prompt, '{"skill_match_score": 80', "response ended before the JSON object was complete")
+    assert repair.startswith(prompt)
+    assert '{"skill_match_score": 80' in repair and "response ended" in repair
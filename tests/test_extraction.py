@@ -0,0 +1,74 @@
+import io
+
+import pytest
+
+from benchmarks.fixtures import make_docx, template_docx, text_docx
+from extraction import docx_text_python_docx, docx_text_xml, extract_text_from_docx, iter_part_lines
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+LINES = ["Jane Doe, jane@example.com", "Senior backend engineer", "Experience", "Built & ran <services>"]
+SKILLS = ["Languages: Python, Go", "Databases: MongoDB", "Cloud: AWS"]
+
+
+def write(tmp_path, data: bytes, name: str = "resume.docx") -> str:
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def part(body: str) -> io.BytesIO:
+    return io.BytesIO(f'<w:document xmlns:w="{W}"><w:body>{body}</w:body></w:document>'.encode())
+
+
+@pytest.mark.parametrize("paragraphs", [1, 40, 400])
+def test_plain_documents_match_python_docx(tmp_path, paragraphs):
+    path = write(tmp_path, make_docx(paragraphs))
+    assert docx_text_xml(path).text == docx_text_python_docx(path).text
+
+
+def test_template_reads_header_tables_text_boxes_and_footer(tmp_path):
+    text = docx_text_xml(write(tmp_path, template_docx(LINES, SKILLS))).text
+    lines = text.split("\n")
+    assert lines[0] == LINES[0]
+    assert lines[-1] == "References available on request"
+    # The text box comes where it is anchored, and its legacy copy is skipped
+    assert lines.index("Senior backend engineer") == lines.index("Profile ") - 1
+    assert text.count("Senior backend engineer") == 1
+    assert lines.index("Languages: Python, Go") < lines.index("Databases: MongoDB") < lines.index("Cloud: AWS")
+    assert "Built & ran <services>" in lines
+
+
+def test_runs_breaks_and_deleted_text():
+    body = (
+        "<w:p><w:r><w:t>a</w:t><w:tab/><w:t>b</w:t><w:br/><w:t>c</w:t><w:br w:type=\"page\"/></w:r>"
+        "<w:del><w:r><w:delText>gone</w:delText></w:r></w:del><w:r><w:t xml:space=\"preserve\"> d</w:t></w:r></w:p>"
+        "<w:tbl><w:tr><w:tc><w:p><w:r><w:t>x</w:t></w:r></w:p></w:tc><w:tc><w:p><w:r><w:t>y</w:t></w:r></w:p></w:tc>"
+        "</w:tr></w:tbl>"
+    )
+    assert list(iter_part_lines(part(body))) == ["a\tb\nc d", "x", "y"]
+
+
+def test_budget_caps_a_paragraph_of_many_runs():
+    body = "<w:p>" + "<w:r><w:t>word </w:t></w:r>" * 10000 + "</w:p><w:p><w:r><w:t>next</w:t></w:r></w:p>"
+    assert list(iter_part_lines(part(body), 100)) == [("word " * 21)[:101]]
+    assert len(list(iter_part_lines(part(body)))[0]) == 50000
+
+
+def test_budget_stops_after_enough_lines():
+    body = "<w:p><w:r><w:t>line</w:t></w:r></w:p>" * 1000
+    assert len(list(iter_part_lines(part(body), 20))) == 5
+
+
+@pytest.mark.parametrize("max_chars", [10, 26, 27, 28, 500])
+def test_truncation_matches_the_text_limit(tmp_path, max_chars):
+    path = write(tmp_path, text_docx(LINES))
+    full = docx_text_xml(path).text
+    result = docx_text_xml(path, max_chars)
+    assert result.text == full[:max_chars]
+    assert result.truncated == (len(full) > max_chars)
+
+
+def test_unreadable_file_falls_back_then_fails(tmp_path):
+    path = write(tmp_path, b"not a zip file")
+    with pytest.raises(Exception, match="Error parsing DOCX"):
+        extract_text_from_docx(path, None, "xml")
@@ -0,0 +1,169 @@
+import asyncio
+import json
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from compression import TextCodec
+from embeddings import HashedEmbedder, VectorSearch
+from history_io import (
+    HistoryFormatError, HistoryRowTooLong, encode_csv, export_chunks, import_analyses, iter_lines, iter_records, normalize_row,
+)
+from job_store import JobDescriptionStore
+
+ROW = {
+    "analysis_id": "analysis_1",
+    "user_id": "user_1",
+    "resume_filename": "resume.pdf",
+    "job_description": "Python developer, ünicode and \"quotes\"\nover two lines",
+    "overall_score": 71.5,
+    "skill_match_score": 80,
+    "experience_score": 70,
+    "ats_score": 60,
+    "matched_skills": ["Python"],
+    "missing_skills": ["Go"],
+    "suggestions": ["Add metrics"],
+    "keyword_analysis": {"resume_keywords": ["python"], "job_keywords": ["python", "go"]},
+    "created_at": "2026-01-02T03:04:05+00:00",
+}
+
+
+async def chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def collect(iterator) -> list:
+    return [item async for item in iterator]
+
+
+def read(data: bytes, format: str = "ndjson", size: int = 3) -> list:
+    return asyncio.run(collect(iter_records(iter_lines(chunks(data, size)), format)))
+
+
+def make_store(db) -> JobDescriptionStore:
+    return JobDescriptionStore(
+        db.job_descriptions, VectorSearch(db.job_descriptions, "job_description_id", HashedEmbedder(64)),
+        codec=TextCodec("zlib", threshold=1024),
+    )
+
+
+def test_lines_survive_any_chunking():
+    data = "﻿é\r\nline two\n€ last".encode("utf-8")
+    for size in range(1, len(data) + 1):
+        assert asyncio.run(collect(iter_lines(chunks(data, size)))) == ["é\r\n", "line two\n", "€ last"]
+
+
+def test_ndjson_reports_bad_lines_with_their_numbers():
+    data = b'{"a": 1}\n\nnot json\n[1, 2]\n{"b": 2}'
+    records = read(data)
+    assert records[0] == (1, {"a": 1})
+    assert records[1][0] == 3 and records[1][1].startswith("Invalid JSON")
+    assert records[2] == (4, "Expected a JSON object")
+    assert records[3] == (5, {"b": 2})
+
+
+def test_csv_cells_may_span_lines():
+    data = encode_csv([ROW], header=True).encode()
+    [(line_number, row)] = read(data, "csv")
+    assert line_number == 2
+    assert row["job_description"] == ROW["job_description"]
+    assert normalize_row(row) == {**ROW, "overall_score": 71.5, "skill_match_score": 80.0,
+                                  "experience_score": 70.0, "ats_score": 60.0}
+
+
+def test_csv_requires_a_header_and_terminated_cells():
+    with pytest.raises(HistoryFormatError):
+        read(b"analysis_1,user_1\n", "csv")
+    records = read(b'resume_filename,user_id\n"a.pdf,u\n', "csv")
+    assert records == [(2, "Unterminated quoted CSV cell")]
+
+
+def test_overlong_rows_stop_the_import_without_buffering_the_body():
+    read_chunks = 0
+
+    async def endless():
+        nonlocal read_chunks
+        while True:
+            read_chunks += 1
+            yield b"x" * 100
+
+    async def run():
+        with pytest.raises(HistoryRowTooLong):
+            await collect(iter_lines(endless(), max_chars=1000))
+
+    asyncio.run(run())
+    assert read_chunks == 11
+
+    with pytest.raises(HistoryRowTooLong):
+        asyncio.run(collect(iter_lines(chunks(b"short\n" + b"x" * 50 + b"\n", 100), max_chars=20)))
+    # A quoted CSV cell that is never closed is limited to the same length
+    data = b'resume_filename,user_id\n"a.pdf' + b",u\n" * 20
+    with pytest.raises(HistoryRowTooLong):
+        asyncio.run(collect(iter_records(iter_lines(chunks(data, 7)), "csv", max_chars=30)))
+
+
+@pytest.mark.parametrize("change, error", [
+    ({"resume_filename": None}, "resume_filename is required"),
+    ({"job_description": ""}, "job_description or job_description_id is required"),
+    ({"ats_score": "high"}, "ats_score must be a number"),
+    ({"skill_match_score": None}, "skill_match_score is required"),
+    ({"suggestions": {"text": "Add metrics"}}, "suggestions must be a list"),
+    ({"routing": "{not json"}, "routing is not valid JSON"),
+    ({"created_at": "yesterday"}, "created_at must be an ISO 8601 timestamp"),
+])
+def test_invalid_rows(change, error):
+    with pytest.raises(ValueError, match=error):
+        normalize_row({**ROW, **change})
+
+
+@pytest.mark.parametrize("created_at", [
+    "2026-01-02T03:04:05Z",
+    "2026-01-02T05:04:05+02:00",
+    "2026-01-02T03:04:05",
+    "2026-01-02 03:04:05+00:00",
+])
+def test_created_at_is_stored_in_utc(created_at):
+    assert normalize_row({**ROW, "created_at": created_at})["created_at"] == "2026-01-02T03:04:05+00:00"
+
+
+def test_missing_fields_get_defaults():
+    doc = normalize_row({key: value for key, value in ROW.items() if key not in ("analysis_id", "created_at")}, "user_2")
+    assert doc["user_id"] == "user_2"
+    assert doc["analysis_id"].startswith("analysis_")
+    assert doc["created_at"].endswith("+00:00")
+
+
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+def test_round_trip(format):
+    async def run():
+        db = AsyncMongoMockClient()["test"]
+        store = make_store(db)
+        rows = [
+            {**ROW, "analysis_id": f"analysis_{n}", "created_at": f"2026-01-02T03:04:{n:02d}+00:00"}
+            for n in range(5)
+        ]
+        lines = "".join(json.dumps(row) + "\n" for row in rows[:3]) + "{broken\n"
+        stats = await import_analyses(db, store, iter_records(iter_lines(chunks(lines.encode(), 7))), batch_size=2)
+        assert (stats["imported"], stats["invalid"]) == (3, 1)
+        assert stats["errors"][0]["line"] == 4
+        assert await db.job_descriptions.count_documents({}) == 1
+
+        exported = "".join(await collect(export_chunks(db, store, {"user_id": "user_1"}, format, batch_size=2)))
+        target = AsyncMongoMockClient()["test"]
+        target_store = make_store(target)
+        records = iter_records(iter_lines(chunks(exported.encode(), 5)), format)
+        stats = await import_analyses(target, target_store, records)
+        assert (stats["imported"], stats["invalid"]) == (3, 0)
+        # Importing again skips the analyses already stored
+        records = iter_records(iter_lines(chunks(exported.encode(), 5)), format)
+        stats = await import_analyses(target, target_store, records)
+        assert (stats["imported"], stats["skipped_existing"]) == (0, 3)
+
+        imported = await target.analyses.find({}, {"_id": 0}).sort("created_at", 1).to_list(None)
+        assert [doc["analysis_id"] for doc in imported] == ["analysis_0", "analysis_1", "analysis_2"]
+        job = await target_store.get(imported[0]["user_id"], imported[0]["job_description_id"])
+        assert job["text"] == ROW["job_description"]
+        assert all("job_description" not in doc for doc in imported)
+
+    asyncio.run(run())
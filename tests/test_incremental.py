@@ -0,0 +1,144 @@
+import asyncio
+import io
+import os
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Response, UploadFile
+from mongomock_motor import AsyncMongoMockClient
+
+from incremental import SectionDiff, choose_base, merge_analysis, section_hashes
+
+for name, value in {"MONGO_URL": "mongodb://localhost:1", "DB_NAME": "test", "EMERGENT_LLM_KEY": "test"}.items():
+    os.environ.setdefault(name, value)
+
+import server  # noqa: E402
+from benchmarks.fixtures import text_docx  # noqa: E402
+
+JOB_DESCRIPTION = "Backend engineer: Python, Docker and MongoDB"
+RESUME = ["Jane Doe", "Skills", "Python, MongoDB", "Experience", "Built APIs at Acme", "Education", "BSc"]
+# The same resume with Docker added to its skills
+EDITED_RESUME = ["Jane Doe", "Skills", "Python, Docker, MongoDB", "Experience", "Built APIs at Acme", "Education", "BSc"]
+ANALYSIS = {
+    "skill_match_score": 60.0, "experience_score": 70.0, "ats_score": 80.0,
+    "matched_skills": ["Python", "MongoDB"], "missing_skills": ["Docker"], "experience_relevance": "",
+    "suggestions": ["Add Docker experience", "Quantify the APIs you built"],
+    "resume_keywords": ["python", "mongodb"], "job_keywords": ["python", "docker", "mongodb"],
+}
+
+
+def test_section_hashes_number_repeated_sections_and_ignore_case():
+    hashes = section_hashes("Jane Doe\nExperience\nAcme\nExperience\nInitech")
+    assert list(hashes) == ["header", "experience", "experience_2"]
+    assert hashes != section_hashes("Jane Doe\nExperience\nAcme\nExperience\nGlobex")
+    assert section_hashes("\n".join(RESUME)) == section_hashes("\n".join(RESUME).upper().replace("SKILLS", "Skills"))
+
+
+def test_section_diff_and_base_choice():
+    before = section_hashes("\n".join(RESUME))
+    after = section_hashes("\n".join(EDITED_RESUME))
+    diff = SectionDiff.between(before, after)
+    assert (diff.changed, diff.added, diff.removed, diff.unchanged_ratio) == (["skills"], [], [], 0.75)
+    assert SectionDiff.between({"skills": "a"}, {"projects": "b"}).unchanged_ratio == 0.0
+
+    unrelated = {"analysis_id": "unrelated", "resume_sections": {"projects": "x"}}
+    closest = {"analysis_id": "closest", "resume_sections": before}
+    base, base_diff = choose_base([unrelated, closest, {"analysis_id": "legacy"}], after)
+    assert base is closest and base_diff.changed == ["skills"]
+    assert choose_base([], after) is None
+
+
+def test_merge_moves_skills_the_edit_added():
+    merged = merge_analysis(ANALYSIS, "\n".join(RESUME), "\n".join(EDITED_RESUME), JOB_DESCRIPTION)
+    assert merged["matched_skills"][:2] == ["Python", "MongoDB"] and len(merged["matched_skills"]) == 3
+    assert merged["missing_skills"] == []
+    assert merged["skill_match_score"] > ANALYSIS["skill_match_score"]
+    # The suggestion about the skill that is now matched is dropped
+    assert merged["suggestions"] == ["Quantify the APIs you built"]
+
+    unchanged = merge_analysis(ANALYSIS, "\n".join(RESUME), "\n".join(RESUME), JOB_DESCRIPTION)
+    for name in ("skill_match_score", "experience_score", "ats_score", "matched_skills", "missing_skills", "suggestions"):
+        assert unchanged[name] == ANALYSIS[name]
+
+
+@pytest.fixture
+def model(monkeypatch):
+    """Run analyze_resume against an in-memory database, recording the resumes sent to the model"""
+    db = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server.analysis_cache, "collection", db.analysis_cache)
+    monkeypatch.setattr(server.analysis_cache, "_entries", OrderedDict())
+    monkeypatch.setattr(server.job_store, "collection", db.job_descriptions)
+    monkeypatch.setattr(server.resume_store, "collection", db.resumes)
+    model = SimpleNamespace(calls=[], routing={"model": "stub", "fallback": None})
+
+    async def acquire(user_id, cost=1):
+        pass
+
+    async def analyze_resume_with_ai(resume_text, job_description, *args):
+        model.calls.append(resume_text)
+        return {**ANALYSIS, "routing": dict(model.routing)}
+
+    monkeypatch.setattr(server.user_rate_limiter, "acquire", acquire)
+    monkeypatch.setattr(server, "analyze_resume_with_ai", analyze_resume_with_ai)
+    return model
+
+
+async def analyze(lines, response=None) -> dict:
+    resume = UploadFile(io.BytesIO(text_docx(list(lines))), filename="resume.docx")
+    return await server.analyze_resume(
+        response or Response(), resume=resume, resume_id=None, job_description=JOB_DESCRIPTION,
+        latency_budget=None, incremental=True, user_id="user_1",
+    )
+
+
+def test_an_unchanged_resume_reuses_the_earlier_analysis(model):
+    async def run():
+        first = await analyze(RESUME)
+        assert "delta" not in first
+        response = Response()
+        again = await analyze(RESUME, response)
+        assert response.headers["X-Analysis-Mode"] == "incremental"
+        assert again["routing"] == {"model": "incremental", "base_analysis_id": first["analysis_id"]}
+        assert again["delta"]["changed_sections"] == [] and again["delta"]["added_sections"] == []
+        for name in ("overall_score", "skill_match_score", "experience_score", "ats_score", "matched_skills"):
+            assert again[name] == first[name]
+
+    asyncio.run(run())
+    assert len(model.calls) == 1
+
+
+def test_an_edited_section_is_merged_into_the_earlier_analysis(model):
+    async def run():
+        first = await analyze(RESUME)
+        # A merged analysis is never the base of the next one
+        await analyze(RESUME)
+        edited = await analyze(EDITED_RESUME)
+        assert edited["routing"]["base_analysis_id"] == first["analysis_id"]
+        assert edited["delta"]["mode"] == "incremental"
+        assert edited["delta"]["changed_sections"] == ["skills"]
+        assert edited["delta"]["missing_skills"]["removed"] == ["Docker"]
+        assert edited["missing_skills"] == []
+        assert edited["delta"]["scores"]["skill_match_score"]["change"] > 0
+
+    asyncio.run(run())
+    assert len(model.calls) == 1
+
+
+@pytest.mark.parametrize("routing", [
+    {"model": "local", "fallback": "timeout"},
+    {"model": "incremental", "fallback": None},
+])
+def test_fallback_and_merged_analyses_are_not_used_as_a_base(model, routing):
+    model.routing = routing
+
+    async def run():
+        await analyze(RESUME)
+        response = Response()
+        edited = await analyze(EDITED_RESUME, response)
+        assert response.headers["X-Analysis-Mode"] == "full"
+        assert "delta" not in edited
+
+    asyncio.run(run())
+    assert len(model.calls) == 2
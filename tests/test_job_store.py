@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime
+
+from mongomock_motor import AsyncMongoMockClient
+
+from embeddings import HashedEmbedder, VectorSearch
+from job_store import SAVED, JobDescriptionStore
+
+
+def make_store() -> JobDescriptionStore:
+    collection = AsyncMongoMockClient()["test"]["job_descriptions"]
+    return JobDescriptionStore(collection, VectorSearch(collection, "job_description_id", HashedEmbedder(64), query=SAVED))
+
+
+async def put(store, texts, save=True, user_id="user_1"):
+    jobs = [{"text": text} for text in texts]
+    return await store.put_many(user_id, jobs, [store.search.vector_fields(text) for text in texts], save)
+
+
+def test_analyzed_job_descriptions_are_not_listed_or_counted():
+    async def run():
+        store = make_store()
+        [saved] = await put(store, ["Go developer"])
+        analyzed = await put(store, ["Python developer", "go   DEVELOPER"], save=False)
+        # The same text keeps its id and stays saved
+        assert analyzed[1] == saved
+        assert await store.count("user_1") == 1
+        assert [job["job_description_id"] for job in await store.list("user_1")] == [saved]
+        # Analyses can still read the text by id
+        assert (await store.get("user_1", analyzed[0]))["text"] == "Python developer"
+
+        # Saving an analyzed job description lists it
+        assert await put(store, ["Python developer"]) == analyzed[:1]
+        assert await store.count("user_1") == 2
+
+    asyncio.run(run())
+
+
+def test_analyzing_does_not_restore_a_deleted_job_description():
+    async def run():
+        store = make_store()
+        [job_description_id] = await put(store, ["Go developer"])
+        assert await store.delete("user_1", job_description_id)
+        assert await put(store, ["Go developer"], save=False) == [job_description_id]
+        assert await store.get("user_1", job_description_id) is None
+        assert await store.count("user_1") == 0
+        assert job_description_id in await store.get_many("user_1", [job_description_id], include_deleted=True)
+
+        # Saving it again does
+        assert await put(store, ["Go developer"]) == [job_description_id]
+        assert await store.count("user_1") == 1
+
+    asyncio.run(run())
+
+
+def test_search_sees_a_job_description_restored_after_another_is_deleted():
+    async def run():
+        store = make_store()
+        texts = ["Go developer", "Python developer", "Rust developer"]
+        # Stored a while ago, so the restore below is the newest write
+        fields = [{**store.search.vector_fields(text), "indexed_at": datetime(2024, 1, 1)} for text in texts]
+        go, python, rust = await store.put_many("user_1", [{"text": text} for text in texts], fields)
+        assert await store.delete("user_1", go)
+        assert {key for key, _ in await store.search.search("user_1", "developer", 10)} == {python, rust}
+
+        # Same document count and, before restores moved indexed_at, the same newest indexed_at
+        assert await store.delete("user_1", python)
+        assert await put(store, ["Go developer"]) == [go]
+        assert {key for key, _ in await store.search.search("user_1", "developer", 10)} == {go, rust}
+
+    asyncio.run(run())
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from jobs import AnalysisJobQueue, JobQueueFull
+
+
+def test_stop_discards_jobs_still_queued():
+    async def run():
+        release = asyncio.Event()
+        discarded = []
+
+        async def handler(job, payload, progress):
+            await progress("analyzing")
+            await release.wait()
+            return {}
+
+        queue = AnalysisJobQueue(
+            AsyncMongoMockClient()["test"]["analysis_jobs"], handler, max_queue=3, workers=1,
+            discard=lambda payload: discarded.append(payload["n"]),
+        )
+        queue.start()
+        jobs = [await queue.submit("user_1", {"n": n}) for n in range(3)]
+        while (await queue.get(jobs[0]["job_id"], "user_1"))["status"] != "running":
+            await asyncio.sleep(0)
+        await queue.drain(0.01)
+        # The running job's handler cleans up after itself; the queued ones are discarded
+        assert discarded == [1, 2]
+        statuses = [(await queue.get(job["job_id"], "user_1"))["status"] for job in jobs]
+        assert statuses == ["failed"] * 3
+        with pytest.raises(JobQueueFull):
+            await queue.submit("user_1", {"n": 3})
+
+    asyncio.run(run())
+
+
+def test_concurrent_submits_do_not_overfill_the_queue():
+    async def run():
+        async def handler(job, payload, progress):
+            return {}
+
+        collection = AsyncMongoMockClient()["test"]["analysis_jobs"]
+        insert_one = collection.insert_one
+
+        async def slow_insert_one(doc):
+            # Let the other submits check the queue while this job is being stored
+            await asyncio.sleep(0)
+            return await insert_one(doc)
+
+        collection.insert_one = slow_insert_one
+        queue = AnalysisJobQueue(collection, handler, max_queue=2, workers=1)
+        results = await asyncio.gather(
+            *(queue.submit("user_1", {"n": n}) for n in range(4)), return_exceptions=True
+        )
+        assert sum(isinstance(result, JobQueueFull) for result in results) == 2
+        assert await collection.count_documents({}) == 2
+
+    asyncio.run(run())
@@ -0,0 +1,65 @@
+import asyncio
+import smtplib
+
+from mongomock_motor import AsyncMongoMockClient
+
+from mailer import Mailer
+
+
+class FakeConnection:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.sent = []
+
+    def send(self, message):
+        if self.failures:
+            self.failures -= 1
+            raise smtplib.SMTPServerDisconnected("dropped")
+        self.sent.append(message)
+
+    def close(self):
+        pass
+
+
+def deliver(build_message, connection, docs, max_attempts=3) -> list:
+    async def run():
+        collection = AsyncMongoMockClient()["test"]["contacts"]
+        await collection.insert_many([{**doc, "delivery_status": "queued"} for doc in docs])
+        mailer = Mailer(collection, "contact_id", build_message, connection, max_attempts=max_attempts,
+                        retry_base_seconds=0.001)
+        mailer.start()
+        for doc in docs:
+            mailer.enqueue(dict(doc))
+        for _ in range(400):
+            if not await collection.count_documents({"delivery_status": {"$in": ["queued", "retrying"]}}):
+                break
+            await asyncio.sleep(0.005)
+        await mailer.stop()
+        return await collection.find({}, {"_id": 0}).sort("contact_id", 1).to_list(None)
+
+    return asyncio.run(run())
+
+
+def test_retries_smtp_errors_until_sent():
+    connection = FakeConnection(failures=2)
+    [doc] = deliver(lambda doc: doc["contact_id"], connection, [{"contact_id": "c1"}])
+    assert (doc["delivery_status"], doc["delivery_attempts"], doc["delivery_error"]) == ("sent", 3, None)
+    assert connection.sent == ["c1"]
+
+
+def test_gives_up_after_max_attempts():
+    [doc] = deliver(lambda doc: doc["contact_id"], FakeConnection(failures=5), [{"contact_id": "c1"}], max_attempts=2)
+    assert (doc["delivery_status"], doc["delivery_attempts"], doc["delivery_error"]) == ("failed", 2, "dropped")
+
+
+def test_message_that_cannot_be_built_is_marked_failed():
+    def build_message(doc):
+        if doc["contact_id"] == "c1":
+            raise KeyError("email")
+        return doc["contact_id"]
+
+    connection = FakeConnection()
+    docs = deliver(build_message, connection, [{"contact_id": "c1"}, {"contact_id": "c2"}])
+    assert [doc["delivery_status"] for doc in docs] == ["failed", "sent"]
+    assert docs[0]["delivery_error"] == "KeyError: 'email'"
+    assert connection.sent == ["c2"]
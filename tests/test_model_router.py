@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+from model_router import CircuitBreaker, InvalidModelResponse, ModelRouter
+
+
+class StubClient:
+    def __init__(self, model: str):
+        self.provider = "stub"
+        self.model = model
+
+    def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+def make_router(models=("a",), **options) -> ModelRouter:
+    options.setdefault("failure_threshold", 1)
+    options.setdefault("reset_seconds", 0.05)
+    return ModelRouter([StubClient(model) for model in models], **options)
+
+
+def open_breaker(breaker: CircuitBreaker):
+    breaker.record_failure()
+    assert breaker.state == "open"
+    time.sleep(breaker.reset_seconds + 0.01)
+    assert breaker.state == "half-open"
+
+
+def test_breaker_opens_after_threshold_and_half_opens_after_reset():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    # Only one trial at a time while half-open
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_trial_reopens_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    open_breaker(breaker)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_trial_cancelled_by_budget_is_released():
+    router = make_router()
+    breaker = router.routes[0].breaker
+    open_breaker(breaker)
+
+    async def slow(client, record):
+        await asyncio.sleep(1)
+
+    result, routing = asyncio.run(router.run(slow, lambda: "local", budget_seconds=0.05))
+    assert result == "local" and routing["fallback"] == "budget_expired"
+    assert routing["attempts"][0]["result"] == "cancelled"
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+
+
+def test_trial_cancelled_by_winning_hedge_is_released():
+    router = make_router(("a", "b"), hedge_delay_seconds=0.01, min_hedge_delay_seconds=0.01)
+    first, second = router.routes
+    open_breaker(first.breaker)
+
+    async def request(client, record):
+        await asyncio.sleep(1 if client.model == "a" else 0)
+        return client.model
+
+    result, routing = asyncio.run(router.run(request, lambda: "local", budget_seconds=2))
+    assert result == "b" and routing["hedged"]
+    assert [attempt["result"] for attempt in routing["attempts"]] == ["cancelled", "ok"]
+    assert first.breaker.allow()
+
+
+def test_invalid_responses_trip_breaker_and_fall_back():
+    router = make_router(("a", "b"))
+
+    async def invalid(client, record):
+        raise InvalidModelResponse("not json")
+
+    result, routing = asyncio.run(router.run(invalid, lambda: "local"))
+    assert result == "local" and routing["fallback"] == "all_attempts_failed"
+    assert [route.breaker.state for route in router.routes] == ["open", "open"]
+    result, routing = asyncio.run(router.run(invalid, lambda: "local"))
+    assert routing["fallback"] == "circuit_open" and routing["attempts"] == []
+
+
+def test_slow_model_is_hedged_on_next_model():
+    router = make_router(("a", "b"), hedge_delay_seconds=0.02, min_hedge_delay_seconds=0.02)
+
+    async def request(client, record):
+        await asyncio.sleep(0.5 if client.model == "a" else 0.01)
+        return client.model
+
+    result, routing = asyncio.run(router.run(request, lambda: "local"))
+    assert result == "b" and routing["model"] == "stub:b" and routing["hedged"]
+    assert all(route.breaker.state == "closed" for route in router.routes)
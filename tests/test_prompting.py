@@ -0,0 +1,89 @@
+from prompting import (
+    DEDUPE_MIN_CHARS, Section, compact_prompt_inputs, estimate_tokens, fit_sections, normalize_lines, segment_resume,
+)
+
+RESUME = """Jane Doe
+jane@example.com
+
+
+Summary
+Backend engineer   with\tten years of experience.
+
+Skills
+Python, Go, MongoDB
+Experience
+Senior Engineer, Acme
+Built the billing platform used by every team at Acme.
+Built the billing platform used by every team at Acme.
+2019
+Engineer, Initech
+2019
+Education
+BSc Computer Science
+"""
+
+
+def test_normalize_lines():
+    lines = normalize_lines(RESUME)
+    assert lines[:4] == ["Jane Doe", "jane@example.com", "", "Summary"]
+    assert "Backend engineer with ten years of experience." in lines
+    # Long repeated lines are dropped; short ones such as dates keep their place
+    assert lines.count("Built the billing platform used by every team at Acme.") == 1
+    assert lines.count("2019") == 2
+    assert lines[-1] == "BSc Computer Science"
+    assert normalize_lines("\n\n  \n") == []
+    assert len("2019") < DEDUPE_MIN_CHARS
+
+
+def test_segment_resume():
+    sections = segment_resume(normalize_lines(RESUME))
+    assert [section.name for section in sections] == ["header", "summary", "skills", "experience", "education"]
+    assert sections[0].lines[:2] == ["Jane Doe", "jane@example.com"]
+    assert sections[3].lines[0] == "Experience"
+    assert segment_resume(["Work Experience:", "Acme"])[0].name == "experience"
+    # A long line that happens to start with a heading word is not a heading
+    assert segment_resume(["Experience building large distributed systems for many years"])[0].name == "header"
+
+
+def test_fit_sections_keeps_priority_sections_in_document_order():
+    sections = [
+        Section("header", ["Jane Doe"]),
+        Section("interests", ["Interests", "Chess " * 40]),
+        Section("skills", ["Skills", "Python, Go"]),
+        Section("experience", ["Experience", "Acme " * 40]),
+    ]
+    fitted = fit_sections(sections, 70)
+    assert [section.name for section in fitted] == ["header", "interests", "skills", "experience"]
+    assert fitted[3].lines == sections[3].lines
+    # The lowest priority section gets what is left
+    assert fitted[1].lines == ["Interests", "Chess"]
+    assert [section.name for section in fit_sections(sections, 63)] == ["header", "skills", "experience"]
+    assert fit_sections(sections, 1000) == sections
+
+
+def test_fit_sections_cuts_a_single_long_paragraph():
+    paragraph = " ".join(f"word{n}" for n in range(3000))
+    [section] = fit_sections([Section("experience", ["Experience", paragraph])], 500)
+    assert section.lines[0] == "Experience"
+    assert paragraph.startswith(section.lines[1])
+    # Cut at a word boundary and close to the budget
+    assert paragraph[len(section.lines[1])] == " "
+    assert 480 < estimate_tokens(section.text) <= 500
+
+
+def test_compact_prompt_inputs():
+    compact = compact_prompt_inputs(RESUME, "Python   developer\n\n\nGo a plus")
+    assert compact.job_description == "Python developer\n\nGo a plus"
+    assert compact.sections == ["header", "summary", "skills", "experience", "education"]
+    assert compact.tokens_saved > 0
+
+
+def test_compact_prompt_inputs_cuts_single_line_inputs():
+    job_description = "We are hiring a backend engineer to build APIs. " * 150
+    resume = "Experience\n" + "Led the migration of services to Kubernetes and Go. " * 270
+    assert len(job_description) > 7000 and len(resume) > 13000
+    compact = compact_prompt_inputs(resume, job_description, resume_token_budget=3000, job_token_budget=1500)
+    assert job_description.startswith(compact.job_description)
+    assert 1400 < estimate_tokens(compact.job_description) <= 1500
+    assert compact.resume_text.startswith("Experience\nLed the migration")
+    assert 2900 < estimate_tokens(compact.resume_text) <= 3000
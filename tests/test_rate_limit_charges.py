@@ -0,0 +1,110 @@
+import asyncio
+import io
+import os
+from collections import OrderedDict
+
+import pytest
+from fastapi import HTTPException, Response, UploadFile
+from mongomock_motor import AsyncMongoMockClient
+
+for name, value in {"MONGO_URL": "mongodb://localhost:1", "DB_NAME": "test", "EMERGENT_LLM_KEY": "test"}.items():
+    os.environ.setdefault(name, value)
+
+import server  # noqa: E402
+from benchmarks.fixtures import text_docx  # noqa: E402
+
+JOB_DESCRIPTION = "Backend engineer: Python, Go and MongoDB"
+ANALYSIS = {
+    "skill_match_score": 80, "experience_score": 70, "ats_score": 90,
+    "matched_skills": ["Python"], "missing_skills": ["Go"], "experience_relevance": "",
+    "suggestions": ["Mention Go"], "resume_keywords": ["python"], "job_keywords": ["python", "go"],
+}
+
+
+@pytest.fixture
+def charges(monkeypatch):
+    """Run the analysis paths against an in-memory database and record what the rate limit is charged"""
+    db = AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server.analysis_cache, "collection", db.analysis_cache)
+    monkeypatch.setattr(server.analysis_cache, "_entries", OrderedDict())
+    monkeypatch.setattr(server.job_store, "collection", db.job_descriptions)
+    monkeypatch.setattr(server.resume_store, "collection", db.resumes)
+    charged = []
+
+    async def acquire(user_id, cost=1):
+        charged.append(cost)
+
+    async def analyze_resume_with_ai(resume_text, job_description, *args):
+        return {**ANALYSIS, "routing": {"model": "stub", "fallback": None}}
+
+    monkeypatch.setattr(server.user_rate_limiter, "acquire", acquire)
+    monkeypatch.setattr(server, "analyze_resume_with_ai", analyze_resume_with_ai)
+    return charged
+
+
+def upload(filename="resume.docx", lines=("Jane Doe", "Skills", "Python")) -> UploadFile:
+    data = text_docx(list(lines)) if filename.endswith(".docx") and lines else b"not a document"
+    return UploadFile(io.BytesIO(data), filename=filename)
+
+
+async def analyze(resume: UploadFile):
+    return await server.analyze_resume(
+        Response(), resume=resume, resume_id=None, job_description=JOB_DESCRIPTION,
+        latency_budget=None, incremental=False, user_id="user_1",
+    )
+
+
+def test_analyze_charges_only_model_calls(charges):
+    async def run():
+        for resume in (upload("resume.exe"), upload("resume.docx", lines=())):
+            with pytest.raises(HTTPException) as rejected:
+                await analyze(resume)
+            assert rejected.value.status_code in (400, 422)
+        await analyze(upload())
+        await analyze(upload())
+
+    asyncio.run(run())
+    assert charges == [1]
+
+
+def test_jobs_charge_only_model_calls(charges):
+    async def run():
+        with pytest.raises(HTTPException):
+            await server.create_analysis_job(
+                resume=upload("resume.exe"), resume_id=None, job_description=JOB_DESCRIPTION, user_id="user_1"
+            )
+        assert charges == []
+        await analyze(upload())
+        stored = await server.load_resume(upload(), "user_1")
+
+        async def progress(stage, **extra):
+            pass
+
+        job = {"job_id": "job_1", "user_id": "user_1", "resume_filename": stored.filename}
+        await server.run_analysis_job(job, {"resume": stored, "job_description": JOB_DESCRIPTION}, progress)
+        assert charges == [1]
+        await server.run_analysis_job(job, {"resume": stored, "job_description": "Go developer"}, progress)
+
+    asyncio.run(run())
+    assert charges == [1, 1]
+
+
+def test_batch_and_shortlist_charge_only_cache_misses(charges):
+    async def run():
+        await analyze(upload())
+        response = await server.analyze_resume_batch(
+            resumes=[upload(), upload("other.docx", lines=("John Roe", "Go")), upload("broken.docx", lines=())],
+            job_descriptions=[JOB_DESCRIPTION], format="ndjson", user_id="user_1",
+        )
+        lines = [line async for line in response.body_iterator]
+        assert len(lines) == 4
+
+        stored = await server.load_resume(upload(), "user_1")
+        jobs = [{"job_description_id": None, "text": text} for text in (JOB_DESCRIPTION, "Rust developer")]
+        analyses = await server.analyze_shortlist("user_1", [(stored, job) for job in jobs])
+        assert all("analysis_id" in analysis for analysis in analyses)
+
+    asyncio.run(run())
+    # The first analysis, the one new resume in the batch, and the one new job description in the shortlist
+    assert charges == [1, 1, 1]